@@ -6,7 +6,24 @@
 #
 
 ReportDir="$HOME/lint-reports"
+# Socket of a running `netlint serve` daemon, if any
+DaemonSocket="${NETLINT_DAEMON:-$HOME/.netlint.sock}"
 
 mkdir -p "$ReportDir"
 cfgfile=`basename $1`
-netlint -o "$ReportDir/$cfgfile.rpt" -i $1
+if [ -S "$DaemonSocket" ]; then
+  netlint --daemon "$DaemonSocket" -o "$ReportDir/$cfgfile.rpt" -i $1
+else
+  netlint -o "$ReportDir/$cfgfile.rpt" -i $1
+fi
+
+# Report what changed since the previous revision in the git repository,
+# only re-running the checks affected by the change.
+Results="$ReportDir/$cfgfile.json"
+if git -C `dirname $1` rev-parse -q --verify HEAD~1 > /dev/null; then
+  Previous=""
+  if [ -f "$Results" ]; then
+    Previous="--previous $Results"
+  fi
+  netlint -o "$ReportDir/$cfgfile.diff" -i $1 diff --ref HEAD~1 $Previous --save "$Results"
+fi
@@ -1,6 +1,8 @@
 """The actual checking logics as well as checks are implemented in this module."""
 
-# Import all the checks in order for the decorators to execute
+# Import all the facts and checks in order for the decorators to execute. Facts
+# have to be registered before the checks depending on them.
+from netlint.checks.facts import *  # noqa
 from netlint.checks.cisco_ios import *  # noqa
 from netlint.checks.cisco_nxos import *  # noqa
 from netlint.checks.various import *  # noqa
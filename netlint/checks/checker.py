@@ -1,9 +1,164 @@
 """Implement the Checker class to run the checks."""
+import asyncio
+import collections
+import collections.abc
+import concurrent.futures
 import functools
+import multiprocessing
+import os
+import re
+import sys
+import threading
 import typing
 
-from netlint.checks.types import CheckResult, CheckFunction
-from netlint.checks.utils import NOS, Tag
+from netlint.checks.patterns import pattern
+from netlint.checks.types import CheckResult, CheckFunction, FactFunction, LintResult
+from netlint.checks.utils import (
+    NOS,
+    NetlintConfParse,
+    Scope,
+    Tag,
+    bulky_blocks,
+    detect_nos,
+    parse,
+    prune_blocks,
+    split_stanzas,
+    stanza_scope,
+)
+
+# Number of stanza results a Checker keeps, see StanzaCache.
+STANZA_CACHE_SIZE = 65536
+
+# Configurations with fewer lines are always checked in a single process, see
+# Checker.run_checks.
+PARALLEL_MIN_LINES = 20000
+
+
+def fork_context() -> typing.Optional[multiprocessing.context.BaseContext]:
+    """Return the context starting processes by forking, if that is supported.
+
+    Windows can't fork, and macOS can but forking a process that uses system
+    frameworks isn't safe there (Python defaults to spawn there since 3.8).
+
+    :return: The context, None if processes can't be forked.
+    """
+    if (
+        sys.platform == "darwin"
+        or "fork" not in multiprocessing.get_all_start_methods()
+    ):
+        return None
+    return multiprocessing.get_context("fork")
+
+
+# Configurations to check with arun_many: their identifier, the configuration
+# and its NOS (detected if None).
+AsyncLintItems = typing.Union[
+    typing.Iterable[
+        typing.Tuple[typing.Hashable, typing.List[str], typing.Optional[NOS]]
+    ],
+    typing.AsyncIterable[
+        typing.Tuple[typing.Hashable, typing.List[str], typing.Optional[NOS]]
+    ],
+]
+
+
+class Fact:
+    """Class to represent a fact function.
+
+    Auto-generated when @Checker.register_fact() is used on a function.
+    """
+
+    def __init__(self, fact_function: FactFunction, name: str) -> None:
+        self.fact_function = fact_function
+        self.name = name
+        self.function_doc = fact_function.__doc__
+
+
+class Facts:
+    """Facts about a single configuration, each computed once on first access."""
+
+    def __init__(
+        self,
+        configuration: typing.List[str],
+        registry: typing.Optional[typing.Dict[str, Fact]] = None,
+    ) -> None:
+        """Initialize the facts about a configuration.
+
+        :param configuration: The configuration.
+        :param registry: The facts by name, defaults to those registered with
+            :meth:`Checker.register_fact`.
+        """
+        self.configuration = configuration
+        self.registry = Checker.facts if registry is None else registry
+        self._parsed: typing.Optional[NetlintConfParse] = None
+        self._values: typing.Dict[str, typing.Any] = {}
+
+    @property
+    def parsed(self) -> NetlintConfParse:
+        """The parsed configuration."""
+        if self._parsed is None:
+            self._parsed = parse("\n".join(self.configuration))
+        return self._parsed
+
+    def __getitem__(self, name: str) -> typing.Any:
+        """Return the value of a fact, computing it if necessary."""
+        if name not in self._values:
+            self._values[name] = self.registry[name].fact_function(self.parsed)
+        return self._values[name]
+
+    def release(self, name: str) -> None:
+        """Drop the value of a fact that is no longer needed."""
+        self._values.pop(name, None)
+
+
+# Number of trigger sets (one per group of checks seeing the same blocks) whose
+# scanning pattern is kept, see find_triggers.
+TRIGGER_SCAN_CACHE_SIZE = 64
+
+
+@functools.lru_cache(maxsize=TRIGGER_SCAN_CACHE_SIZE)
+def _trigger_scan(
+    triggers: typing.FrozenSet[str],
+) -> typing.Tuple[typing.Pattern, typing.List[typing.FrozenSet[str]]]:
+    """Build the pattern finding all triggers of a set in a single pass.
+
+    Every alternative only consumes the first character of its trigger and
+    looks ahead for the rest (in its group), so that the scan neither skips
+    triggers overlapping a match nor loses the fast search for the first
+    characters of all alternatives. At a position where several triggers
+    start, the longest one matches and the shorter ones are its prefixes.
+
+    :return: The pattern and the triggers implied by each of its groups (the
+        trigger of the group and all triggers contained in it).
+    """
+    ordered = sorted(triggers, key=lambda trigger: (-len(trigger), trigger))
+    alternatives = "|".join(
+        f"{re.escape(trigger[0])}(?=({re.escape(trigger[1:])}))" for trigger in ordered
+    )
+    implied = [
+        frozenset(other for other in ordered if other in trigger) for trigger in ordered
+    ]
+    return pattern(alternatives), implied
+
+
+def find_triggers(text: str, triggers: typing.Set[str]) -> typing.Set[str]:
+    """Return the triggers that occur in a text.
+
+    The text is scanned once for all triggers, stopping as soon as every one
+    of them was found.
+
+    :param text: The raw configuration text.
+    :param triggers: The substrings to look for.
+    """
+    if not triggers:
+        return set()
+    scan, implied = _trigger_scan(frozenset(triggers))
+    found: typing.Set[str] = set()
+    for match in scan.finditer(text):
+        found |= implied[typing.cast(int, match.lastindex) - 1]
+        if len(found) == len(triggers):
+            break
+    return found
 
 
 class Check:
@@ -18,16 +173,83 @@ class Check:
         apply_to: typing.List[NOS],
         name: str,
         tags: typing.Set[Tag],
+        scope: typing.Optional[typing.Set[Scope]] = None,
+        facts: typing.Optional[typing.Set[str]] = None,
+        triggers: typing.Optional[typing.Set[str]] = None,
+        stanza_local: bool = False,
+        blocks: typing.Optional[typing.Set[str]] = None,
     ) -> None:
         self.check_function = check_function
         self.apply_to = apply_to
         self.name = name
         self.tags = tags
+        self.scope = scope
+        self.facts = facts or set()
+        self.triggers = triggers
+        self.stanza_local = stanza_local
+        self.blocks = blocks or set()
         self.function_doc = check_function.__doc__
 
-    def __call__(self, configuration: typing.List[str]) -> typing.Optional[CheckResult]:
-        """Call the underlying function."""
-        return self.check_function(configuration)
+    def __call__(
+        self, configuration: typing.List[str], facts: typing.Optional[Facts] = None
+    ) -> typing.Optional[CheckResult]:
+        """Call the underlying function.
+
+        :param configuration: The configuration to check.
+        :param facts: The facts about the configuration to take the facts the
+            check depends on from. Computed on the fly if not given.
+        """
+        if facts is None:
+            facts = Facts(configuration)
+        return self.check_function(
+            configuration, **{name: facts[name] for name in self.facts}
+        )
+
+
+class StanzaCache:
+    """Results of stanza-local checks by the check and the text of the stanza.
+
+    Configurations rendered from the same templates share most of their
+    stanzas, which then only need to be checked once. The least recently
+    used results are evicted once ``max_size`` is exceeded.
+    """
+
+    def __init__(self, max_size: int = STANZA_CACHE_SIZE) -> None:
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._results: typing.MutableMapping[
+            typing.Tuple[str, str], typing.Optional[CheckResult]
+        ] = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def result(
+        self, check: Check, stanza: typing.List[str]
+    ) -> typing.Optional[CheckResult]:
+        """Return the result of a check for a single stanza, running it if needed.
+
+        :param check: The stanza-local check.
+        :param stanza: The lines of the stanza, see :func:`split_stanzas`.
+        """
+        key = (check.name, "\n".join(stanza))
+        with self._lock:
+            if key in self._results:
+                self.hits += 1
+                self._results.move_to_end(key)  # type: ignore
+                return self._results[key]
+        result = check(stanza)
+        with self._lock:
+            self.misses += 1
+            self._results[key] = result
+            while len(self._results) > self.max_size:
+                self._results.popitem(last=False)  # type: ignore
+        return result
+
+    @property
+    def hit_rate(self) -> float:
+        """The share of stanza results that were taken from the cache."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
 
 
 class Checker:
@@ -36,32 +258,136 @@ class Checker:
     # Map NOSes to applicable checks
     checks: typing.Dict[NOS, typing.List[Check]] = {}
 
-    def __init__(self) -> None:
-        pass
+    # Map names of facts to the facts
+    facts: typing.Dict[str, Fact] = {}
+
+    def __init__(
+        self, executor: typing.Optional[concurrent.futures.Executor] = None
+    ) -> None:
+        """Initialize the checker.
+
+        :param executor: The executor to run the checks in for :meth:`arun`
+            and :meth:`arun_many`. By default a thread pool is created on first
+            use and shut down by :meth:`close`.
+        """
+        # Copy the registries so that filtering the checks of an instance or
+        # loading rule packs into it doesn't affect other instances.
+        self.checks = {nos: list(checks) for nos, checks in Checker.checks.items()}
+        self.facts = dict(Checker.facts)
+        self.stanza_cache = StanzaCache()
+        self.executor = executor
+        self._owns_executor = executor is None
+
+    def filter_checks(
+        self,
+        select: typing.Optional[typing.Collection[str]] = None,
+        exclude: typing.Optional[typing.Collection[str]] = None,
+        exclude_tags: typing.Optional[typing.Collection[Tag]] = None,
+    ) -> None:
+        """Filter the checks of this instance.
+
+        :param select: Names of the checks to keep, overrides the exclusions.
+        :param exclude: Names of the checks to drop.
+        :param exclude_tags: Tags of the checks to drop.
+        """
+        for nos, checks in self.checks.items():
+            if select:
+                checks = [check for check in checks if check.name in select]
+            else:
+                checks = [
+                    check
+                    for check in checks
+                    if not check.tags.intersection(exclude_tags or ())
+                    and check.name not in (exclude or ())
+                ]
+            self.checks[nos] = checks
+
+    def load_rule_pack(self, path: str) -> None:
+        """Add the rules of a rule pack as checks of this instance.
+
+        See :mod:`netlint.checks.rules` for the format of rule packs.
+
+        :param path: The path of the rule pack.
+        :raise ValueError: If the rule pack is invalid or a rule has the same
+            name as a check of this instance.
+        """
+        # Imported here as the rules build on the Checker.
+        from netlint.checks.rules import RulePack
+
+        pack = RulePack.load(path)
+        names = {check.name for checks in self.checks.values() for check in checks}
+        clashing = sorted(names.intersection(rule.name for rule in pack.rules))
+        if clashing:
+            raise ValueError(f"Rules {clashing} in {path} clash with existing checks.")
+        self.facts[pack.fact.name] = pack.fact
+        for check in pack.checks():
+            for nos in check.apply_to:
+                self.checks.setdefault(nos, []).append(check)
 
     @classmethod
     def register(
-        cls, apply_to: typing.List[NOS], name: str, tags: typing.Set[Tag]
-    ) -> typing.Callable[
-        [typing.Callable[[typing.List[str]], typing.Optional[CheckResult]]],
-        Check,
-    ]:
+        cls,
+        apply_to: typing.List[NOS],
+        name: str,
+        tags: typing.Set[Tag],
+        scope: typing.Optional[typing.Set[Scope]] = None,
+        facts: typing.Optional[typing.Set[str]] = None,
+        triggers: typing.Optional[typing.Set[str]] = None,
+        stanza_local: bool = False,
+        blocks: typing.Optional[typing.Set[str]] = None,
+    ) -> typing.Callable[[CheckFunction], Check]:
         """Decorate a function to register it as a check with any Checker instance.
 
         :param apply_to: List of NOSes to apply the check for.
         :param name: Name of the check.
         :param tags: A list of check tags that apply to this check.
+        :param scope: The parts of the configuration the check looks at, used to
+            skip the check if none of them changed. None if the check may
+            depend on any part of the configuration.
+        :param facts: Names of the facts (see :meth:`register_fact`) the check
+            depends on. They are passed to the check as keyword arguments.
+        :param triggers: Substrings of which at least one has to occur in the
+            configuration for the check to possibly fail. The check is skipped
+            if none of them occurs. None if the check should always be run.
+        :param stanza_local: Whether the check only looks at one stanza at a
+            time, i.e. checking a configuration gives the same as checking every
+            top-level stanza in the scope on its own and concatenating the
+            flagged lines. The results of such checks are cached per stanza,
+            see :class:`StanzaCache`. The text of the result has to be constant.
+        :param blocks: The bulky blocks (e.g. "banner", see
+            :data:`netlint.checks.utils.bulky_blocks`) the check needs to look into.
+            The bodies of all other blocks are blanked before checks run.
         """
+        if stanza_local and not scope:
+            raise ValueError(f"Stanza-local check {name} needs a scope.")
+        unknown_facts = set(facts or ()) - set(cls.facts)
+        if unknown_facts:
+            raise ValueError(
+                f"Check {name} depends on unknown facts {sorted(unknown_facts)}."
+            )
+        unknown_blocks = set(blocks or ()) - set(bulky_blocks)
+        if unknown_blocks:
+            raise ValueError(
+                f"Check {name} looks into unknown blocks {sorted(unknown_blocks)}."
+            )
 
-        def decorator(
-            function: typing.Callable[[typing.List[str]], typing.Optional[CheckResult]],
-        ) -> Check:
+        def decorator(function: CheckFunction) -> Check:
             @functools.wraps(function)
-            def wrapper(config: typing.List[str]) -> typing.Optional[CheckResult]:
-                return function(config)
+            def wrapper(
+                config: typing.List[str], **kwargs: typing.Any
+            ) -> typing.Optional[CheckResult]:
+                return function(config, **kwargs)
 
             check = Check(
-                check_function=wrapper, apply_to=apply_to, name=name, tags=tags
+                check_function=wrapper,
+                apply_to=apply_to,
+                name=name,
+                tags=tags,
+                scope=scope,
+                facts=facts,
+                triggers=triggers,
+                stanza_local=stanza_local,
+                blocks=blocks,
             )
             for nos in apply_to:
                 if nos in cls.checks:
@@ -72,17 +398,404 @@ class Checker:
 
         return decorator
 
+    @classmethod
+    def register_fact(cls, name: str) -> typing.Callable[[FactFunction], Fact]:
+        """Decorate a function to register it as a fact checks can depend on.
+
+        A fact is derived from the parsed configuration of a device once and
+        shared between all checks that declare it in their facts.
+
+        :param name: Name of the fact.
+        """
+
+        def decorator(function: FactFunction) -> Fact:
+            fact = Fact(fact_function=function, name=name)
+            cls.facts[name] = fact
+            return fact
+
+        return decorator
+
     def run_checks(
-        self, configuration: typing.List[str], nos: NOS
+        self,
+        configuration: typing.List[str],
+        nos: NOS,
+        scopes: typing.Optional[typing.Set[Scope]] = None,
+        jobs: typing.Optional[int] = 1,
+        max_findings: typing.Optional[int] = None,
     ) -> typing.Dict[str, typing.Optional[CheckResult]]:
         """
         Run all the registered checks on the configuration.
 
         :param configuration: The configuration to check.
         :param nos: The NOS the configuration is for.
+        :param scopes: If given, only run the checks that look at any of these
+            scopes (or didn't declare a scope), see
+            :func:`netlint.checks.utils.changed_scopes`.
+        :param jobs: The number of worker processes to split the checks of a
+            large configuration over, None for one per CPU. Only used for
+            configurations of at least :data:`PARALLEL_MIN_LINES` lines on
+            platforms that can fork (see :func:`fork_context`), by
+            :meth:`_run_in_processes`.
+        :param max_findings: If given, stop once this many checks failed. The
+            checks then run in a single process by priority, see
+            :meth:`_run_until`, and those that didn't run are missing from the
+            results.
         :return: The check results.
         """
-        output = {}
-        for check in self.checks[nos]:
-            output[check.name] = check(configuration)
+        checks = [
+            check
+            for check in self.checks[nos]
+            if scopes is None or check.scope is None or check.scope.intersection(scopes)
+        ]
+        output: typing.Dict[str, typing.Optional[CheckResult]] = {}
+
+        # Every check only sees the bodies of the bulky blocks it looks into,
+        # those of all others are blanked before anything is scanned or parsed.
+        groups: typing.Dict[typing.FrozenSet[str], typing.List[Check]] = {}
+        for check in checks:
+            groups.setdefault(frozenset(check.blocks), []).append(check)
+        configurations = {
+            blocks: prune_blocks(configuration, nos, keep=blocks) for blocks in groups
+        }
+
+        # Skip checks none of whose triggers occur before anything is parsed.
+        for blocks, group in groups.items():
+            triggered = find_triggers(
+                "".join(configurations[blocks]),
+                {trigger for check in group for trigger in check.triggers or ()},
+            )
+            for check in group:
+                if check.triggers is not None and not check.triggers & triggered:
+                    output[check.name] = None
+            groups[blocks] = [check for check in group if check.name not in output]
+
+        if max_findings is not None:
+            output.update(self._run_until(groups, configurations, max_findings))
+            return output
+        for blocks, group in groups.items():
+            output.update(self._run_group(group, configurations[blocks], jobs))
+        return output
+
+    def _run_group(
+        self,
+        checks: typing.List[Check],
+        configuration: typing.List[str],
+        jobs: typing.Optional[int],
+    ) -> typing.Dict[str, typing.Optional[CheckResult]]:
+        """Run checks that see the same (pruned) configuration."""
+        stanza_checks = [check for check in checks if check.stanza_local]
+        checks = [check for check in checks if not check.stanza_local]
+
+        jobs = jobs or os.cpu_count() or 1
+        if jobs > 1 and len(configuration) >= PARALLEL_MIN_LINES:
+            context = fork_context()
+            if context is not None:
+                return self._run_in_processes(
+                    configuration, stanza_checks, checks, jobs, context
+                )
+
+        # Stanza-local checks run on every stanza in their scope on its own, so
+        # that stanzas seen before are only looked up.
+        output: typing.Dict[str, typing.Optional[CheckResult]] = {}
+        if stanza_checks:
+            stanzas = split_stanzas(configuration)
+            for check in stanza_checks:
+                output[check.name] = self._run_per_stanza(check, stanzas)
+        output.update(_run_sequentially(checks, configuration, self.facts))
+        return output
+
+    def _run_until(
+        self,
+        groups: typing.Dict[typing.FrozenSet[str], typing.List[Check]],
+        configurations: typing.Dict[typing.FrozenSet[str], typing.List[str]],
+        max_findings: int,
+    ) -> typing.Dict[str, typing.Optional[CheckResult]]:
+        """Run checks one after another until a number of them failed.
+
+        To find problems that matter as early as possible, security checks run
+        first, and checks that depend on facts (which are more expensive to
+        compute) run after those that don't.
+
+        :param groups: The checks by the bulky blocks they look into.
+        :param configurations: The configuration pruned for each group.
+        :param max_findings: The number of failed checks to stop at.
+        """
+        checks = sorted(
+            ((blocks, check) for blocks, group in groups.items() for check in group),
+            key=lambda item: (Tag.SECURITY not in item[1].tags, bool(item[1].facts)),
+        )
+        stanzas: typing.Dict[typing.FrozenSet[str], typing.List[typing.List[str]]] = {}
+        facts: typing.Dict[typing.FrozenSet[str], Facts] = {}
+        output: typing.Dict[str, typing.Optional[CheckResult]] = {}
+        findings = 0
+        for blocks, check in checks:
+            configuration = configurations[blocks]
+            if check.stanza_local:
+                if blocks not in stanzas:
+                    stanzas[blocks] = split_stanzas(configuration)
+                result = self._run_per_stanza(check, stanzas[blocks])
+            else:
+                if blocks not in facts:
+                    facts[blocks] = Facts(configuration, self.facts)
+                result = check(configuration, facts[blocks])
+            output[check.name] = result
+            if result:
+                findings += 1
+                if findings >= max_findings:
+                    break
+        return output
+
+    def _run_in_processes(
+        self,
+        configuration: typing.List[str],
+        stanza_checks: typing.List[Check],
+        checks: typing.List[Check],
+        jobs: int,
+        context: multiprocessing.context.BaseContext,
+    ) -> typing.Dict[str, typing.Optional[CheckResult]]:
+        """Split the checks of a single configuration over forked processes.
+
+        The configuration is parsed before the workers are forked, so that they
+        share it (copy-on-write) instead of parsing it again. Checks depending
+        on the same facts run in the same worker, so that every fact is still
+        computed once. The stanzas of stanza-local checks are split into a
+        chunk per worker. The results are merged in the order of the checks,
+        and of the stanzas for stanza-local checks, like :meth:`run_checks`
+        does.
+        """
+        stanzas = split_stanzas(configuration)
+        if checks:
+            parse("\n".join(configuration))
+        tasks = [_Task(names, None) for names in _group_by_facts(checks)]
+        # Configurations of blank (e.g. pruned) lines only have no stanzas.
+        if stanzas:
+            chunk_size = -(-len(stanzas) // jobs)
+            for check in stanza_checks:
+                for start in range(0, len(stanzas), chunk_size):
+                    tasks.append(_Task([check.name], (start, start + chunk_size)))
+
+        task_results = []
+        if tasks:
+            # ProcessPoolExecutor only takes a start method since Python 3.7.
+            # The arguments of the initializer are inherited by the forked
+            # workers instead of being pickled, and aren't shared with other
+            # threads of this process checking at the same time.
+            with context.Pool(
+                min(jobs, len(tasks)),
+                initializer=_init_worker,
+                initargs=((self, configuration, stanzas),),
+            ) as pool:
+                task_results = pool.map(_run_task, tasks, chunksize=1)
+
+        output: typing.Dict[str, typing.Optional[CheckResult]] = {
+            check.name: None for check in stanza_checks
+        }
+        for results in task_results:
+            for name, result in results.items():
+                previous = output.get(name)
+                if previous and result:
+                    result = CheckResult(previous.text, previous.lines + result.lines)
+                output[name] = result or previous
+        for check in checks:
+            output[check.name] = output.pop(check.name)
         return output
+
+    def _run_per_stanza(
+        self, check: Check, stanzas: typing.Sequence[typing.List[str]]
+    ) -> typing.Optional[CheckResult]:
+        scope = typing.cast(typing.Set[Scope], check.scope)
+        text = None
+        lines = []
+        for stanza in stanzas:
+            if stanza_scope(stanza[0]) not in scope:
+                continue
+            if check.triggers is not None and not any(
+                trigger in line for trigger in check.triggers for line in stanza
+            ):
+                # The check can't fail on this stanza, see register.
+                continue
+            result = self.stanza_cache.result(check, stanza)
+            if result:
+                text = result.text
+                lines.extend(result.lines)
+        return CheckResult(text=text, lines=lines) if text is not None else None
+
+    def _get_executor(self) -> concurrent.futures.Executor:
+        if self.executor is None:
+            self.executor = concurrent.futures.ThreadPoolExecutor(
+                thread_name_prefix="netlint"
+            )
+        return self.executor
+
+    def close(self) -> None:
+        """Shut down the executor if it was created by this checker."""
+        if self._owns_executor and self.executor is not None:
+            self.executor.shutdown(wait=False)
+            self.executor = None
+
+    async def arun(
+        self,
+        configuration: typing.List[str],
+        nos: NOS,
+        scopes: typing.Optional[typing.Set[Scope]] = None,
+    ) -> typing.Dict[str, typing.Optional[CheckResult]]:
+        """Run the checks in the executor without blocking the event loop.
+
+        See :meth:`run_checks` for the parameters. If the awaiting task is
+        cancelled before the checks started, they are not run at all.
+        """
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(
+            self._get_executor(), self.run_checks, configuration, nos, scopes
+        )
+
+    async def arun_many(
+        self, items: AsyncLintItems, limit: int = 8
+    ) -> typing.AsyncIterator[LintResult]:
+        """Run the checks on many configurations, yielding results as they are done.
+
+        Items are only taken from ``items`` while less than ``limit``
+        configurations are being checked, so a slow consumer slows down the
+        producer instead of piling up configurations. Closing the iterator or
+        cancelling the consuming task cancels the configurations not being
+        checked yet.
+
+        :param items: (Asynchronous) iterable of tuples of an identifier, the
+            configuration and its NOS (detected if None).
+        :param limit: The maximum number of configurations checked at once.
+        :return: The results in the order in which they are done.
+        """
+
+        async def lint(
+            item: typing.Tuple[typing.Hashable, typing.List[str], typing.Optional[NOS]],
+        ) -> LintResult:
+            identifier, configuration, nos = item
+            nos = nos or detect_nos(configuration)
+            results = await self.arun(configuration, nos)
+            return LintResult(id=identifier, nos=nos, results=results)
+
+        if isinstance(items, collections.abc.AsyncIterable):
+            iterator = items.__aiter__()
+
+            async def next_item() -> typing.Any:
+                return await iterator.__anext__()
+
+        else:
+            sync_iterator = iter(items)
+
+            async def next_item() -> typing.Any:
+                try:
+                    return next(sync_iterator)
+                except StopIteration:
+                    raise StopAsyncIteration
+
+        pending: typing.Set[asyncio.Future] = set()
+        exhausted = False
+        try:
+            while pending or not exhausted:
+                while not exhausted and len(pending) < limit:
+                    try:
+                        item = await next_item()
+                    except StopAsyncIteration:
+                        exhausted = True
+                    else:
+                        pending.add(asyncio.ensure_future(lint(item)))
+                if not pending:
+                    break
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    yield task.result()
+        finally:
+            for task in pending:
+                task.cancel()
+
+
+def _run_sequentially(
+    checks: typing.List[Check],
+    configuration: typing.List[str],
+    registry: typing.Dict[str, Fact],
+) -> typing.Dict[str, typing.Optional[CheckResult]]:
+    """Run checks one after another, sharing the facts about the configuration.
+
+    Facts are only computed when the first check that needs them runs and
+    dropped after the last one did.
+
+    :param registry: The facts of the checker running the checks.
+    """
+    last_use = {}
+    for index, check in enumerate(checks):
+        for name in check.facts:
+            last_use[name] = index
+    facts = Facts(configuration, registry)
+
+    output = {}
+    for index, check in enumerate(checks):
+        output[check.name] = check(configuration, facts)
+        for name in check.facts:
+            if last_use[name] == index:
+                facts.release(name)
+    return output
+
+
+def _group_by_facts(checks: typing.List[Check]) -> typing.List[typing.List[str]]:
+    """Group the checks that share facts, directly or through other checks.
+
+    :return: The names of the checks in every group, in the order of the checks.
+    """
+    positions = {check.name: index for index, check in enumerate(checks)}
+    groups: typing.List[typing.Tuple[typing.Set[str], typing.List[str]]] = []
+    for check in checks:
+        facts = set(check.facts)
+        names = [check.name]
+        for group in [group for group in groups if group[0] & facts]:
+            groups.remove(group)
+            facts |= group[0]
+            names += group[1]
+        groups.append((facts, names))
+    return [sorted(names, key=positions.__getitem__) for _, names in groups]
+
+
+class _Task(typing.NamedTuple):
+    """Checks run by a worker process of Checker._run_in_processes."""
+
+    names: typing.List[str]
+    # The start and end index of the stanzas to run a stanza-local check on,
+    # None to run the checks on the whole configuration.
+    stanzas: typing.Optional[typing.Tuple[int, int]]
+
+
+# The checker, configuration and stanzas checked by Checker._run_in_processes,
+# only set in its worker processes, see _init_worker.
+_forked: typing.Optional[
+    typing.Tuple[Checker, typing.List[str], typing.List[typing.List[str]]]
+] = None
+
+
+def _init_worker(
+    forked: typing.Tuple[Checker, typing.List[str], typing.List[typing.List[str]]],
+) -> None:
+    """Keep what a worker process of Checker._run_in_processes checks."""
+    global _forked
+    _forked = forked
+
+
+def _run_task(task: _Task) -> typing.Dict[str, typing.Optional[CheckResult]]:
+    """Run a task of Checker._run_in_processes in a worker process."""
+    checker, configuration, stanzas = typing.cast(
+        typing.Tuple[Checker, typing.List[str], typing.List[typing.List[str]]],
+        _forked,
+    )
+    checks = {
+        check.name: check
+        for nos_checks in checker.checks.values()
+        for check in nos_checks
+    }
+    if task.stanzas is None:
+        return _run_sequentially(
+            [checks[name] for name in task.names], configuration, checker.facts
+        )
+    start, end = task.stanzas
+    (name,) = task.names
+    return {name: checker._run_per_stanza(checks[name], stanzas[start:end])}
@@ -1,5 +1,4 @@
 """Checks for the Cisco IOS NOS."""
-import re
 import typing
 
 from netlint.checks import constants as c
@@ -17,34 +16,48 @@ __all__ = [
     "check_switchport_access_config",
 ]
 
+from netlint.checks.facts import (
+    AccessListDefinition,
+    AccessListUsage,
+    Credential,
+)
+from netlint.checks.patterns import pattern
 from netlint.checks.utils import (
-    get_password_hash_algorithm,
     NOS,
+    Scope,
     Tag,
-    get_access_list_usage,
-    get_access_list_definitions,
-    get_name_from_acl_definition,
     parse,
 )
 
+switchport_regex = pattern(r"^\s+switchport")
+switchport_trunk_regex = pattern(r"^\s+switchport mode trunk")
+switchport_access_regex = pattern(r"^\s+switchport mode access")
 
-@Checker.register(apply_to=[NOS.CISCO_IOS], name="IOS101", tags={Tag.SECURITY})
-def check_plaintext_passwords(config: typing.List[str]) -> typing.Optional[CheckResult]:
-    """Check if there are any plaintext passwords in the configuration."""
-    config = parse("\n".join(config))
-    lines = config.find_lines("^username.*password")
+
+@Checker.register(
+    apply_to=[NOS.CISCO_IOS],
+    name="IOS101",
+    tags={Tag.SECURITY},
+    scope={Scope.GLOBAL},
+    facts={"credentials"},
+    triggers={"username"},
+)
+def check_plaintext_passwords(
+    config: typing.List[str],
+    credentials: typing.List[Credential],
+) -> typing.Optional[CheckResult]:
+    """Check if there are any plaintext passwords in the configuration.
+
+    Only the user lines with plaintext passwords are reported, not all of them.
+    """
+    # If `service password-encryption` is configured, users are saved to the
+    # config like `username test password 7 $ENCRYPTED`, which isn't plaintext.
+    lines = [
+        credential.line
+        for credential in credentials
+        if credential.kind == "user" and credential.plaintext
+    ]
     if lines:
-        # If `service password-encryption` is configured, users are saved to the
-        # config like `username test password 7 $ENCRYPTED. The following for-loop
-        # checks for that.
-        for line in lines:
-            has_hash_algorithm = get_password_hash_algorithm(line)
-            if not has_hash_algorithm:
-                break
-        else:
-            # If the for loop wasn't exited prematurely, no plaintext passwords
-            # are present.
-            return None
         return CheckResult(
             text="Plaintext user passwords in configuration.", lines=lines
         )
@@ -53,12 +66,16 @@ def check_plaintext_passwords(config: typing.List[str]) -> typing.Optional[Check
 
 
 @Checker.register(
-    apply_to=[NOS.CISCO_IOS], name="IOS102", tags={Tag.SECURITY, Tag.OPINIONATED}
+    apply_to=[NOS.CISCO_IOS],
+    name="IOS102",
+    tags={Tag.SECURITY, Tag.OPINIONATED},
+    scope={Scope.GLOBAL},
+    triggers={"ip http"},
 )
 def check_ip_http_server(config: typing.List[str]) -> typing.Optional[CheckResult]:
     """Check if the http server is enabled."""
     config = parse("\n".join(config))
-    lines = config.find_lines("^ip http")
+    lines = config.find_lines(pattern("^ip http"))
     if lines:
         return CheckResult(text="HTTP server not disabled.", lines=lines)
     else:
@@ -66,12 +83,17 @@ def check_ip_http_server(config: typing.List[str]) -> typing.Optional[CheckResul
 
 
 @Checker.register(
-    apply_to=[NOS.CISCO_IOS], name="IOS103", tags={Tag.SECURITY, Tag.OPINIONATED}
+    apply_to=[NOS.CISCO_IOS],
+    name="IOS103",
+    tags={Tag.SECURITY, Tag.OPINIONATED},
+    scope={Scope.LINE},
+    triggers={"line con 0"},
+    stanza_local=True,
 )
 def check_console_password(config: typing.List[str]) -> typing.Optional[CheckResult]:
     """Check for authentication on the console line."""
     config = parse("\n".join(config))
-    line_con_config = config.find_all_children("^line con 0")
+    line_con_config = config.find_all_children(pattern("^line con 0"))
     if len(line_con_config) == 0:
         return None  # TODO: Log this?
 
@@ -89,38 +111,50 @@ def check_console_password(config: typing.List[str]) -> typing.Optional[CheckRes
         return None
 
 
-@Checker.register(apply_to=[NOS.CISCO_IOS], name="IOS104", tags={Tag.SECURITY})
+@Checker.register(
+    apply_to=[NOS.CISCO_IOS],
+    name="IOS104",
+    tags={Tag.SECURITY},
+    facts={"credentials"},
+    triggers={"password", "secret"},
+)
 def check_password_hash_strength(
     config: typing.List[str],
+    credentials: typing.List[Credential],
 ) -> typing.Optional[CheckResult]:
     """Check if strong password hash algorithms were used."""
-    config = parse("\n".join(config))
-    lines_with_passwords = config.find_lines(r"^.*(password|secret)\s\d.*$")
-    bad_lines = []
-    for line in lines_with_passwords:
-        hash_algorithm = get_password_hash_algorithm(line)
-        if hash_algorithm in c.bad_hash_algorithms:
-            bad_lines.append(line)
+    bad_lines = [
+        credential.line
+        for credential in credentials
+        if credential.algorithm in c.bad_hash_algorithms
+    ]
     if bad_lines:
         return CheckResult("Insecure hash algorithms in use.", lines=bad_lines)
     else:
         return None
 
 
-@Checker.register(apply_to=[NOS.CISCO_IOS], name="IOS105", tags={Tag.HYGIENE})
+@Checker.register(
+    apply_to=[NOS.CISCO_IOS],
+    name="IOS105",
+    tags={Tag.HYGIENE},
+    scope={Scope.INTERFACE},
+    facts={"interfaces"},
+    triggers={"switchport mode trunk"},
+    stanza_local=True,
+)
 def check_switchport_trunk_config(
     config: typing.List[str],
+    interfaces: typing.List[typing.Any],
 ) -> typing.Optional[CheckResult]:
     """Check if the switchport mode matches all config commands per interface."""
-    config = parse("\n".join(config))
-    interfaces = config.find_objects_w_child(
-        r"^interface", r"^\s+switchport mode trunk"
-    )
     bad_lines = []
     for interface in interfaces:
+        if not interface.re_search_children(switchport_trunk_regex):
+            continue
         bad_lines_per_interface = [interface.text]
         switchport_config_lines = list(
-            filter(lambda l: re.match(r"^\s+switchport", l.text), interface.children)
+            filter(lambda l: switchport_regex.match(l.text), interface.children)
         )
         for line in switchport_config_lines:
             if line.text.strip().startswith("switchport access"):
@@ -139,9 +173,20 @@ def check_switchport_trunk_config(
     apply_to=[NOS.CISCO_IOS],
     name="IOS106",
     tags={Tag.HYGIENE, Tag.SECURITY},
+    scope={
+        Scope.ACCESS_LIST,
+        Scope.INTERFACE,
+        Scope.LINE,
+        Scope.ROUTE_MAP,
+        Scope.GLOBAL,
+    },
+    facts={"acl_definitions", "acl_usages"},
+    triggers={"access-class", "access-group", "evaluate", "match ip"},
 )
 def check_used_but_unconfigured_access_lists(
     config: typing.List[str],
+    acl_definitions: typing.List[AccessListDefinition],
+    acl_usages: typing.List[AccessListUsage],
 ) -> typing.Optional[CheckResult]:
     """Check for any ACLs that are used but never configured.
 
@@ -151,29 +196,12 @@ def check_used_but_unconfigured_access_lists(
     * Rate limiting
     * Route maps
     """
-    config = parse("\n".join(config))
-    access_list_usages = get_access_list_usage(config)
-    access_list_definitions = get_access_list_definitions(config)
-    defined_access_lists = []
+    defined_access_lists = {definition.name for definition in acl_definitions}
     undefined_but_used_access_lists = []
-    for definition in access_list_definitions:
-        name = get_name_from_acl_definition(definition)
-        defined_access_lists.append(name)
-    for usage in access_list_usages:
-        # Get acl name/number from the configuration line for packet filtering usages
-        # Standard use
-        acl_in_filtering = re.findall(r"access-(class|group)\s(\S+|\d+)", usage)
-        if acl_in_filtering and acl_in_filtering[0][1] not in defined_access_lists:
-            undefined_but_used_access_lists.append(usage)
-        # Evaluated in other ACLs
-        acl_evaluated = re.findall(r"^\s+evaluate\s(\S+|\d+)", usage)
-        if acl_evaluated and acl_evaluated[0] not in defined_access_lists:
-            undefined_but_used_access_lists.append(usage)
-
-        # Get acl name/number from the configuration line for route-map usages
-        acl_in_route_map = re.findall(r"\s+match\sip\s\S+\s(\S+|\d+)", usage)
-        if acl_in_route_map and acl_in_route_map[0] not in defined_access_lists:
-            undefined_but_used_access_lists.append(usage)
+    for usage in acl_usages:
+        for name in usage.names:
+            if name not in defined_access_lists:
+                undefined_but_used_access_lists.append(usage.line)
     if undefined_but_used_access_lists:
         return CheckResult(
             text="Access lists used but never defined.",
@@ -183,8 +211,25 @@ def check_used_but_unconfigured_access_lists(
         return None
 
 
-@Checker.register(apply_to=[NOS.CISCO_IOS], name="IOS107", tags={Tag.HYGIENE})
-def check_unused_access_lists(config: typing.List[str]) -> typing.Optional[CheckResult]:
+@Checker.register(
+    apply_to=[NOS.CISCO_IOS],
+    name="IOS107",
+    tags={Tag.HYGIENE},
+    scope={
+        Scope.ACCESS_LIST,
+        Scope.INTERFACE,
+        Scope.LINE,
+        Scope.ROUTE_MAP,
+        Scope.GLOBAL,
+    },
+    facts={"acl_definitions", "acl_usages"},
+    triggers={"access-list"},
+)
+def check_unused_access_lists(
+    config: typing.List[str],
+    acl_definitions: typing.List[AccessListDefinition],
+    acl_usages: typing.List[AccessListUsage],
+) -> typing.Optional[CheckResult]:
     """Check for any ACLs that are configured but never used.
 
     Potential usages are:
@@ -193,34 +238,38 @@ def check_unused_access_lists(config: typing.List[str]) -> typing.Optional[Check
     * Rate limiting
     * Route maps
     """
-    config = parse("\n".join(config))
-    access_lists = get_access_list_definitions(config)
+    used_access_lists = {name for usage in acl_usages for name in usage.names}
     unused_acls = []
-    for acl in access_lists:
-        name = get_name_from_acl_definition(acl)
-        usages = get_access_list_usage(config, name=name)
-        if not usages:
-            unused_acls.append(acl)
+    for definition in acl_definitions:
+        if definition.name not in used_access_lists:
+            unused_acls.append(definition.line)
     if unused_acls:
         return CheckResult(text="Unused ACLs configured", lines=unused_acls)
     else:
         return None
 
 
-@Checker.register(apply_to=[NOS.CISCO_IOS], name="IOS108", tags={Tag.HYGIENE})
+@Checker.register(
+    apply_to=[NOS.CISCO_IOS],
+    name="IOS108",
+    tags={Tag.HYGIENE},
+    scope={Scope.INTERFACE},
+    facts={"interfaces"},
+    triggers={"switchport mode access"},
+    stanza_local=True,
+)
 def check_switchport_access_config(
     config: typing.List[str],
+    interfaces: typing.List[typing.Any],
 ) -> typing.Optional[CheckResult]:
     """Check if the switchport mode matches all config commands per interface."""
-    config = parse("\n".join(config))
-    interfaces = config.find_objects_w_child(
-        r"^interface", r"^\s+switchport mode access"
-    )
     bad_lines = []
     for interface in interfaces:
+        if not interface.re_search_children(switchport_access_regex):
+            continue
         bad_lines_per_interface = [interface.text]
         switchport_config_lines = list(
-            filter(lambda l: re.match(r"^\s+switchport", l.text), interface.children)
+            filter(lambda l: switchport_regex.match(l.text), interface.children)
         )
         for line in switchport_config_lines:
             if line.text.strip().startswith("switchport trunk"):
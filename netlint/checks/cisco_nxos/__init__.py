@@ -17,34 +17,54 @@ __all__ = [
 ]
 
 from netlint.checks.constants import bogus_as_numbers
-from netlint.checks.utils import NOS, Tag, parse
+from netlint.checks.facts import ASNumberUsage
+from netlint.checks.patterns import pattern
+from netlint.checks.utils import NOS, Scope, Tag, parse
+
+fex_fabric_regex = pattern("switchport mode fex-fabric")
+fex_associate_regex = pattern(r"^\s+fex associate \S")
 
 
 @Checker.register(
-    apply_to=[NOS.CISCO_NXOS], name="NXOS101", tags={Tag.SECURITY, Tag.OPINIONATED}
+    apply_to=[NOS.CISCO_NXOS],
+    name="NXOS101",
+    tags={Tag.SECURITY, Tag.OPINIONATED},
+    scope={Scope.FEATURE},
+    facts={"features"},
+    triggers={"feature telnet"},
 )
-def check_telnet_enabled(config: typing.List[str]) -> typing.Optional[CheckResult]:
+def check_telnet_enabled(
+    config: typing.List[str], features: typing.List[str]
+) -> typing.Optional[CheckResult]:
     """Check if the telnet feature is explicitly enabled."""
-    config = parse("\n".join(config))
-    lines = config.find_lines("^feature telnet")
+    lines = [line for line in features if line.startswith("feature telnet")]
     if lines:
         return CheckResult(text="Feature telnet is enabled.", lines=lines)
     else:
         return None
 
 
-@Checker.register(apply_to=[NOS.CISCO_NXOS], name="NXOS102", tags={Tag.HYGIENE})
+@Checker.register(
+    apply_to=[NOS.CISCO_NXOS],
+    name="NXOS102",
+    tags={Tag.HYGIENE},
+    scope={Scope.FEATURE, Scope.ROUTER},
+    facts={"features"},
+    triggers={"feature bgp", "feature ospf", "feature eigrp", "feature rip"},
+)
 def check_routing_protocol_enabled_and_used(
-    config: typing.List[str],
+    config: typing.List[str], features: typing.List[str]
 ) -> typing.Optional[CheckResult]:
     """Check if a routing protocol is actually used - should it be enabled."""
     config = parse("\n".join(config))
     for protocol in ["bgp", "ospf", "eigrp", "rip"]:
-        feature_enabled = config.find_lines(f"^feature {protocol}")
+        feature_enabled = [
+            line for line in features if line.startswith(f"feature {protocol}")
+        ]
         if not feature_enabled:
             return None
 
-        feature_used = config.find_lines(f"^router {protocol}")
+        feature_used = config.find_lines(pattern(f"^router {protocol}"))
         if not feature_used:
             return CheckResult(
                 text=f"{protocol.upper()} enabled but never used.",
@@ -54,28 +74,42 @@ def check_routing_protocol_enabled_and_used(
 
 
 @Checker.register(
-    apply_to=[NOS.CISCO_NXOS], name="NXOS103", tags={Tag.SECURITY, Tag.OPINIONATED}
+    apply_to=[NOS.CISCO_NXOS],
+    name="NXOS103",
+    tags={Tag.SECURITY, Tag.OPINIONATED},
+    scope={Scope.GLOBAL},
+    triggers={"no password strength-check"},
 )
 def check_password_strength(config: typing.List[str]) -> typing.Optional[CheckResult]:
     """Check if the password strength check has been disabled."""
     config = parse("\n".join(config))
-    disabled = config.find_lines("^no password strength-check")
+    disabled = config.find_lines(pattern("^no password strength-check"))
     if disabled:
         return CheckResult(text="Password strength-check disabled.", lines=disabled)
     else:
         return None
 
 
-@Checker.register(apply_to=[NOS.CISCO_NXOS], name="NXOS104", tags={Tag.HYGIENE})
-def check_bogus_as(config: typing.List[str]) -> typing.Optional[CheckResult]:
-    """Check if any bogus autonomous system is used in the configuration."""
-    config = parse("\n".join(config))
-    bgp_routers = config.find_lines("^router bgp")
+@Checker.register(
+    apply_to=[NOS.CISCO_NXOS],
+    name="NXOS104",
+    tags={Tag.HYGIENE},
+    scope={Scope.ROUTER, Scope.ROUTE_MAP},
+    facts={"as_numbers"},
+    triggers={"router bgp", "remote-as", "local-as", "as-path prepend"},
+)
+def check_bogus_as(
+    config: typing.List[str], as_numbers: typing.List[ASNumberUsage]
+) -> typing.Optional[CheckResult]:
+    """Check if any bogus autonomous system is used in the configuration.
+
+    This covers the AS of the BGP router, of its neighbors and AS path
+    prepending in route maps.
+    """
     bad_lines = []
-    for line in bgp_routers:
-        as_number = int(line[11:])
-        if as_number in bogus_as_numbers:
-            bad_lines.append(line)
+    for usage in as_numbers:
+        if usage.number in bogus_as_numbers and usage.line not in bad_lines:
+            bad_lines.append(usage.line)
 
     if bad_lines:
         return CheckResult(text="Bogus AS number in use", lines=bad_lines)
@@ -83,54 +117,89 @@ def check_bogus_as(config: typing.List[str]) -> typing.Optional[CheckResult]:
         return None
 
 
-@Checker.register(apply_to=[NOS.CISCO_NXOS], name="NXOS105", tags={Tag.HYGIENE})
+@Checker.register(
+    apply_to=[NOS.CISCO_NXOS],
+    name="NXOS105",
+    tags={Tag.HYGIENE},
+    scope={Scope.FEATURE, Scope.GLOBAL},
+    facts={"features"},
+    triggers={"feature vpc"},
+)
 def check_vpc_feature_enabled_and_used(
-    config: typing.List[str],
+    config: typing.List[str], features: typing.List[str]
 ) -> typing.Optional[CheckResult]:
     """Check if the vPC feature is actually used if it is enabled."""
     config = parse("\n".join(config))
     return _feature_enabled_but_not_configured(
-        config, r"^feature vpc", r"^vpc domain", "vPC feature enabled but never used"
+        config,
+        features,
+        r"^feature vpc",
+        r"^vpc domain",
+        "vPC feature enabled but never used",
     )
 
 
-@Checker.register(apply_to=[NOS.CISCO_NXOS], name="NXOS106", tags={Tag.HYGIENE})
+@Checker.register(
+    apply_to=[NOS.CISCO_NXOS],
+    name="NXOS106",
+    tags={Tag.HYGIENE},
+    scope={Scope.FEATURE, Scope.INTERFACE},
+    facts={"features"},
+    triggers={"feature lacp"},
+)
 def check_lacp_feature_enabled_and_used(
-    config: typing.List[str],
+    config: typing.List[str], features: typing.List[str]
 ) -> typing.Optional[CheckResult]:
     """Check if the LACP feature is actually used if it is enabled."""
     config = parse("\n".join(config))
     return _feature_enabled_but_not_configured(
         config,
+        features,
         r"^feature lacp",
         r"^\s+channel-group \d+ mode active|passive",
         "LACP feature enabled but never used",
     )
 
 
-@Checker.register(apply_to=[NOS.CISCO_NXOS], name="NXOS107", tags={Tag.HYGIENE})
+@Checker.register(
+    apply_to=[NOS.CISCO_NXOS],
+    name="NXOS107",
+    tags={Tag.HYGIENE},
+    scope={Scope.FEATURE},
+    facts={"features"},
+    triggers={"install feature-set fex"},
+)
 def check_fex_feature_set_installed_but_not_enabled(
-    config: typing.List[str],
+    config: typing.List[str], features: typing.List[str]
 ) -> typing.Optional[CheckResult]:
     """Check if the fex feature-set is installed but not enabled."""
     config = parse("\n".join(config))
     return _feature_enabled_but_not_configured(
         config,
+        features,
         r"^install feature-set fex",
         r"^feature-set fex",
         "Feature-set fex installed but not enabled.",
     )
 
 
-@Checker.register(apply_to=[NOS.CISCO_NXOS], name="NXOS108", tags={Tag.HYGIENE})
+@Checker.register(
+    apply_to=[NOS.CISCO_NXOS],
+    name="NXOS108",
+    tags={Tag.HYGIENE},
+    scope={Scope.INTERFACE},
+    facts={"interfaces"},
+    triggers={"switchport mode fex-fabric"},
+    stanza_local=True,
+)
 def check_switchport_mode_fex_fabric(
-    config: typing.List[str],
+    config: typing.List[str], interfaces: typing.List[typing.Any]
 ) -> typing.Optional[CheckResult]:
     """Check if any interface in switchport mode fex-fabric has a fex-id associated."""
-    config = parse("\n".join(config))
-    interfaces = config.find_objects_w_child("^interface", "switchport mode fex-fabric")
     faulty_lines = []
     for interface in interfaces:
+        if not interface.re_search_children(fex_fabric_regex):
+            continue
         current_lines = [interface.text]
         for line in interface.children:
             current_lines.append(line.text)
@@ -147,32 +216,48 @@ def check_switchport_mode_fex_fabric(
         return None
 
 
-@Checker.register(apply_to=[NOS.CISCO_NXOS], name="NXOS109", tags={Tag.HYGIENE})
+@Checker.register(
+    apply_to=[NOS.CISCO_NXOS],
+    name="NXOS109",
+    tags={Tag.HYGIENE},
+    scope={Scope.FEATURE, Scope.GLOBAL},
+    facts={"features"},
+    triggers={"feature-set fex"},
+)
 def check_fex_feature_enabled_and_used(
-    config: typing.List[str],
+    config: typing.List[str], features: typing.List[str]
 ) -> typing.Optional[CheckResult]:
     """Check whether an enabled fex feature is actually used."""
     config = parse("\n".join(config))
     return _feature_enabled_but_not_configured(
         config,
+        features,
         r"^feature-set fex",
         r"^fex id",
         "Feature-set fex enabled but never used.",
     )
 
 
-@Checker.register(apply_to=[NOS.CISCO_NXOS], name="NXOS110", tags={Tag.HYGIENE})
+@Checker.register(
+    apply_to=[NOS.CISCO_NXOS],
+    name="NXOS110",
+    tags={Tag.HYGIENE},
+    scope={Scope.GLOBAL, Scope.INTERFACE},
+    triggers={"fex id"},
+)
 def check_fex_without_interface(
     config: typing.List[str],
 ) -> typing.Optional[CheckResult]:
     """Check whether every configured fex id also has an associated interface."""
     config = parse("\n".join(config))
-    configured_fex_ids = config.find_lines(r"^fex id")
+    configured_fex_ids = config.find_lines(pattern(r"^fex id"))
+    associated_fex_ids = {
+        line.split()[2] for line in config.find_lines(fex_associate_regex)
+    }
     faulty_fex_ids = []
     for line in configured_fex_ids:
         fex_id = line.split()[2]
-        has_interface = config.find_lines(r"^\s+fex associate {}".format(fex_id))
-        if not has_interface:
+        if fex_id not in associated_fex_ids:
             faulty_fex_ids.append(line)
     if faulty_fex_ids:
         return CheckResult(
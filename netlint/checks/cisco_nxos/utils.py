@@ -2,19 +2,21 @@
 
 import typing
 
+from netlint.checks.patterns import pattern
 from netlint.checks.types import CheckResult
 from netlint.checks.utils import NetlintConfParse
 
 
 def _feature_enabled_but_not_configured(
     config: NetlintConfParse,
+    features: typing.List[str],
     feature_regex: str,
     configured_regex: str,
     failure_text: str,
 ) -> typing.Optional[CheckResult]:
     """Wrap common code for feature_enabled_and_used type checks."""
-    feature_enabled = config.find_lines(feature_regex)
-    feature_configured = config.find_lines(configured_regex)
+    feature_enabled = [line for line in features if pattern(feature_regex).search(line)]
+    feature_configured = config.find_lines(pattern(configured_regex))
     if feature_enabled and not feature_configured:
         return CheckResult(
             text=failure_text,
@@ -3,9 +3,17 @@
 These might come from standards, but they don't have to.
 """
 
-bogus_as_numbers = [0, 23456, 4294967295]  # RFC6483, RFC7607, RFC6793, RFC7300
-bogus_as_numbers += list(range(64496, 64511 + 1))  # RFC5398
-bogus_as_numbers += list(range(65536, 65551 + 1))  # RFC4893, RFC5398
+from netlint.checks.ranges import RangeSet
+
+bogus_as_numbers = RangeSet(
+    [
+        0,  # RFC6483, RFC7607
+        23456,  # RFC6793
+        4294967295,  # RFC7300
+        (64496, 64511),  # RFC5398
+        (65536, 65551),  # RFC4893, RFC5398
+    ]
+)
 
 # Cisco password hash algorithms (0 is not included as it has its own check
 bad_hash_algorithms = [5, 7]
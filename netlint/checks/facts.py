@@ -0,0 +1,179 @@
+"""Facts derived from configurations that are shared between checks."""
+import re
+import typing
+
+from netlint.checks.checker import Checker
+from netlint.checks.patterns import pattern
+from netlint.checks.utils import (
+    NetlintConfParse,
+    get_access_list_definitions,
+    get_access_list_usage,
+    get_name_from_acl_definition,
+    parse_as_number,
+)
+
+__all__ = [
+    "AccessListDefinition",
+    "AccessListUsage",
+    "acl_definitions",
+    "acl_usages",
+    "ASNumberUsage",
+    "as_numbers",
+    "Credential",
+    "credentials",
+    "features",
+    "interfaces",
+]
+
+
+acl_in_filtering_regex = pattern(r"access-(class|group)\s(\S+|\d+)")
+acl_evaluated_regex = pattern(r"^\s+evaluate\s(\S+|\d+)")
+acl_in_route_map_regex = pattern(r"\s+match\sip\s\S+\s(\S+|\d+)")
+features_regex = pattern(r"^(feature|install feature-set)")
+interfaces_regex = pattern(r"^interface")
+# The last password or secret keyword of a line, the number of the hash
+# algorithm if given and the password or hash.
+credential_regex = pattern(r"^.*\b(password|secret)(?:\s(\d+))?\s(\S+)$")
+# The AS numbers following any of the keywords, up to the first other token.
+as_numbers_regex = pattern(
+    r"(?:^router bgp|\bremote-as|\blocal-as|\bas-path prepend)"
+    r"((?:[ \t]+\d+(?:\.\d+)?)+)(?=[ \t]|$)",
+    re.MULTILINE,
+)
+
+
+class Credential(typing.NamedTuple):
+    """A line configuring a password or secret."""
+
+    line: str
+    # One of "user", "enable", "line", "snmp" or "other".
+    kind: str
+    # Either "password" or "secret", the latter is always stored hashed.
+    keyword: str
+    # The number of the hash algorithm, None if not given.
+    algorithm: typing.Optional[int]
+
+    @property
+    def plaintext(self) -> bool:
+        """Whether the password is stored without any hashing."""
+        return self.keyword == "password" and not self.algorithm
+
+
+class AccessListDefinition(typing.NamedTuple):
+    """A line defining an access list."""
+
+    line: str
+    name: str
+
+
+class ASNumberUsage(typing.NamedTuple):
+    """An AS number referenced in a line."""
+
+    line: str
+    number: int
+
+
+class AccessListUsage(typing.NamedTuple):
+    """A line using access lists."""
+
+    line: str
+    # Names of the access lists used, one per kind of usage that matched.
+    names: typing.List[str]
+
+
+@Checker.register_fact("acl_definitions")
+def acl_definitions(config: NetlintConfParse) -> typing.List[AccessListDefinition]:
+    """All access list definitions."""
+    return [
+        AccessListDefinition(line, get_name_from_acl_definition(line))
+        for line in get_access_list_definitions(config)
+    ]
+
+
+@Checker.register_fact("acl_usages")
+def acl_usages(config: NetlintConfParse) -> typing.List[AccessListUsage]:
+    """All usages of access lists.
+
+    Potential usages are:
+
+    * Packet filtering
+    * Rate limiting
+    * Route maps
+    """
+    usages = []
+    for line in get_access_list_usage(config):
+        names = []
+        # Packet filtering and rate limiting
+        acl_in_filtering = acl_in_filtering_regex.findall(line)
+        if acl_in_filtering:
+            names.append(acl_in_filtering[0][1])
+        # Evaluated in other ACLs
+        acl_evaluated = acl_evaluated_regex.findall(line)
+        if acl_evaluated:
+            names.append(acl_evaluated[0])
+        # Route maps
+        acl_in_route_map = acl_in_route_map_regex.findall(line)
+        if acl_in_route_map:
+            names.append(acl_in_route_map[0])
+        usages.append(AccessListUsage(line, names))
+    return usages
+
+
+@Checker.register_fact("features")
+def features(config: NetlintConfParse) -> typing.List[str]:
+    """All lines enabling or installing features and feature-sets."""
+    return config.find_lines(features_regex)
+
+
+@Checker.register_fact("interfaces")
+def interfaces(config: NetlintConfParse) -> typing.List[typing.Any]:
+    """All interface configuration objects."""
+    return config.find_objects(interfaces_regex)
+
+
+@Checker.register_fact("as_numbers")
+def as_numbers(config: NetlintConfParse) -> typing.List[ASNumberUsage]:
+    """All AS numbers of BGP routers, neighbors and AS path prepending.
+
+    The whole configuration is searched at once instead of line by line.
+    """
+    text = "\n".join(config.ioscfg)
+    usages = []
+    for match in as_numbers_regex.finditer(text):
+        start = text.rfind("\n", 0, match.start()) + 1
+        end = text.find("\n", match.end())
+        if end == -1:
+            end = len(text)
+        line = text[start:end]
+        for token in match[1].split():
+            usages.append(ASNumberUsage(line, parse_as_number(token)))
+    return usages
+
+
+@Checker.register_fact("credentials")
+def credentials(config: NetlintConfParse) -> typing.List[Credential]:
+    """All passwords and secrets, classified by what they are configured for."""
+    found = []
+    parent = ""
+    for line in config.ioscfg:
+        top_level = not line[:1].isspace()
+        if top_level:
+            parent = line
+        if "password" not in line and "secret" not in line:
+            continue
+        match = credential_regex.match(line)
+        if not match:
+            continue
+        if line.startswith("username "):
+            kind = "user"
+        elif line.startswith("enable "):
+            kind = "enable"
+        elif line.startswith("snmp-server "):
+            kind = "snmp"
+        elif not top_level and parent.startswith("line "):
+            kind = "line"
+        else:
+            kind = "other"
+        algorithm = int(match[2]) if match[2] is not None else None
+        found.append(Credential(line, kind, match[1], algorithm))
+    return found
@@ -0,0 +1,28 @@
+"""Registry of the compiled regular expressions of the checks and helpers.
+
+:mod:`re` only caches a limited number of compiled patterns, which the many
+distinct patterns used by checks matching line by line can thrash. Patterns
+obtained through :func:`pattern` are compiled once and the most recently used
+:data:`PATTERN_CACHE_SIZE` of them are kept, so that patterns built at
+runtime (e.g. from the names in a configuration or from rule packs) don't
+pile up in long-lived processes. Checks and helpers obtain their constant
+patterns at import and keep them in module-level variables, so importing the
+checks (as ``netlint serve`` does on startup) warms them all.
+"""
+
+import functools
+import re
+import typing
+
+# Number of compiled patterns the registry keeps.
+PATTERN_CACHE_SIZE = 4096
+
+
+@functools.lru_cache(maxsize=PATTERN_CACHE_SIZE)
+def pattern(regex: str, flags: int = 0) -> typing.Pattern:
+    """Return the compiled pattern of a regular expression.
+
+    :param regex: The regular expression.
+    :param flags: The flags to compile the regular expression with.
+    """
+    return re.compile(regex, flags)
@@ -0,0 +1,58 @@
+"""Sets of integers given as ranges, e.g. AS numbers or VLAN IDs."""
+import bisect
+import typing
+
+
+class RangeSet:
+    """Set of integers stored as sorted, non-overlapping inclusive ranges.
+
+    Membership tests are a binary search over the ranges, so large ranges
+    don't need to be materialized and lookups stay fast for many ranges.
+    """
+
+    def __init__(
+        self, ranges: typing.Iterable[typing.Union[int, typing.Tuple[int, int]]]
+    ) -> None:
+        """Initialize the set.
+
+        :param ranges: Single integers or (first, last) tuples, both inclusive.
+        """
+        normalized = sorted(
+            (item, item) if isinstance(item, int) else item for item in ranges
+        )
+        self.starts: typing.List[int] = []
+        self.ends: typing.List[int] = []
+        for start, end in normalized:
+            if self.ends and start <= self.ends[-1] + 1:
+                # Merge overlapping and adjacent ranges.
+                self.ends[-1] = max(self.ends[-1], end)
+            else:
+                self.starts.append(start)
+                self.ends.append(end)
+
+    @classmethod
+    def parse(cls, text: str) -> "RangeSet":
+        """Parse a range list like "1-10,20" as used for VLANs.
+
+        :raise ValueError: If the text isn't a valid range list.
+        """
+        ranges = []
+        for part in text.split(","):
+            first, _, last = part.strip().partition("-")
+            ranges.append((int(first), int(last or first)))
+        return cls(ranges)
+
+    def __contains__(self, number: object) -> bool:
+        """Check whether a number is in any of the ranges."""
+        if not isinstance(number, int):
+            return False
+        index = bisect.bisect_right(self.starts, number) - 1
+        return index >= 0 and number <= self.ends[index]
+
+    def __iter__(self) -> typing.Iterator[typing.Tuple[int, int]]:
+        """Iterate over the (first, last) tuples of the ranges."""
+        return zip(self.starts, self.ends)
+
+    def __repr__(self) -> str:
+        """Represent the set with its ranges."""
+        return f"{type(self).__name__}({list(self)})"
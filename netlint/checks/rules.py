@@ -0,0 +1,299 @@
+r"""Checks loaded from declarative rule packs.
+
+A rule pack is a TOML file listing rules that require lines matching a
+pattern to exist or not to exist, optionally only among the children of the
+top-level stanzas matching a parent pattern. The bodies of banners and other
+bulky blocks are only matched by rules listing them in ``blocks``::
+
+    [[rule]]
+    name = "SITE101"
+    text = "No NTP server configured."
+    must_exist = "^ntp server"
+    nos = ["cisco_ios"]
+    tags = ["hygiene"]
+
+    [[rule]]
+    name = "SITE102"
+    text = "Interfaces without description."
+    parent = "^interface"
+    must_exist = "^\\s+description"
+
+    [[rule]]
+    name = "SITE103"
+    text = "Banner welcomes visitors."
+    must_not_exist = "(?i)welcome"
+    blocks = ["banner"]
+
+All rules of a pack are matched in a single pass over the configuration (see
+:class:`RuleMatcher`), so that hundreds of rules cost about as much as a
+handful of checks.
+"""
+
+import re
+import typing
+
+import toml
+
+from netlint.checks.checker import Check, Fact
+from netlint.checks.patterns import pattern
+from netlint.checks.types import CheckResult
+from netlint.checks.utils import NOS, NetlintConfParse, Tag, bulky_blocks
+
+# The first word a line has to start with (after any indentation) for a
+# pattern to match. Only extracted if the word is followed by whitespace, as
+# otherwise the pattern could also match lines starting with a longer word.
+first_word_regex = re.compile(r"\^(?:\\s[+*]| +)?([\w-]+)(?: |\\s)(?![?*{])")
+
+
+class Rule(typing.NamedTuple):
+    """A single rule of a rule pack."""
+
+    name: str
+    text: str
+    pattern: str
+    # Whether lines matching the pattern have to exist or must not exist.
+    must_exist: bool
+    # Only match the children of the top-level stanzas matching this pattern.
+    parent: typing.Optional[str]
+    apply_to: typing.List[NOS]
+    tags: typing.Set[Tag]
+    # The bulky blocks the rule looks into, see Checker.register.
+    blocks: typing.Set[str]
+
+
+class RuleMatch(typing.NamedTuple):
+    """The lines a rule matched in a configuration."""
+
+    lines: typing.List[str]
+    # The parent lines none of whose children matched, for rules with a parent.
+    unmatched_parents: typing.List[str]
+
+
+class _PatternIndex:
+    """Find the patterns out of many that match a line.
+
+    Patterns that can only match lines starting with a certain word are
+    looked up by the first word of the line. The remaining patterns are
+    combined into one regular expression, so that lines matching none of
+    them are ruled out with a single search.
+    """
+
+    def __init__(self, regexes: typing.List[str]) -> None:
+        self.compiled = [pattern(regex) for regex in regexes]
+        self.by_first_word: typing.Dict[str, typing.List[int]] = {}
+        self.unindexed: typing.List[int] = []
+        for index, regex in enumerate(regexes):
+            match = first_word_regex.match(regex)
+            if match and "|" not in regex:
+                self.by_first_word.setdefault(match[1], []).append(index)
+            else:
+                self.unindexed.append(index)
+        self.prefilter: typing.Optional[typing.Pattern] = None
+        if self.unindexed:
+            try:
+                self.prefilter = re.compile(
+                    "|".join(f"(?:{regexes[index]})" for index in self.unindexed)
+                )
+            except re.error:
+                # E.g. back references or duplicate group names, which only
+                # work in the patterns on their own.
+                pass
+
+    def search(self, line: str) -> typing.Iterator[int]:
+        """Yield the indexes of the patterns matching a line."""
+        words = line.split(None, 1)
+        if words:
+            for index in self.by_first_word.get(words[0], ()):
+                if self.compiled[index].search(line):
+                    yield index
+        if self.unindexed and (self.prefilter is None or self.prefilter.search(line)):
+            for index in self.unindexed:
+                if self.compiled[index].search(line):
+                    yield index
+
+
+class RuleMatcher:
+    """Match many rules in a single pass over a configuration."""
+
+    def __init__(self, rules: typing.List[Rule]) -> None:
+        self.rules = rules
+        self.patterns = _PatternIndex([rule.pattern for rule in rules])
+        self.parent_patterns = sorted({rule.parent for rule in rules if rule.parent})
+        self.parents = _PatternIndex(self.parent_patterns)
+        # The indexes of the rules by their parent pattern.
+        self.children: typing.Dict[str, typing.List[int]] = {}
+        for index, rule in enumerate(rules):
+            if rule.parent:
+                self.children.setdefault(rule.parent, []).append(index)
+
+    def match(self, configuration: typing.Iterable[str]) -> typing.Dict[str, RuleMatch]:
+        """Match all rules against the lines of a configuration.
+
+        :return: The matches by the names of the rules.
+        """
+        matches = {rule.name: RuleMatch([], []) for rule in self.rules}
+        parent_line = ""
+        # The parent patterns matching the current top-level line.
+        active_parents: typing.Set[str] = set()
+        # The rules with a parent that matched a child of the current parent.
+        satisfied: typing.Set[int] = set()
+
+        def finish_stanza() -> None:
+            for parent in active_parents:
+                for index in self.children[parent]:
+                    if index not in satisfied:
+                        matches[self.rules[index].name].unmatched_parents.append(
+                            parent_line
+                        )
+
+        for line in configuration:
+            line = line.rstrip("\n")
+            top_level = not line[:1].isspace()
+            if top_level:
+                finish_stanza()
+                parent_line = line
+                active_parents = {
+                    self.parent_patterns[index] for index in self.parents.search(line)
+                }
+                satisfied = set()
+            for index in self.patterns.search(line):
+                rule = self.rules[index]
+                if rule.parent is not None:
+                    if top_level or rule.parent not in active_parents:
+                        continue
+                    satisfied.add(index)
+                matches[rule.name].lines.append(line)
+        finish_stanza()
+        return matches
+
+
+class RulePack:
+    """The rules of a rule pack file and the checks running them."""
+
+    def __init__(self, path: str, rules: typing.List[Rule]) -> None:
+        """Initialize the rule pack and the fact matching its rules.
+
+        The fact is only added to the checkers loading the pack (see
+        :meth:`Checker.load_rule_pack`), so that packs loaded from the same
+        path at different times don't replace each other's.
+
+        :param path: The path the rules were loaded from.
+        :param rules: The rules of the pack.
+        """
+        self.path = path
+        self.rules = rules
+        self.matcher = RuleMatcher(rules)
+
+        def rule_matches(config: NetlintConfParse) -> typing.Dict[str, RuleMatch]:
+            return self.matcher.match(config.ioscfg)
+
+        self.fact = Fact(fact_function=rule_matches, name=f"rule_pack:{path}")
+
+    @classmethod
+    def load(cls, path: str) -> "RulePack":
+        """Load a rule pack from a TOML file.
+
+        :raise ValueError: If the file isn't a valid rule pack.
+        """
+        try:
+            data = toml.load(path)
+        except (OSError, toml.TomlDecodeError) as e:
+            raise ValueError(f"Failed to read rule pack {path}: {e}")
+        rules = [
+            _parse_rule(path, index, entry)
+            for index, entry in enumerate(data.get("rule", []))
+        ]
+        names = [rule.name for rule in rules]
+        duplicates = sorted({name for name in names if names.count(name) > 1})
+        if duplicates:
+            raise ValueError(f"Rule pack {path} defines {duplicates} more than once.")
+        return cls(path, rules)
+
+    def checks(self) -> typing.List[Check]:
+        """Build a check for every rule, all sharing the same matcher."""
+        return [self._check(rule) for rule in self.rules]
+
+    def _check(self, rule: Rule) -> Check:
+        fact_name = self.fact.name
+
+        def check_function(
+            config: typing.List[str], **facts: typing.Any
+        ) -> typing.Optional[CheckResult]:
+            match = facts[fact_name][rule.name]
+            if not rule.must_exist:
+                failed_lines = match.lines
+                failed = bool(failed_lines)
+            elif rule.parent is not None:
+                failed_lines = match.unmatched_parents
+                failed = bool(failed_lines)
+            else:
+                failed_lines = []
+                failed = not match.lines
+            return CheckResult(text=rule.text, lines=failed_lines) if failed else None
+
+        check_function.__name__ = rule.name
+        check_function.__doc__ = rule.text
+        return Check(
+            check_function=check_function,
+            apply_to=rule.apply_to,
+            name=rule.name,
+            tags=rule.tags,
+            facts={fact_name},
+            blocks=rule.blocks,
+        )
+
+
+def _parse_rule(path: str, index: int, entry: typing.Any) -> Rule:
+    """Validate a rule of a rule pack.
+
+    :raise ValueError: If the rule is malformed.
+    """
+    if not isinstance(entry, dict):
+        raise ValueError(f"Rule {index} in {path} isn't a table.")
+    name = entry.get("name") or f"#{index}"
+    where = f"Rule {name} in {path}"
+    unknown_keys = set(entry) - {
+        "name",
+        "text",
+        "must_exist",
+        "must_not_exist",
+        "parent",
+        "nos",
+        "tags",
+        "blocks",
+    }
+    if unknown_keys:
+        raise ValueError(f"{where} has unknown keys {sorted(unknown_keys)}.")
+    for key in ("name", "text"):
+        if not isinstance(entry.get(key), str):
+            raise ValueError(f"{where} needs a {key}.")
+    if ("must_exist" in entry) == ("must_not_exist" in entry):
+        raise ValueError(f"{where} needs either must_exist or must_not_exist.")
+    must_exist = "must_exist" in entry
+    regex = entry["must_exist" if must_exist else "must_not_exist"]
+    parent = entry.get("parent")
+    for value in (regex, parent):
+        if value is None:
+            continue
+        try:
+            pattern(value)
+        except (re.error, TypeError) as e:
+            raise ValueError(f"{where} has an invalid pattern {value!r}: {e}")
+    try:
+        apply_to = [NOS(nos) for nos in entry.get("nos", [nos.value for nos in NOS])]
+        tags = {Tag[tag.upper()] for tag in entry.get("tags", [])}
+    except (KeyError, ValueError, AttributeError) as e:
+        raise ValueError(f"{where} has an unknown NOS or tag {e}.")
+    blocks = entry.get("blocks", [])
+    if not isinstance(blocks, list) or not set(blocks) <= set(bulky_blocks):
+        raise ValueError(f"{where} has blocks other than {sorted(bulky_blocks)}.")
+    return Rule(
+        name=entry["name"],
+        text=entry["text"],
+        pattern=regex,
+        must_exist=must_exist,
+        parent=parent,
+        apply_to=apply_to,
+        tags=tags,
+        blocks=set(blocks),
+    )
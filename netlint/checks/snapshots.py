@@ -0,0 +1,131 @@
+"""Keep the parse trees of configurations on disk across runs.
+
+Parsing a configuration doesn't depend on the checks, so the tree built by
+:func:`netlint.checks.utils.parse` stays valid after upgrading netlint or
+selecting other checks, unlike check results. A :class:`SnapshotStore` keeps
+a compact representation of the tree (the lines and the indexes of their
+parents and children, see :class:`Snapshot`) in a file named by the digest of
+the configuration and the parser version. Snapshots are written with
+:mod:`marshal` and read through a memory map, which is much cheaper than
+parsing again.
+"""
+
+import contextlib
+import hashlib
+import marshal
+import mmap
+import os
+import threading
+import typing
+from pathlib import Path
+
+import ciscoconfparse
+
+# Version of the snapshot format, part of the key of every snapshot.
+SNAPSHOT_FORMAT = 1
+
+# Snapshots are only valid for the parser that built the tree.
+PARSER_VERSION = f"{SNAPSHOT_FORMAT}:{getattr(ciscoconfparse, '__version__', '')}"
+
+
+class Snapshot(typing.NamedTuple):
+    """The parse tree of a configuration as indexes into its lines."""
+
+    texts: typing.List[str]
+    indents: typing.List[int]
+    child_indents: typing.List[int]
+    # The index of the parent of every line, its own index for top-level lines.
+    parents: typing.List[int]
+    children: typing.List[typing.Tuple[int, ...]]
+    comments: typing.List[bool]
+    oldest_ancestors: typing.List[bool]
+
+
+class SnapshotStore:
+    """The snapshots of parse trees in a directory, disabled without one.
+
+    The directory set as :attr:`path` applies to the whole process, while
+    :meth:`using` overrides it for the current thread only.
+    """
+
+    def __init__(self, path: typing.Optional[str] = None) -> None:
+        self._path = path
+        self._local = threading.local()
+        # The number of snapshots found and not found.
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def path(self) -> typing.Optional[str]:
+        """The directory of the snapshots, None if the store is disabled."""
+        return typing.cast(
+            typing.Optional[str], getattr(self._local, "path", self._path)
+        )
+
+    @path.setter
+    def path(self, path: typing.Optional[str]) -> None:
+        self._path = path
+
+    @contextlib.contextmanager
+    def using(self, path: typing.Optional[str]) -> typing.Iterator[None]:
+        """Use another directory (or none) in the current thread for a while.
+
+        :param path: The directory of the snapshots, None to disable the store.
+        """
+        overridden = hasattr(self._local, "path")
+        previous = getattr(self._local, "path", None)
+        self._local.path = path
+        try:
+            yield
+        finally:
+            if overridden:
+                self._local.path = previous
+            else:
+                del self._local.path
+
+    def _file(self, configuration: str) -> Path:
+        digest = hashlib.sha256(PARSER_VERSION.encode())
+        digest.update(configuration.encode(errors="surrogatepass"))
+        return Path(typing.cast(str, self.path)) / f"{digest.hexdigest()}.snapshot"
+
+    def load(self, configuration: str) -> typing.Optional[Snapshot]:
+        """Load the snapshot of a configuration.
+
+        :return: The snapshot, None if the store is disabled or there is none
+            (or it is unreadable).
+        """
+        if self.path is None:
+            return None
+        try:
+            with open(self._file(configuration), "rb") as f, mmap.mmap(
+                f.fileno(), 0, access=mmap.ACCESS_READ
+            ) as data:
+                snapshot = Snapshot(*marshal.loads(data))
+        except (OSError, ValueError, EOFError, TypeError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return snapshot
+
+    def save(self, configuration: str, snapshot: Snapshot) -> None:
+        """Save the snapshot of a configuration, if the store is enabled.
+
+        Failing to write the snapshot is ignored, the configuration is then
+        parsed again next time.
+        """
+        if self.path is None:
+            return
+        path = self._file(configuration)
+        # Concurrent writers of the same snapshot each write their own file.
+        temporary = path.with_name(f"{path.name}.{os.getpid()}")
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(temporary, "wb") as f:
+                marshal.dump(tuple(snapshot), f)
+            os.replace(temporary, path)
+        except OSError:
+            pass
+
+
+# The store used by netlint.checks.utils.parse, see the --parse-cache option.
+snapshot_store = SnapshotStore()
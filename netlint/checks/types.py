@@ -2,6 +2,8 @@
 
 import typing
 
+from netlint.checks.utils import NOS, NetlintConfParse
+
 
 class CheckResult(typing.NamedTuple):
     """Result of a single check."""
@@ -10,9 +12,31 @@ class CheckResult(typing.NamedTuple):
     lines: typing.List[str]
 
 
+class LintResult(typing.NamedTuple):
+    """The results of linting a single configuration."""
+
+    id: typing.Hashable
+    nos: NOS
+    # The results of all checks that were run, None for passed checks.
+    results: typing.Dict[str, typing.Optional[CheckResult]]
+    # Stanzas whose results were taken from the stanza cache or not.
+    stanza_hits: int = 0
+    stanza_misses: int = 0
+
+    @property
+    def failed(self) -> typing.Dict[str, CheckResult]:
+        """Return the results of the failed checks only."""
+        return {name: result for name, result in self.results.items() if result}
+
+
 # Signature of a check function taking in a list of strings (the configuration)
-# and returning a CheckResult.
-CheckFunction = typing.Callable[[typing.List[str]], typing.Optional[CheckResult]]
+# and returning a CheckResult. The facts a check depends on are passed as
+# additional keyword arguments.
+CheckFunction = typing.Callable[..., typing.Optional[CheckResult]]
+
+# Signature of a fact function taking in the parsed configuration and returning
+# any value derived from it.
+FactFunction = typing.Callable[[NetlintConfParse], typing.Any]
 
 
 class CheckFunctionTuple(typing.NamedTuple):
@@ -1,12 +1,19 @@
 """Configuration checking utitilites."""
+import collections
 import functools
+import itertools
 import re
 import typing
 from enum import Enum
 
 from ciscoconfparse import CiscoConfParse
+from ciscoconfparse.ciscoconfparse import IOSConfigList
+from ciscoconfparse.models_cisco import IOSCfgLine
 
 from netlint.checks.constants import acl_regex
+from netlint.checks.patterns import pattern
+from netlint.checks.snapshots import Snapshot, snapshot_store
+from netlint.lines import line_table
 
 
 class NetlintConfParse(CiscoConfParse):
@@ -15,10 +22,85 @@ class NetlintConfParse(CiscoConfParse):
     def __hash__(self) -> int:
         """Convert the underlying config to a string and hash that."""
         configuration_as_string = ""
-        for line in self.objs:
-            configuration_as_string += line.text + "\n"
+        for line in self.ioscfg:
+            configuration_as_string += line + "\n"
         return hash(configuration_as_string)
 
+    def snapshot(self) -> Snapshot:
+        """Describe the parse tree for a snapshot store."""
+        objs = self.ConfigObjs
+        return Snapshot(
+            texts=[obj.text for obj in objs],
+            indents=[obj.indent for obj in objs],
+            child_indents=[obj.child_indent for obj in objs],
+            parents=[obj.parent.linenum for obj in objs],
+            children=[tuple(child.linenum for child in obj.children) for obj in objs],
+            comments=[bool(obj.is_comment) for obj in objs],
+            oldest_ancestors=[obj.oldest_ancestor for obj in objs],
+        )
+
+
+class RestoredConfParse(NetlintConfParse):
+    """A parsed configuration restored from a snapshot.
+
+    The lines are available right away. The line objects are only built
+    (without parsing) once a query needs them, many checks only search the
+    lines.
+    """
+
+    def __init__(self, snapshot: Snapshot) -> None:
+        self.comment_delimiter = "!"
+        self.factory = False
+        self.syntax = "ios"
+        self.debug = 0
+        self._snapshot = snapshot
+        self._config_objs: typing.Optional[IOSConfigList] = None
+
+    @property
+    def ioscfg(self) -> typing.List[str]:
+        """The lines of the configuration."""
+        return list(self._snapshot.texts)
+
+    @property
+    def ConfigObjs(self) -> IOSConfigList:  # noqa: N802
+        """The line objects, built on first access."""
+        if self._config_objs is None:
+            self._config_objs = self._build()
+        return self._config_objs
+
+    @ConfigObjs.setter
+    def ConfigObjs(self, value: IOSConfigList) -> None:  # noqa: N802
+        self._config_objs = value
+
+    def _build(self) -> IOSConfigList:
+        snapshot = self._snapshot
+        config_list = IOSConfigList(CiscoConfParse=self)
+        objs = [IOSCfgLine.__new__(IOSCfgLine) for _ in snapshot.texts]
+        for index, obj in enumerate(objs):
+            # The attributes IOSCfgLine.__init__ and parsing would set.
+            obj.__dict__ = {
+                "comment_delimiter": "!",
+                "text": snapshot.texts[index],
+                "linenum": index,
+                "parent": objs[snapshot.parents[index]],
+                "child_indent": snapshot.child_indents[index],
+                "is_comment": snapshot.comments[index],
+                "children": [objs[child] for child in snapshot.children[index]],
+                "oldest_ancestor": snapshot.oldest_ancestors[index],
+                "indent": snapshot.indents[index],
+                "confobj": config_list,
+                "feature": "",
+                "feature_param1": "",
+                "feature_param2": "",
+            }
+        config_list._list = objs
+        return config_list
+
+
+password_hash_regex = pattern(r"^.*(password|secret)\s\d\s\S+$")
+hash_algorithm_regex = pattern(r"\s\d\s", re.MULTILINE)
+reflexive_acl_name_regex = pattern(r"^.*reflect\s(\S+)")
+
 
 def get_password_hash_algorithm(config_line: str) -> typing.Optional[int]:
     """Extract the number of the password hash algorithm from a config line.
@@ -26,10 +108,10 @@ def get_password_hash_algorithm(config_line: str) -> typing.Optional[int]:
     :param config_line: The configuration line that potentially contains the number.
     :return: If present, the integer identifying the algorithm.
     """
-    match = re.match(r"^.*(password|secret)\s\d\s\S+$", config_line)
+    match = password_hash_regex.match(config_line)
     if not match:
         return None
-    integer = re.search(r"\s\d\s", match[0], flags=re.MULTILINE)
+    integer = hash_algorithm_regex.search(match[0])
     if not integer:
         return None
     else:
@@ -39,7 +121,14 @@ def get_password_hash_algorithm(config_line: str) -> typing.Optional[int]:
         return int(integer[0])
 
 
-@functools.lru_cache(maxsize=None)
+def parse_as_number(token: str) -> int:
+    """Convert an AS number in asplain or asdot notation (RFC5396) to an integer."""
+    high, _, low = token.rpartition(".")
+    if high:
+        return int(high) * 65536 + int(low)
+    return int(low)
+
+
 def get_access_list_usage(
     config: NetlintConfParse, name: typing.Optional[str] = None
 ) -> typing.List[str]:
@@ -55,14 +144,14 @@ def get_access_list_usage(
     access_list_usage_in_filtering_regex = r"(ip)? access-(group|class)"
     if name:
         access_list_usage_in_filtering_regex += " " + name
-    all_usages.extend(config.find_lines(access_list_usage_in_filtering_regex))
+    all_usages.extend(config.find_lines(pattern(access_list_usage_in_filtering_regex)))
     access_list_usage_in_filtering_evaluate_regex = r"^\s+evaluate"
     if name:
         access_list_usage_in_filtering_evaluate_regex += " " + name
     all_usages.extend(
         config.find_children_w_parents(
-            r"ip(v6)?\saccess-list\sextended",
-            access_list_usage_in_filtering_evaluate_regex,
+            pattern(r"ip(v6)?\saccess-list\sextended"),
+            pattern(access_list_usage_in_filtering_evaluate_regex),
         )
     )
 
@@ -72,7 +161,7 @@ def get_access_list_usage(
         access_list_usage_in_route_map_regex += " " + name
     all_usages.extend(
         config.find_children_w_parents(
-            r"^route-map", access_list_usage_in_route_map_regex
+            pattern(r"^route-map"), pattern(access_list_usage_in_route_map_regex)
         )
     )
 
@@ -82,25 +171,25 @@ def get_access_list_usage(
         access_list_usage_in_rate_limiting_regex += " " + name
     all_usages.extend(
         config.find_children_w_parents(
-            r"^interface", access_list_usage_in_rate_limiting_regex
+            pattern(r"^interface"),
+            pattern(access_list_usage_in_rate_limiting_regex),
         )
     )
 
     return all_usages
 
 
-@functools.lru_cache(maxsize=None)
 def get_access_list_definitions(config: NetlintConfParse) -> typing.List[str]:
     """Return all lines where access lists are defined."""
     # Definitions of extended ACLs
-    extended_acls = config.find_lines(acl_regex)
+    extended_acls = config.find_lines(pattern(acl_regex))
 
     # Definitions of standard ACLs
-    standard_acls = config.find_lines(r"^access-list")
+    standard_acls = config.find_lines(pattern(r"^access-list"))
 
     # Definition of reflexive ACLs
     reflected_definitions = config.find_children_w_parents(
-        acl_regex, r"^.*reflect\s(\S+|\d+)"
+        pattern(acl_regex), pattern(r"^.*reflect\s(\S+|\d+)")
     )
     return extended_acls + standard_acls + reflected_definitions
 
@@ -146,21 +235,276 @@ class Tag(Enum):
         return self.name
 
 
-def detect_nos(configuration: typing.List[str]) -> NOS:
-    """Automatically detect the NOS in the configuration.
+class Scope(Enum):
+    """Areas of the configuration a check can look at.
 
-    Very rudimentary as of now, will get more complex support for more NOSes is added.
+    Every top-level stanza of a configuration falls into exactly one scope,
+    see :func:`stanza_scope`.
     """
+
+    INTERFACE = "interface"
+    ACCESS_LIST = "access_list"
+    FEATURE = "feature"
+    LINE = "line"
+    ROUTER = "router"
+    ROUTE_MAP = "route_map"
+    # Any other top-level configuration line
+    GLOBAL = "global"
+
+    def __str__(self) -> str:
+        """Overwrite __str__ to prettify the documentation."""
+        return self.name
+
+
+# Map the beginning of top-level lines to their scope. Anything not listed
+# falls into Scope.GLOBAL.
+scope_prefixes = [
+    ("interface ", Scope.INTERFACE),
+    ("ip access-list ", Scope.ACCESS_LIST),
+    ("ipv6 access-list ", Scope.ACCESS_LIST),
+    ("access-list ", Scope.ACCESS_LIST),
+    ("feature", Scope.FEATURE),
+    ("install feature-set ", Scope.FEATURE),
+    ("line ", Scope.LINE),
+    ("router ", Scope.ROUTER),
+    ("route-map ", Scope.ROUTE_MAP),
+]
+
+
+def stanza_scope(line: str) -> Scope:
+    """Return the scope of a top-level configuration line."""
+    for prefix, scope in scope_prefixes:
+        if line.startswith(prefix):
+            return scope
+    return Scope.GLOBAL
+
+
+def split_stanzas(configuration: typing.List[str]) -> typing.List[typing.List[str]]:
+    """Split a configuration into its top-level stanzas.
+
+    A stanza is a line at column 0 together with all indented lines
+    following it. Empty lines and bare "!" separators are dropped.
+
+    :param configuration: The configuration to split.
+    :return: The lines (without line endings) of every stanza.
+    """
+    stanzas: typing.List[typing.List[str]] = []
     for line in configuration:
-        if "feature" in line:
-            return NOS.CISCO_NXOS
-    return NOS.CISCO_IOS
+        line = line.rstrip("\r\n")
+        if not line.strip() or line.strip() == "!":
+            continue
+        if line[0].isspace() and stanzas:
+            stanzas[-1].append(line)
+        else:
+            stanzas.append([line])
+    return stanzas
+
+
+def changed_scopes(
+    old_configuration: typing.List[str], new_configuration: typing.List[str]
+) -> typing.Set[Scope]:
+    """Return the scopes of all stanzas that differ between two configurations.
+
+    Stanzas are compared as a whole, so that a single changed line within an
+    interface marks the interface scope as changed. The order of the stanzas
+    doesn't matter.
+    """
+    old_stanzas = collections.Counter(
+        "\n".join(stanza) for stanza in split_stanzas(old_configuration)
+    )
+    new_stanzas = collections.Counter(
+        "\n".join(stanza) for stanza in split_stanzas(new_configuration)
+    )
+    changed = (old_stanzas - new_stanzas) + (new_stanzas - old_stanzas)
+    return {stanza_scope(stanza) for stanza in changed}
+
+
+class BlockEnd(Enum):
+    """How a bulky block of lines ends, see Block."""
+
+    # With the last indented line following the start line.
+    INDENTED = "indented"
+    # With the first line containing the delimiter that follows the type of
+    # the banner on the start line, e.g. ``^C``. Can be the start line itself.
+    DELIMITER = "delimiter"
+    # With a line consisting of a single ``@``.
+    AT_SIGN = "at sign"
+
+
+class Block(typing.NamedTuple):
+    """A kind of bulky block of lines that checks usually don't look into."""
+
+    # The beginning of the top-level line starting the block.
+    prefix: str
+    end: BlockEnd
+
+
+bulky_blocks = {
+    "certificate": Block("crypto pki certificate chain ", BlockEnd.INDENTED),
+    "banner": Block("banner ", BlockEnd.DELIMITER),
+    "macro": Block("macro name ", BlockEnd.AT_SIGN),
+}
+
+# The blocks whose bodies are blanked before checks run, by NOS.
+nos_blocks: typing.Dict[NOS, typing.List[str]] = {
+    NOS.CISCO_IOS: ["certificate", "banner", "macro"],
+    NOS.CISCO_NXOS: ["banner"],
+}
+
+
+def _block_end(configuration: typing.List[str], start: int, block: Block) -> int:
+    """Return the index of the last line of a block, -1 if it isn't one."""
+    if block.end == BlockEnd.INDENTED:
+        for end in range(start + 1, len(configuration)):
+            if not configuration[end].startswith((" ", "\t")):
+                return end - 1
+        return len(configuration) - 1
+    if block.end == BlockEnd.DELIMITER:
+        words = configuration[start].split(None, 2)
+        if len(words) < 3:
+            return -1
+        delimiter = "^C" if words[2].startswith("^C") else words[2][0]
+        _, _, text = words[2].partition(delimiter)
+        if delimiter in text:
+            return start
+    for end in range(start + 1, len(configuration)):
+        line = configuration[end].strip()
+        if block.end == BlockEnd.DELIMITER and delimiter in line:
+            return end
+        if block.end == BlockEnd.AT_SIGN and line == "@":
+            return end
+    # Unterminated blocks are left alone.
+    return -1
+
+
+def prune_blocks(
+    configuration: typing.List[str],
+    nos: NOS,
+    keep: typing.AbstractSet[str] = frozenset(),
+) -> typing.List[str]:
+    """Blank the bodies of the bulky blocks of a configuration.
+
+    Certificates, banners and macros can make up half of a configuration, but
+    are of no interest to most checks. Their start lines are kept and the
+    remaining lines replaced by empty lines, so that all other lines keep
+    their position.
+
+    :param configuration: The configuration lines.
+    :param nos: The NOS of the configuration, see :data:`nos_blocks`.
+    :param keep: The names of blocks not to prune, see :data:`bulky_blocks`.
+    :return: The pruned configuration, the configuration itself if there was
+        nothing to prune.
+    """
+    candidates = [
+        bulky_blocks[name] for name in nos_blocks.get(nos, ()) if name not in keep
+    ]
+    if not candidates:
+        return configuration
+    prefixes = tuple(block.prefix for block in candidates)
+    pruned = configuration
+    index = 0
+    while index < len(configuration):
+        line = configuration[index]
+        if not line.startswith(prefixes):
+            index += 1
+            continue
+        block = next(block for block in candidates if line.startswith(block.prefix))
+        end = _block_end(configuration, index, block)
+        if end > index:
+            if pruned is configuration:
+                pruned = list(configuration)
+            for body in range(index + 1, end + 1):
+                pruned[body] = ""
+        index = max(end, index) + 1
+    return pruned
+
+
+# Number of lines at the start of a configuration looked at to detect its NOS.
+DETECTION_WINDOW = 200
+
+# Weighted signatures of the NOSes. All of them match top-level lines, so that
+# e.g. a "feature" in an interface description isn't mistaken for NX-OS.
+nos_signatures: typing.Dict[NOS, typing.List[typing.Tuple[typing.Pattern, int]]] = {
+    NOS.CISCO_IOS: [
+        (pattern(r"^Current configuration : \d+ bytes"), 5),
+        (pattern(r"^version \d+\.\d+\s*$"), 4),
+        (pattern(r"^boot-(start|end)-marker"), 4),
+        (pattern(r"^Building configuration"), 3),
+        (pattern(r"^service (timestamps|password-encryption|pad)"), 2),
+        (pattern(r"^no service pad"), 2),
+        (pattern(r"^enable (secret|password)"), 2),
+        (pattern(r"^line (con|aux|vty) \d"), 2),
+        (pattern(r"^interface (Fast|Gigabit|TenGigabit)Ethernet"), 2),
+    ],
+    NOS.CISCO_NXOS: [
+        (pattern(r"^!Command: show running-config"), 5),
+        (pattern(r"^version \d+\.\d+\(\d+\)"), 4),
+        (pattern(r"^switchname \S"), 4),
+        (pattern(r"^vdc \S+ id \d+"), 4),
+        (pattern(r"^feature \S"), 3),
+        (pattern(r"^(install )?feature-set \S"), 3),
+        (pattern(r"^system default switchport"), 3),
+        (pattern(r"^no password strength-check"), 3),
+        (pattern(r"^!(Time|Running configuration last done at):"), 2),
+        (pattern(r"^line (console|vty)\s*$"), 2),
+        (pattern(r"^interface Ethernet\d+/\d+"), 2),
+    ],
+}
+
+
+class NOSDetection(typing.NamedTuple):
+    """Result of the NOS detection."""
+
+    nos: NOS
+    # Share of the signature weight found that points to the NOS, 0 if no
+    # signature was found at all.
+    confidence: float
+
+
+def classify_nos(
+    configuration: typing.Iterable[str], window: int = DETECTION_WINDOW
+) -> NOSDetection:
+    """Detect the NOS of a configuration and how confident the detection is.
+
+    Only the first ``window`` lines are consumed, so passing an open file
+    doesn't read it in full. Every signature found in them adds its weight to
+    the score of its NOS once. Configurations without any signature are
+    assumed to be Cisco IOS.
+
+    :param configuration: The configuration lines.
+    :param window: The number of lines to look at.
+    :return: The NOS with the highest score and the confidence.
+    """
+    scores = {nos: 0 for nos in nos_signatures}
+    found: typing.Set[typing.Pattern] = set()
+    for line in itertools.islice(configuration, window):
+        if not line or line[0].isspace():
+            continue
+        for nos, signatures in nos_signatures.items():
+            for regex, weight in signatures:
+                if regex not in found and regex.match(line):
+                    found.add(regex)
+                    scores[nos] += weight
+
+    total = sum(scores.values())
+    if not total:
+        return NOSDetection(NOS.CISCO_IOS, 0.0)
+    nos = max(scores, key=lambda candidate: scores[candidate])
+    return NOSDetection(nos, scores[nos] / total)
+
+
+def detect_nos(configuration: typing.Iterable[str]) -> NOS:
+    """Automatically detect the NOS in the configuration.
+
+    See :func:`classify_nos`.
+    """
+    return classify_nos(configuration).nos
 
 
 def get_name_from_acl_definition(acl: str) -> str:
     """Extract the ACL name from a ACL definition."""
     if "reflect" in acl:
-        name = re.findall(r"^.*reflect\s(\S+)", acl)[0]
+        name = reflexive_acl_name_regex.findall(acl)[0]
     elif acl.startswith("access-list"):
         _, name, _ = acl.split(maxsplit=2)
     else:
@@ -168,7 +512,27 @@ def get_name_from_acl_definition(acl: str) -> str:
     return name
 
 
-@functools.lru_cache(maxsize=None)
+# Number of parsed configurations to keep. Parsing is shared by all checks of a
+# configuration and, in long-lived processes like ``netlint serve``, by
+# requests for the same configuration with different selections of checks.
+PARSE_CACHE_SIZE = 256
+
+
+@functools.lru_cache(maxsize=PARSE_CACHE_SIZE)
 def parse(configuration: str) -> NetlintConfParse:
-    """Parse a configuration into a NetlintConfParse object."""
-    return NetlintConfParse(configuration.splitlines())
+    """Parse a configuration into a NetlintConfParse object.
+
+    The most recently parsed configurations are kept, older ones are dropped
+    instead of being held for the lifetime of the process. If the snapshot
+    store is enabled (see :mod:`netlint.checks.snapshots`), configurations
+    parsed by earlier runs are restored from their snapshots instead.
+    """
+    snapshot = snapshot_store.load(configuration)
+    if snapshot is not None:
+        return RestoredConfParse(
+            snapshot._replace(texts=line_table.intern(snapshot.texts))
+        )
+    parsed = NetlintConfParse(line_table.intern(configuration.splitlines()))
+    if snapshot_store.path is not None:
+        snapshot_store.save(configuration, parsed.snapshot())
+    return parsed
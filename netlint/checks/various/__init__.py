@@ -2,10 +2,12 @@
 import typing
 
 from netlint.checks.checker import Checker
+from netlint.checks.patterns import pattern
 from netlint.checks.types import CheckResult
 
 from netlint.checks.utils import (
     NOS,
+    Scope,
     Tag,
     parse,
 )
@@ -16,14 +18,18 @@ __all__ = [
 
 
 @Checker.register(
-    apply_to=[NOS.CISCO_IOS, NOS.CISCO_NXOS], name="VAR101", tags={Tag.SECURITY}
+    apply_to=[NOS.CISCO_IOS, NOS.CISCO_NXOS],
+    name="VAR101",
+    tags={Tag.SECURITY},
+    scope={Scope.GLOBAL},
+    triggers={"snmp-server community"},
 )
 def check_default_snmp_communities(
     config: typing.List[str],
 ) -> typing.Optional[CheckResult]:
     """Check for presence of default SNMP community strings."""
     config = parse("\n".join(config))
-    snmp_communities = config.find_lines("^snmp-server community")
+    snmp_communities = config.find_lines(pattern("^snmp-server community"))
     for community in snmp_communities:
         if community.startswith("snmp-server community public") or community.startswith(
             "snmp-server community private"
@@ -0,0 +1,117 @@
+"""Read configurations from tarballs and zip files without extracting them.
+
+Tarballs are read as a stream, so (compressed) tarballs are decompressed
+only once and only a single member is held in memory at any time.
+"""
+
+import tarfile
+import time
+import typing
+import zipfile
+from pathlib import Path
+
+from netlint.cli.discovery import FileFilter
+from netlint.lines import line_table
+
+TAR_SUFFIXES = (".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tbz2", ".tar.xz", ".txz")
+ZIP_SUFFIXES = (".zip",)
+
+
+def is_archive(path: Path) -> bool:
+    """Check whether a path is an archive by its suffix."""
+    return path.is_file() and path.name.lower().endswith(TAR_SUFFIXES + ZIP_SUFFIXES)
+
+
+class ArchiveReader:
+    """Read the members of a tarball or zip file.
+
+    Members of tarballs can only be read in the order they are stored in. Reading
+    a member before the last one read starts over from the beginning of the
+    tarball.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._zip: typing.Optional[zipfile.ZipFile] = None
+        self._tar: typing.Optional[tarfile.TarFile] = None
+        self._tar_members: typing.Iterator[tarfile.TarInfo] = iter(())
+        self._current: typing.Optional[tarfile.TarInfo] = None
+
+    def __enter__(self) -> "ArchiveReader":
+        """Open the archive.
+
+        :raise tarfile.TarError: If a tarball is invalid.
+        :raise zipfile.BadZipFile: If a zip file is invalid.
+        """
+        if self.path.name.lower().endswith(ZIP_SUFFIXES):
+            self._zip = zipfile.ZipFile(self.path)
+        else:
+            self._open_tar()
+        return self
+
+    def __exit__(self, *_: typing.Any) -> None:
+        """Close the archive."""
+        if self._zip:
+            self._zip.close()
+            self._zip = None
+        if self._tar:
+            self._tar.close()
+            self._tar = None
+
+    def _open_tar(self) -> None:
+        if self._tar:
+            self._tar.close()
+        self._tar = tarfile.open(self.path, "r|*")
+        self._tar_members = iter(self._tar)
+        self._current = None
+
+    def members(self, file_filter: FileFilter) -> typing.Iterator[str]:
+        """Iterate over the names of the files in the archive passing a filter.
+
+        The member whose name was yielded last can always be read without
+        starting over.
+        """
+        if self._zip:
+            for info in self._zip.infolist():
+                mtime = time.mktime(info.date_time + (0, 0, -1))
+                if not info.is_dir() and file_filter.accepts(
+                    info.filename, info.file_size, mtime
+                ):
+                    yield info.filename
+            return
+        while True:
+            try:
+                self._current = next(self._tar_members)
+            except StopIteration:
+                return
+            member = self._current
+            if member.isfile() and file_filter.accepts(
+                member.name, member.size, member.mtime
+            ):
+                yield member.name
+
+    def read(self, name: str) -> bytes:
+        """Read the content of a member.
+
+        :raise KeyError: If there is no such member.
+        """
+        if self._zip:
+            return self._zip.read(name)
+        started_over = False
+        while self._current is None or self._current.name != name:
+            try:
+                self._current = next(self._tar_members)
+            except StopIteration:
+                if started_over:
+                    raise KeyError(name)
+                self._open_tar()
+                started_over = True
+        member = typing.cast(tarfile.TarFile, self._tar).extractfile(self._current)
+        if member is None:
+            raise KeyError(name)
+        return member.read()
+
+    def read_lines(self, name: str) -> typing.List[str]:
+        """Read the lines of a member containing text."""
+        content = self.read(name).decode(errors="replace")
+        return line_table.intern(content.splitlines(keepends=True))
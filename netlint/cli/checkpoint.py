@@ -0,0 +1,87 @@
+"""Record finished configurations so that interrupted runs can be resumed.
+
+A checkpoint file consists of JSON lines: a header identifying the run
+(the selected checks and the NOS override) followed by one line per finished
+configuration with its path, content digest and results. Lines are flushed
+as soon as a configuration is done, so a killed run loses at most the line
+it was writing.
+"""
+
+import json
+import os
+import typing
+
+from netlint.cli.types import JSONOutputDict
+
+
+class Checkpoint:
+    """Results of configurations finished by previous runs."""
+
+    def __init__(self, path: str, run: typing.Dict[str, typing.Any]) -> None:
+        """Load the checkpoint file.
+
+        :param path: Path of the checkpoint file, it doesn't need to exist.
+        :param run: Identifies the run. Results recorded by a run with
+            another identity are discarded.
+        """
+        self.path = path
+        self.run = run
+        self.results: typing.Dict[str, typing.Tuple[str, JSONOutputDict]] = {}
+        self._fh: typing.Optional[typing.TextIO] = None
+
+        if not os.path.exists(path):
+            return
+        with open(path) as f:
+            try:
+                if json.loads(f.readline()) != run:
+                    return
+                for line in f:
+                    entry = json.loads(line)
+                    self.results[entry["path"]] = (entry["digest"], entry["results"])
+            except (json.JSONDecodeError, KeyError):
+                # A run killed while writing leaves a truncated last line.
+                pass
+
+    def __enter__(self) -> "Checkpoint":
+        """Rewrite the checkpoint file with the results that are still valid.
+
+        The file is replaced atomically, so that being killed while rewriting
+        it doesn't lose the previous checkpoint.
+        """
+        temporary_path = f"{self.path}.tmp"
+        self._fh = open(temporary_path, "w")
+        self._fh.write(json.dumps(self.run) + "\n")
+        for key, (digest, results) in self.results.items():
+            self._write(key, digest, results)
+        self._fh.close()
+        os.replace(temporary_path, self.path)
+        self._fh = open(self.path, "a")
+        return self
+
+    def __exit__(self, *_: typing.Any) -> None:
+        """Close the checkpoint file."""
+        if self._fh:
+            self._fh.close()
+            self._fh = None
+
+    def get(self, key: str, digest: str) -> typing.Optional[JSONOutputDict]:
+        """Return the recorded results for a configuration.
+
+        :param key: The path of the configuration.
+        :param digest: The digest of the current content of the configuration.
+        :return: The results, None if there are none for this content.
+        """
+        recorded = self.results.get(key)
+        if recorded and recorded[0] == digest:
+            return recorded[1]
+        return None
+
+    def add(self, key: str, digest: str, results: JSONOutputDict) -> None:
+        """Record the results of a finished configuration."""
+        self.results[key] = (digest, results)
+        self._write(key, digest, results)
+        typing.cast(typing.TextIO, self._fh).flush()
+
+    def _write(self, key: str, digest: str, results: JSONOutputDict) -> None:
+        entry = {"path": key, "digest": digest, "results": results}
+        typing.cast(typing.TextIO, self._fh).write(json.dumps(entry) + "\n")
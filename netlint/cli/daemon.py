@@ -0,0 +1,118 @@
+"""Lint daemon keeping the checks loaded, and the client to talk to it.
+
+Requests and responses are single JSON documents terminated by a newline
+that are exchanged over a Unix socket. This module deliberately doesn't
+import the checks, so that the client starts up quickly.
+"""
+
+import json
+import os
+import socket
+import socketserver
+import typing
+
+# Handles a decoded request and returns the response to send back.
+RequestHandler = typing.Callable[[typing.Dict[str, typing.Any]], typing.Dict]
+
+
+class DaemonError(Exception):
+    """Raised if the daemon answers a request with an error."""
+
+
+class DaemonClient:
+    """Send lint requests to a running daemon."""
+
+    def __init__(self, socket_path: str, **selection: typing.Optional[str]) -> None:
+        """Initialize the client.
+
+        :param socket_path: Path of the daemon's Unix socket.
+        :param selection: The --select, --exclude and --exclude-tags values
+            that are sent along with every request.
+        """
+        self.socket_path = socket_path
+        self.selection = selection
+
+    def request(self, command: str, **kwargs: typing.Any) -> typing.Any:
+        """Send a single request and return the result of the response."""
+        payload = dict(self.selection, command=command, **kwargs)
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+            connection.connect(self.socket_path)
+            connection.sendall(json.dumps(payload).encode() + b"\n")
+            with connection.makefile("rb") as f:
+                response = json.loads(f.readline())
+        if "error" in response:
+            raise DaemonError(response["error"])
+        return response["result"]
+
+    def describe(self) -> typing.List[typing.Dict[str, typing.Any]]:
+        """Return the rule descriptors of the selected checks."""
+        return typing.cast(typing.List[typing.Dict], self.request("describe"))
+
+    def check(
+        self, configuration: typing.List[str], nos: typing.Optional[str] = None
+    ) -> typing.Dict:
+        """Run the selected checks on a configuration.
+
+        :param configuration: The lines of the configuration, with or without
+            line endings.
+        :param nos: The NOS of the configuration, detected by the daemon if None.
+        """
+        # The daemon splits the configuration into lines again.
+        text = "".join(
+            line if line.endswith("\n") else f"{line}\n" for line in configuration
+        )
+        return typing.cast(
+            typing.Dict, self.request("check", configuration=text, nos=nos)
+        )
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    """Answer a single request on a connection."""
+
+    server: "LintServer"
+
+    def handle(self) -> None:
+        """Decode the request, dispatch it and write the response."""
+        try:
+            request = json.loads(self.rfile.readline())
+            response: typing.Dict[str, typing.Any] = {
+                "result": self.server.respond(request)
+            }
+        except Exception as e:
+            # Report errors to the client instead of killing the daemon.
+            response = {"error": f"{type(e).__name__}: {e}"}
+        self.wfile.write(json.dumps(response).encode() + b"\n")
+
+
+class LintServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Threaded server answering lint requests on a Unix socket."""
+
+    daemon_threads = True
+
+    def __init__(self, socket_path: str, respond: RequestHandler) -> None:
+        """Bind the server to the socket.
+
+        A stale socket file left behind by a daemon that didn't shut down
+        cleanly is removed, a socket that is still in use is not.
+        """
+        if os.path.exists(socket_path):
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+                try:
+                    probe.connect(socket_path)
+                except OSError:
+                    os.unlink(socket_path)
+                else:
+                    raise OSError(f"Socket {socket_path} is already in use.")
+        self.respond = respond
+        # Only allow the current user to connect.
+        old_umask = os.umask(0o177)
+        try:
+            super().__init__(socket_path, _Handler)
+        finally:
+            os.umask(old_umask)
+
+    def server_close(self) -> None:
+        """Close the server and remove the socket file."""
+        super().server_close()
+        if os.path.exists(self.server_address):  # type: ignore
+            os.unlink(self.server_address)  # type: ignore
@@ -0,0 +1,219 @@
+"""Find the configuration files to check in large directory trees.
+
+Directories are walked with :func:`os.scandir` in a single pass. Directories
+that can't contain matching files or that are ignored are pruned instead of
+being walked, and files are only stat'ed if a size or modification time
+filter needs it. The same filter applies to the members of archives and git
+revisions.
+"""
+
+import fnmatch
+import os
+import re
+import time
+import typing
+from pathlib import Path
+
+from netlint.cli.utils import glob_regex
+
+# Name of the file listing patterns to ignore, in the checked directory.
+IGNORE_FILE = ".netlintignore"
+
+
+class IgnorePattern(typing.NamedTuple):
+    """A pattern of files or directories to skip."""
+
+    glob: str
+    # Whether the pattern only applies to directories.
+    directories_only: bool
+
+
+def parse_ignore_pattern(pattern: str) -> IgnorePattern:
+    """Parse an ignore pattern in the style of .gitignore.
+
+    Patterns without a slash match at any depth, others relative to the
+    checked directory. A trailing slash only matches directories.
+    """
+    directories_only = pattern.endswith("/")
+    pattern = pattern.rstrip("/")
+    if "/" in pattern:
+        pattern = pattern.lstrip("/")
+    else:
+        pattern = f"**/{pattern}"
+    return IgnorePattern(pattern, directories_only)
+
+
+def read_ignore_file(path: Path) -> typing.List[str]:
+    """Read the patterns of an ignore file, skipping blank lines and comments.
+
+    :return: The patterns, none if the file doesn't exist.
+    """
+    if not path.is_file():
+        return []
+    with open(path) as f:
+        lines = (line.strip() for line in f)
+        return [line for line in lines if line and not line.startswith("#")]
+
+
+def _could_match_below(parts: typing.List[str], globs: typing.List[str]) -> bool:
+    """Check whether a glob could match files below a directory."""
+    if not globs:
+        return False
+    if globs[0] == "**":
+        return True
+    if not parts:
+        return True
+    return fnmatch.fnmatchcase(parts[0], globs[0]) and _could_match_below(
+        parts[1:], globs[1:]
+    )
+
+
+def _combine(globs: typing.List[str]) -> typing.Optional[typing.Pattern]:
+    """Compile glob patterns into a single regular expression matching any."""
+    if not globs:
+        return None
+    return re.compile("|".join(glob_regex(glob).pattern for glob in globs))
+
+
+class FileFilter:
+    """Decide which files to check by their path, size and modification time."""
+
+    def __init__(
+        self,
+        include: typing.Sequence[str] = ("*.conf",),
+        ignore: typing.Sequence[str] = (),
+        max_size: typing.Optional[int] = None,
+        newer_than: typing.Optional[float] = None,
+    ) -> None:
+        """Initialize the filter.
+
+        :param include: Glob patterns of which the paths relative to the checked
+            directory have to match any, see :func:`netlint.cli.utils.glob_match`.
+        :param ignore: Patterns of files and directories to skip, see
+            :func:`parse_ignore_pattern`.
+        :param max_size: Skip files larger than this many bytes.
+        :param newer_than: Skip files last modified before this timestamp.
+        """
+        self.include = list(include)
+        self.ignore = [parse_ignore_pattern(pattern) for pattern in ignore]
+        self.max_size = max_size
+        self.newer_than = newer_than
+        self._include_parts = [glob.split("/") for glob in self.include]
+        # Every path is matched against all patterns at once.
+        self._include_regex = _combine(self.include)
+        self._ignored_files_regex = _combine(
+            [pattern.glob for pattern in self.ignore if not pattern.directories_only]
+        )
+        self._ignored_directories_regex = _combine(
+            [pattern.glob for pattern in self.ignore]
+        )
+
+    @property
+    def needs_stat(self) -> bool:
+        """Whether the size or modification time of files is needed."""
+        return self.max_size is not None or self.newer_than is not None
+
+    def is_ignored(self, path: str, is_directory: bool = False) -> bool:
+        """Check whether an ignore pattern matches a path itself."""
+        regex = (
+            self._ignored_directories_regex
+            if is_directory
+            else self._ignored_files_regex
+        )
+        return regex is not None and regex.match(path) is not None
+
+    def skip_directory(self, path: str) -> bool:
+        """Check whether none of the files below a directory can be checked."""
+        parts = path.split("/")
+        return self.is_ignored(path, is_directory=True) or not any(
+            _could_match_below(parts, globs) for globs in self._include_parts
+        )
+
+    def accepts(
+        self,
+        path: str,
+        size: typing.Optional[int] = None,
+        mtime: typing.Optional[float] = None,
+        check_parents: bool = True,
+    ) -> bool:
+        """Check whether a file is to be checked.
+
+        :param path: The path of the file relative to the checked directory.
+        :param size: The size of the file, not filtered by if None.
+        :param mtime: The modification time of the file, not filtered by if None.
+        :param check_parents: Whether to check if a parent directory is
+            ignored, unnecessary for files found by :class:`Discovery`.
+        """
+        if self._include_regex is None or not self._include_regex.match(path):
+            return False
+        if self.is_ignored(path):
+            return False
+        if check_parents and self.ignore:
+            parts = path.split("/")
+            for index in range(1, len(parts)):
+                if self.is_ignored("/".join(parts[:index]), is_directory=True):
+                    return False
+        if self.max_size is not None and size is not None and size > self.max_size:
+            return False
+        if self.newer_than is not None and mtime is not None:
+            return mtime > self.newer_than
+        return True
+
+
+class Discovery:
+    """The files in a directory tree passing a filter, found in a single pass.
+
+    The files are yielded as they are found. The time spent finding them
+    (excluding the time the consumer spends between them) is tracked in
+    :attr:`seconds`.
+    """
+
+    def __init__(self, root: Path, file_filter: FileFilter) -> None:
+        self.root = root
+        self.file_filter = file_filter
+        self.files = 0
+        self.seconds = 0.0
+
+    def __iter__(self) -> typing.Iterator[Path]:
+        """Walk the tree depth first, in the order of the names of the entries."""
+        file_filter = self.file_filter
+        start = time.perf_counter()
+        # Directories to walk and their paths relative to the root.
+        stack = [(str(self.root), "")]
+        while stack:
+            directory, prefix = stack.pop()
+            try:
+                with os.scandir(directory) as iterator:
+                    entries = sorted(iterator, key=lambda entry: entry.name)
+            except OSError:
+                # Vanished or unreadable directories are skipped like Path.glob.
+                continue
+            subdirectories = []
+            for entry in entries:
+                relative_path = prefix + entry.name
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if not file_filter.skip_directory(relative_path):
+                            subdirectories.append((entry.path, relative_path + "/"))
+                        continue
+                    if not entry.is_file():
+                        continue
+                    if not file_filter.accepts(relative_path, check_parents=False):
+                        continue
+                    if file_filter.needs_stat:
+                        stat_result = entry.stat()
+                        if not file_filter.accepts(
+                            relative_path,
+                            stat_result.st_size,
+                            stat_result.st_mtime,
+                            check_parents=False,
+                        ):
+                            continue
+                except OSError:
+                    continue
+                self.files += 1
+                self.seconds += time.perf_counter() - start
+                yield Path(entry.path)
+                start = time.perf_counter()
+            stack.extend(reversed(subdirectories))
+        self.seconds += time.perf_counter() - start
@@ -0,0 +1,159 @@
+"""Read configurations straight from the object database of a git repository.
+
+Inputs like ``git+/path/to/repo@ref`` name the files of a revision without
+a checkout, ``git+/path/to/repo@base..ref`` only those that were added or
+changed since another revision. Their content is read through a single
+long-lived ``git cat-file --batch`` process instead of one process per file.
+"""
+
+import os
+import subprocess
+import typing
+
+from netlint.cli.discovery import FileFilter
+from netlint.lines import line_table
+
+GIT_PREFIX = "git+"
+
+# Modes of regular files in git trees all start with this. Others are
+# symbolic links (whose blobs are the link targets) and submodules (gitlinks,
+# whose commits aren't in the repository).
+FILE_MODE_PREFIX = "100"
+
+
+class GitInput(typing.NamedTuple):
+    """A revision (range) of a git repository to check."""
+
+    repository: str
+    ref: str
+    # Only check the files that changed since this revision, if given.
+    base: typing.Optional[str] = None
+
+
+def is_git_input(value: str) -> bool:
+    """Check whether an input path names a git revision."""
+    return value.startswith(GIT_PREFIX)
+
+
+def parse_git_input(value: str) -> GitInput:
+    """Parse an input given as git+PATH[@[BASE..]REF].
+
+    The revision defaults to HEAD. As revisions may contain an @ themselves
+    (e.g. ``HEAD@{1}``), the path ends at the first @ preceded by the path of
+    an existing directory, or at the first @ if there is none.
+
+    :raise ValueError: If the value isn't a git input.
+    """
+    if not is_git_input(value):
+        raise ValueError(f"{value} doesn't start with {GIT_PREFIX}.")
+    _, _, location = value.partition(GIT_PREFIX)
+    separators = [index for index, char in enumerate(location) if char == "@"]
+    if not separators:
+        repository, revision = location, "HEAD"
+    else:
+        index = next(
+            (index for index in separators if os.path.isdir(location[:index])),
+            separators[0],
+        )
+        repository, revision = location[:index], location[index:][1:]
+    base, range_separator, ref = revision.rpartition("..")
+    if not repository or not ref or (range_separator and not base):
+        raise ValueError(f"{value} isn't of the form git+PATH[@[BASE..]REF].")
+    return GitInput(repository=repository, ref=ref, base=base or None)
+
+
+def _git(repository: str, *args: str) -> bytes:
+    process = subprocess.run(
+        ["git", "-C", repository, *args],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        check=True,
+    )
+    return process.stdout
+
+
+def list_blobs(
+    source: GitInput, file_filter: FileFilter
+) -> typing.List[typing.Tuple[str, str]]:
+    """List the files of a revision passing a filter.
+
+    :param source: The revision, only files changed since its base if given.
+    :param file_filter: The filter the paths relative to the repository have to
+        pass. Sizes and modification times aren't filtered by.
+    :return: The paths and object names of the files, sorted by path.
+    :raises subprocess.CalledProcessError: If git fails, e.g. for unknown refs.
+    """
+    blobs = []
+    if source.base is None:
+        output = _git(source.repository, "ls-tree", "-r", "-z", source.ref)
+        for entry in output.decode().split("\0"):
+            if not entry:
+                continue
+            info, _, path = entry.partition("\t")
+            mode, object_type, name = info.split()
+            if object_type == "blob" and mode.startswith(FILE_MODE_PREFIX):
+                blobs.append((path, name))
+    else:
+        output = _git(
+            source.repository,
+            "diff-tree",
+            "-r",
+            "-z",
+            "--no-renames",
+            # Everything but deleted files.
+            "--diff-filter=d",
+            source.base,
+            source.ref,
+        )
+        fields = output.decode().split("\0")
+        for info, path in zip(fields[::2], fields[1::2]):
+            _, mode, _, name, _ = info.split()
+            if mode.startswith(FILE_MODE_PREFIX):
+                blobs.append((path, name))
+    return sorted(blob for blob in blobs if file_filter.accepts(blob[0]))
+
+
+class BlobReader:
+    """Read blobs through a single ``git cat-file --batch`` process."""
+
+    def __init__(self, repository: str) -> None:
+        self.repository = repository
+        self._process: typing.Optional[subprocess.Popen] = None
+
+    def __enter__(self) -> "BlobReader":
+        """Start the git process."""
+        self._process = subprocess.Popen(
+            ["git", "-C", self.repository, "cat-file", "--batch"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+        )
+        return self
+
+    def __exit__(self, *_: typing.Any) -> None:
+        """Stop the git process."""
+        process = typing.cast(subprocess.Popen, self._process)
+        process.stdin.close()  # type: ignore
+        process.stdout.close()  # type: ignore
+        process.wait()
+        self._process = None
+
+    def read(self, name: str) -> bytes:
+        """Read the content of a blob.
+
+        :param name: The object name of the blob.
+        :raise KeyError: If there is no such blob.
+        """
+        process = typing.cast(subprocess.Popen, self._process)
+        process.stdin.write(f"{name}\n".encode())  # type: ignore
+        process.stdin.flush()  # type: ignore
+        header = process.stdout.readline().split()  # type: ignore
+        if len(header) != 3 or header[1] != b"blob":
+            raise KeyError(name)
+        content = process.stdout.read(int(header[2]) + 1)  # type: ignore
+        # Strip the newline terminating every object.
+        return content[:-1]
+
+    def read_lines(self, name: str) -> typing.List[str]:
+        """Read the lines of a blob containing text."""
+        content = self.read(name).decode(errors="replace")
+        return line_table.intern(content.splitlines(keepends=True))
@@ -1,22 +1,69 @@
 """CLI entrypoint to netlint."""
+import collections
+import contextlib
 import csv
+import datetime
+import functools
+import gzip
+import hashlib
+import itertools
 import json
 import os
+import signal
+import subprocess
+import sys
+import tarfile
+import threading
+import time
 import typing
+import zipfile
 from pathlib import Path
 
 import click
-import napalm  # type: ignore
 import toml
-from rich.console import Console
 
-from netlint.checks.checker import Checker
-from netlint.checks.utils import NOS, detect_nos, Tag
+from netlint.cli.archive import ArchiveReader, is_archive
+from netlint.cli.checkpoint import Checkpoint
+from netlint.cli.daemon import DaemonClient, DaemonError, LintServer
+from netlint.cli.discovery import IGNORE_FILE, Discovery, FileFilter, read_ignore_file
+from netlint.cli.git import BlobReader, is_git_input, list_blobs, parse_git_input
+from netlint.cli.sarif import SarifWriter, artifact_uri, rule_descriptors
+from netlint.cli.shard import (
+    PartialWriter,
+    Shard,
+    check_shards,
+    in_shard,
+    parse_shard,
+    read_partial_header,
+    read_partial_results,
+)
 from netlint.cli.types import JSONOutputDict
-from netlint.cli.utils import smart_open, style, optional
+from netlint.cli.utils import (
+    Summary,
+    findings,
+    git_show,
+    optional,
+    smart_open,
+    style,
+)
+from netlint.cli.watch import FindingsDiff, Watcher
+from netlint.lines import content_digest, line_table
+
+# The checks (and with them ciscoconfparse) as well as napalm are only
+# imported where they are used, so that running as a client of the daemon
+# (see --daemon) doesn't pay for importing them.
+if typing.TYPE_CHECKING:
+    from netlint.checks.checker import Checker
+    from netlint.checks.types import CheckResult
+    from netlint.checks.utils import Scope
 
 CONTEXT_SETTINGS = {"help_option_names": ["-h", "--help"]}
 DEFAULT_CONFIG = "pyproject.toml"
+# Values of netlint.checks.utils.NOS, repeated to not import the checks.
+NOS_VALUES = ["cisco_ios", "cisco_nxos"]
+# Options that can be given multiple times, a single value in the config file
+# is accepted as well.
+MULTIPLE_OPTIONS = ["glob", "ignore", "rule_packs"]
 
 
 def configure(
@@ -44,6 +91,9 @@ def configure(
                     f"Configuration file '{configuration_file} doesn't contain"
                     f"a [netlint] section."
                 )
+        for key in MULTIPLE_OPTIONS:
+            if isinstance(configuration_dict.get(key), str):
+                configuration_dict[key] = [configuration_dict[key]]
         ctx.default_map = configuration_dict
     elif filename != DEFAULT_CONFIG:
         # If the the configuration location is not the default and
@@ -57,6 +107,37 @@ def configure(
         return
 
 
+def validate_shard(
+    _: click.Context,
+    __: typing.Union[click.Option, click.Parameter],
+    value: typing.Optional[str],
+) -> typing.Optional[Shard]:
+    """Parse the value of --shard, used as a callback from a click option."""
+    if value is None:
+        return None
+    try:
+        return parse_shard(value)
+    except ValueError as e:
+        raise click.BadParameter(str(e))
+
+
+def validate_input(
+    ctx: click.Context,
+    param: typing.Union[click.Option, click.Parameter],
+    value: typing.Optional[str],
+) -> typing.Optional[str]:
+    """Check that the input path exists unless it names a git revision.
+
+    Used as a callback from a click option.
+    """
+    if value is None or is_git_input(value):
+        return value
+    path_type = click.Path(
+        exists=True, file_okay=True, dir_okay=True, readable=True, resolve_path=True
+    )
+    return typing.cast(str, path_type.convert(value, param, ctx))
+
+
 @click.group(
     invoke_without_command=True, context_settings=CONTEXT_SETTINGS, no_args_is_help=True
 )  # type: ignore
@@ -64,15 +145,36 @@ def configure(
     "-i",
     "--input",
     "input_path",
-    type=click.Path(
-        exists=True, file_okay=True, dir_okay=True, readable=True, resolve_path=True
-    ),
+    callback=validate_input,
+    help="File (optionally gzip-compressed), directory or archive (tarball or zip"
+    " file) to check, or the files of a git revision given as git+PATH[@REF]"
+    " (only those changed since BASE with git+PATH@BASE..REF).",
 )
 @click.option(
     "--glob",
-    default="*.conf",
+    multiple=True,
+    default=["*.conf"],
     show_default=True,
-    help="Glob pattern to match files in the path with.",
+    help="Glob pattern of the files to check, relative to the input directory,"
+    " archive or git revision. ** matches any number of directories. Can be"
+    " given multiple times.",
+)
+@click.option(
+    "--ignore",
+    multiple=True,
+    help="Pattern of files or directories to skip, in the style of .gitignore."
+    " Can be given multiple times, patterns in a .netlintignore file in the"
+    " input directory are skipped as well.",
+)
+@click.option(
+    "--max-size",
+    type=click.IntRange(min=0),
+    help="Skip files larger than this many bytes.",
+)
+@click.option(
+    "--newer-than",
+    type=click.DateTime(),
+    help="Skip files last modified before this date and time.",
 )
 @click.option(
     "--prefix",
@@ -93,8 +195,9 @@ def configure(
     "--format",
     "format_",
     default="normal",
-    type=click.Choice(["json", "normal", "csv"]),
-    help="The format of the output data.",
+    type=click.Choice(["json", "normal", "csv", "sarif", "summary", "partial"]),
+    help="The format of the output data. Partial results are combined with the"
+    " merge subcommand.",
 )
 @click.option(
     "--select",
@@ -139,13 +242,74 @@ def configure(
     show_default=True,
     help="Path to TOML configuration file.",
 )
+@click.option(
+    "--shard",
+    callback=validate_shard,
+    help="Only check the files of shard K out of N (given as K/N) in the"
+    " directory. Files are assigned to shards by a hash of their path.",
+)
+@click.option(
+    "-j",
+    "--jobs",
+    default=1,
+    show_default=True,
+    type=click.IntRange(min=0),
+    help="Number of processes to check the files of a directory (or the checks"
+    " of a single large file) with, 0 for one per CPU.",
+)
+@click.option(
+    "--checkpoint",
+    "checkpoint_path",
+    type=click.Path(file_okay=True, dir_okay=False, writable=True),
+    help="Record finished files in this file when checking a directory. A run"
+    " with the same checkpoint skips the files that didn't change since.",
+)
+@click.option(
+    "--parse-cache",
+    type=click.Path(file_okay=False, dir_okay=True, writable=True),
+    help="Keep the parse trees of the configurations in this directory. Later"
+    " runs skip parsing unchanged files, even with other checks selected.",
+)
+@click.option(
+    "--fail-fast",
+    is_flag=True,
+    help="Stop at the first failed check, same as --max-findings 1.",
+)
+@click.option(
+    "--max-findings",
+    type=click.IntRange(min=1),
+    help="Stop once this many checks failed across all files. Security checks"
+    " and cheap checks run first.",
+)
+@click.option(
+    "--nos",
+    type=click.Choice(NOS_VALUES),
+    help="The NOS of the configurations. Detected per configuration if not given.",
+)
+@click.option(
+    "--rule-pack",
+    "rule_packs",
+    multiple=True,
+    type=click.Path(exists=True, file_okay=True, dir_okay=False, readable=True),
+    help="TOML file with additional rules to check, can be given multiple times."
+    " Rule packs of the daemon are passed to the serve subcommand.",
+)
+@click.option(
+    "--daemon",
+    type=click.Path(file_okay=True, dir_okay=False),
+    help="Send the configurations to the daemon listening on this socket"
+    " (see the serve subcommand) instead of checking them in-process.",
+)
 # Passing None as the first parameter leads to autodiscovery via setuptools
 @click.version_option(None, "-V", "--version", message="%(version)s")
 @click.pass_context
 def cli(
     ctx: click.Context,
     input_path: typing.Optional[str],
-    glob: str,
+    glob: typing.Tuple[str, ...],
+    ignore: typing.Tuple[str, ...],
+    max_size: typing.Optional[int],
+    newer_than: typing.Optional[datetime.datetime],
     prefix: str,
     output: typing.Optional[str],
     format_: str,
@@ -157,6 +321,15 @@ def cli(
     plain: bool,
     config: str,
     exit_zero: bool,
+    shard: typing.Optional[Shard],
+    jobs: int,
+    checkpoint_path: typing.Optional[str],
+    parse_cache: typing.Optional[str],
+    fail_fast: bool,
+    max_findings: typing.Optional[int],
+    nos: typing.Optional[str],
+    rule_packs: typing.Tuple[str, ...],
+    daemon: typing.Optional[str],
 ) -> None:
     """Perform static analysis on network device configuration files."""
     ctx.ensure_object(dict)
@@ -165,6 +338,18 @@ def cli(
         click.echo("Error: --select and --exclude are mutually exclusive.")
         ctx.exit(-1)
 
+    if fail_fast:
+        max_findings = 1
+    if max_findings is not None and (
+        checkpoint_path or format_ in ["csv", "summary", "partial"]
+    ):
+        # These would report or record checks that didn't run as passed.
+        click.echo(
+            "Error: --fail-fast and --max-findings can't be combined with"
+            " --checkpoint or --format csv, summary or partial."
+        )
+        ctx.exit(-1)
+
     # Assume the user doesn't want any unnecessary output when not outputting
     # normally or outputting to a file.
     if format_ != "normal" or output:
@@ -179,8 +364,66 @@ def cli(
     ctx.obj["output"] = output
     ctx.obj["format"] = format_
     ctx.obj["input_path"] = input_path
-    ctx.obj["checker"] = Checker()
-    ctx.obj["console"] = Console()
+    ignore_patterns = list(ignore)
+    if input_path and Path(input_path).is_dir():
+        ignore_patterns.extend(read_ignore_file(Path(input_path) / IGNORE_FILE))
+    ctx.obj["file_filter"] = FileFilter(
+        include=glob,
+        ignore=ignore_patterns,
+        max_size=max_size,
+        newer_than=newer_than.timestamp() if newer_than else None,
+    )
+    ctx.obj["exit_zero"] = exit_zero
+    ctx.obj["shard"] = shard
+    ctx.obj["nos"] = nos
+    ctx.obj["jobs"] = jobs
+    ctx.obj["max_findings"] = max_findings
+    ctx.obj["parse_cache"] = parse_cache
+    ctx.obj["rule_packs"] = rule_packs
+
+    if daemon:
+        # Delegate the checks to a running daemon.
+        client = DaemonClient(
+            daemon, select=select, exclude=exclude, exclude_tags=exclude_tags
+        )
+        try:
+            ctx.obj["rules"] = client.describe()
+        except (OSError, DaemonError) as e:
+            click.echo(f"Error: Failed to query the daemon: {e}", err=True)
+            ctx.exit(1)
+        ctx.obj["checker"] = None
+        ctx.obj["check"] = functools.partial(client.check, nos=nos)
+    else:
+        from netlint.checks.checker import Checker
+
+        checker = Checker()
+        try:
+            for rule_pack in rule_packs:
+                checker.load_rule_pack(rule_pack)
+        except ValueError as e:
+            click.echo(f"Error: {e}", err=True)
+            ctx.exit(1)
+        try:
+            selection = parse_selection(select, exclude, exclude_tags)
+        except KeyError as e:
+            click.echo(f"Error: Unknown tag key {e}. Aborting.", err=True)
+            ctx.exit(1)
+        checker.filter_checks(**selection)
+        if parse_cache:
+            from netlint.checks.snapshots import snapshot_store
+
+            # Applies to all threads (of serve) until the command is done.
+            previous_parse_cache = snapshot_store.path
+            snapshot_store.path = parse_cache
+            ctx.call_on_close(
+                lambda: setattr(snapshot_store, "path", previous_parse_cache)
+            )
+        ctx.obj["selection"] = selection
+        ctx.obj["checker"] = checker
+        ctx.obj["rules"] = rule_descriptors(itertools.chain(*checker.checks.values()))
+        ctx.obj["check"] = functools.partial(
+            check_config, checker, nos=nos, jobs=jobs, max_findings=max_findings
+        )
 
     # Abort execution of the group if there is a subcommand
     if ctx.invoked_subcommand is not None:
@@ -188,8 +431,6 @@ def cli(
 
     has_errors = False
 
-    configurations: typing.Dict[str, typing.List[str]] = {"default": []}
-
     if not input_path:
         click.echo(
             "Error: You need to pass -i/--input if you aren't using a"
@@ -197,99 +438,65 @@ def cli(
         )
         ctx.exit(1)
 
+    git_input = None
+    if is_git_input(input_path):
+        try:
+            git_input = parse_git_input(input_path)
+        except ValueError as e:
+            click.echo(f"Error: {e}", err=True)
+            ctx.exit(1)
     path = Path(input_path)
 
-    nos_mapping: typing.Dict[str, NOS] = {}
-    if path.is_file():
-        with open(path) as f:
-            configurations["default"] = f.readlines()
-        nos_mapping["default"] = detect_nos(configurations["default"])
-    elif path.is_dir():
-        path_items = path.glob(glob)
-        for item in path_items:
-            dict_key = str(item)
-            with open(item) as f:
-                configurations[dict_key] = f.readlines()
-            nos_mapping[dict_key] = detect_nos(configurations[dict_key])
-
-    excluded_tags = set()
-    try:
-        if exclude_tags:
-            excluded_tags = {Tag[name.upper()] for name in exclude_tags.split(",")}
-    except KeyError as e:
-        click.echo(f"Error: Unknown tag key {e}. Aborting.", err=True)
+    # Whether the input contains multiple configurations.
+    multiple = bool(git_input) or path.is_dir() or is_archive(path)
+
+    if shard and not multiple:
+        click.echo(
+            "Error: --shard needs a directory, archive or git revision passed"
+            " with -i/--input."
+        )
         ctx.exit(1)
-    if select or exclude or excluded_tags:
-        selected_checks = []
-        excluded_checks = []
-        checks_to_select = frozenset(select.split(",")) if select else set()
-        checks_to_exclude = frozenset(exclude.split(",")) if exclude else set()
-        for nos in set(nos_mapping.values()):
-            for check in ctx.obj["checker"].checks[nos]:
-                if check.name in checks_to_select:
-                    selected_checks.append(check)
-                elif (
-                    excluded_tags.intersection(check.tags)
-                    or check.name in checks_to_exclude
-                ):
-                    excluded_checks.append(check)
-            if checks_to_select:
-                ctx.obj["checker"].checks[nos] = selected_checks
-            for check in excluded_checks:
-                if check in ctx.obj["checker"].checks[nos]:
-                    ctx.obj["checker"].checks[nos].remove(check)
-
-    if path.is_file():
-        processed_config = check_config(
-            ctx.obj["checker"], configurations["default"], nos_mapping["default"]
+
+    checkpoint = None
+    if checkpoint_path and multiple:
+        run = {"checks": [rule["id"] for rule in ctx.obj["rules"]], "nos": nos}
+        if rule_packs:
+            # Changed rules have to invalidate the recorded results too.
+            run["rule_packs"] = [
+                hashlib.sha256(Path(rule_pack).read_bytes()).hexdigest()
+                for rule_pack in rule_packs
+            ]
+        checkpoint = Checkpoint(checkpoint_path, run)
+
+    if git_input:
+        try:
+            blobs = list_blobs(git_input, ctx.obj["file_filter"])
+        except subprocess.CalledProcessError as e:
+            click.echo(
+                f"Error: Failed to list {input_path}: {e.stderr.decode().strip()}",
+                err=True,
+            )
+            ctx.exit(1)
+        except OSError as e:
+            click.echo(f"Error: Failed to list {input_path}: {e}", err=True)
+            ctx.exit(1)
+        has_errors = write_results(
+            ctx, check_git(ctx, git_input.repository, blobs, checkpoint)
         )
-        if processed_config:
+    elif is_archive(path):
+        try:
+            has_errors = write_results(ctx, check_archive(ctx, path, checkpoint))
+        except (OSError, tarfile.TarError, zipfile.BadZipFile) as e:
+            click.echo(f"Error: Failed to read {input_path}: {e}", err=True)
+            ctx.exit(1)
+    elif path.is_file():
+        configuration = read_configuration(path)
+        processed_config = ctx.obj["check"](configuration)
+        if any(processed_config.values()):
             has_errors = True
-        write_output(ctx, processed_config)
+        write_output(ctx, processed_config, configuration)
     elif path.is_dir():
-        path_items = path.glob(glob)
-        processed_configs: typing.Dict[str, JSONOutputDict] = {}
-        for item in path_items:
-            processed_configs[str(item)] = check_config(
-                ctx.obj["checker"], configurations[str(item)], nos_mapping[str(item)]
-            )
-        if processed_configs:
-            has_errors = True
-        newline = "" if format_ == "csv" else os.linesep
-        with smart_open(output, newline=newline) as f:
-            if format_ == "normal":
-                for key, value in processed_configs.items():
-                    f.write(
-                        style(
-                            f"{'=' * 10} {key}\n",
-                            plain=plain,
-                            bold=True,
-                        )
-                    )
-                    results_as_string = checks_to_string(value, plain, color, prefix)
-                    if results_as_string:
-                        f.write(results_as_string)
-                    elif not quiet:
-                        click.secho("No problems found!", bold=not plain)
-            elif format_ == "json":
-                json.dump(processed_configs, f)
-            elif format_ == "csv":
-                writer = csv.writer(f)
-                # Find every unique check that is not filtered
-                all_checks: typing.List[str] = []
-                for checks in ctx.obj["checker"].checks.values():
-                    all_checks.extend(map(lambda c: c.name, checks))
-                sorted_unique_checks = sorted(set(all_checks))
-                writer.writerow(["Device"] + sorted_unique_checks)
-
-                for key, value in processed_configs.items():
-                    row = [key]
-                    row.extend(["Passed"] * len(sorted_unique_checks))
-                    for name, result in value.items():
-                        if result:
-                            index = sorted_unique_checks.index(name)
-                            row[index + 1] = "Failed"
-                    writer.writerow(row)
+        has_errors = write_results(ctx, check_directory(ctx, path, checkpoint))
 
     if not has_errors and not quiet:
         click.secho("No problems found!", bold=not plain)
@@ -316,33 +523,365 @@ def get(
     ctx: click.Context, driver_name: str, username: str, password: str, hostname: str
 ) -> None:
     """Get live configuration off of devices."""
+    import napalm  # type: ignore
+    from rich.console import Console
+
+    from netlint.checks.utils import NOS
+
     driver = napalm.get_network_driver(driver_name)
     status_color = "[bold green]" if ctx.obj["color"] else ""
     with optional(
         not ctx.obj["plain"] or ctx.obj["quiet"],
-        ctx.obj["console"].status(f"{status_color}Retrieving the configuration..."),
+        Console().status(f"{status_color}Retrieving the configuration..."),
     ) as _:
         with driver(
             hostname=hostname, username=username, password=password
         ) as connection:
-            configuration = connection.get_config(retrieve="running")["running"]
-    processed_config = check_config(
-        ctx.obj["checker"], configuration.splitlines(), NOS.from_napalm(driver_name)
+            running = connection.get_config(retrieve="running")["running"]
+    # Keep the line endings, the daemon client sends the lines joined.
+    configuration = running.splitlines(keepends=True)
+    processed_config = ctx.obj["check"](
+        configuration, nos=ctx.obj["nos"] or NOS.from_napalm(driver_name).value
     )
 
-    write_output(ctx, processed_config)
+    write_output(ctx, processed_config, configuration, uri=hostname)
 
     if not processed_config and not ctx.obj["quiet"]:
         click.secho("No problems found!\n", bold=not ctx.obj["plain"])
 
 
-def write_output(ctx: click.Context, processed_config: JSONOutputDict) -> None:
+@cli.command()
+@click.pass_context
+@click.option(
+    "--interval",
+    default=1.0,
+    show_default=True,
+    type=float,
+    help="Seconds to wait between polls of the input path.",
+)
+def watch(ctx: click.Context, interval: float) -> None:
+    """Watch the input path and re-check configurations as they change.
+
+    Only files whose content changed are checked again, the output lists
+    the findings that were added (+) or fixed (-) since the last change.
+    """
+    if not ctx.obj["input_path"] or is_git_input(ctx.obj["input_path"]):
+        click.echo(
+            "Error: You need to pass a file or directory with -i/--input to watch."
+        )
+        ctx.exit(1)
+
+    watcher = Watcher(
+        Path(ctx.obj["input_path"]), ctx.obj["file_filter"], ctx.obj["check"]
+    )
+    try:
+        while True:
+            for diff in watcher.poll():
+                click.echo(
+                    diff_to_string(diff, ctx.obj["plain"], ctx.obj["color"]), nl=False
+                )
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        ctx.exit(0)
+
+
+@cli.command()
+@click.pass_context
+@click.option(
+    "--socket",
+    "socket_path",
+    required=True,
+    type=click.Path(file_okay=True, dir_okay=False),
+    help="Path of the Unix socket to listen on.",
+)
+@click.option(
+    "--cache-size",
+    default=1024,
+    show_default=True,
+    type=int,
+    help="Number of check results to keep cached.",
+)
+def serve(ctx: click.Context, socket_path: str, cache_size: int) -> None:
+    """Serve checks to clients started with --daemon.
+
+    The checks stay loaded between requests and the results for recently
+    checked configurations are cached, which makes checking single files
+    (e.g. from git hooks) fast. The check selection is taken from the
+    options each client passes.
+    """
+    from netlint.checks.checker import Checker
+
+    if ctx.obj["checker"] is None:
+        click.echo("Error: serve can't be used together with --daemon.", err=True)
+        ctx.exit(1)
+
+    lock = threading.Lock()
+    checkers: typing.Dict[typing.Tuple, Checker] = {}
+    results: typing.MutableMapping[typing.Tuple, JSONOutputDict] = (
+        collections.OrderedDict()
+    )
+
+    def respond(request: typing.Dict[str, typing.Any]) -> typing.Any:
+        selection = (
+            request.get("select"),
+            request.get("exclude"),
+            request.get("exclude_tags"),
+        )
+        with lock:
+            if selection not in checkers:
+                checker = Checker()
+                for rule_pack in ctx.obj["rule_packs"]:
+                    checker.load_rule_pack(rule_pack)
+                select_checks(checker, *selection)
+                checkers[selection] = checker
+        checker = checkers[selection]
+
+        if request["command"] == "describe":
+            return rule_descriptors(itertools.chain(*checker.checks.values()))
+        elif request["command"] == "check":
+            configuration = request["configuration"].splitlines(keepends=True)
+            digest = content_digest(configuration, request.get("nos"))
+            key = selection + (request.get("nos"), digest)
+            with lock:
+                if key in results:
+                    results.move_to_end(key)  # type: ignore
+                    return results[key]
+            processed_config = check_config(checker, configuration, request.get("nos"))
+            with lock:
+                results[key] = processed_config
+                while len(results) > cache_size:
+                    results.popitem(last=False)  # type: ignore
+            return processed_config
+        else:
+            raise ValueError(f"Unknown command {request['command']}.")
+
+    server = LintServer(socket_path, respond)
+    # Shut down cleanly (removing the socket) when being terminated.
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    if not ctx.obj["quiet"]:
+        click.echo(f"Listening on {socket_path}.")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+@cli.command()
+@click.pass_context
+@click.option(
+    "--old",
+    "old_path",
+    type=click.Path(exists=True, file_okay=True, dir_okay=False, readable=True),
+    help="Path to the previous revision of the configuration.",
+)
+@click.option(
+    "--ref",
+    type=str,
+    help="Take the previous revision from this git revision (e.g. HEAD~1) of"
+    " the repository the input is in.",
+)
+@click.option(
+    "--previous",
+    "previous_path",
+    type=click.Path(exists=True, file_okay=True, dir_okay=False, readable=True),
+    help="JSON results of the previous revision (see --save or --format json)"
+    " to reuse instead of checking the previous revision.",
+)
+@click.option(
+    "--save",
+    "save_path",
+    type=click.Path(file_okay=True, dir_okay=False, writable=True),
+    help="Save the JSON results of the input for use with --previous.",
+)
+def diff(
+    ctx: click.Context,
+    old_path: typing.Optional[str],
+    ref: typing.Optional[str],
+    previous_path: typing.Optional[str],
+    save_path: typing.Optional[str],
+) -> None:
+    """Re-check only what changed since a previous revision of the input.
+
+    The top-level stanzas of both revisions are compared and only the checks
+    looking at the scopes (interfaces, ACLs, features, ...) of changed stanzas
+    are run again. The results of all other checks are reused. The output
+    lists the findings that are new, fixed or unchanged.
+    """
+    from netlint.checks.utils import NOS, changed_scopes, detect_nos
+
+    checker = ctx.obj["checker"]
+    input_path = ctx.obj["input_path"]
+    if checker is None:
+        click.echo("Error: diff can't be used together with --daemon.", err=True)
+        ctx.exit(1)
+    if not input_path or not Path(input_path).is_file():
+        click.echo("Error: diff needs a single file passed with -i/--input.")
+        ctx.exit(1)
+    if bool(old_path) == bool(ref):
+        click.echo("Error: Pass exactly one of --old and --ref.")
+        ctx.exit(1)
+
+    path = Path(input_path)
+    with open(path) as f:
+        configuration = f.readlines()
+    if old_path:
+        with open(old_path) as f:
+            old_configuration = f.readlines()
+    else:
+        try:
+            old_configuration = git_show(path, typing.cast(str, ref))
+        except (OSError, subprocess.CalledProcessError) as e:
+            click.echo(f"Error: Failed to read {ref} from git: {e}", err=True)
+            ctx.exit(1)
+
+    nos = NOS(ctx.obj["nos"]) if ctx.obj["nos"] else detect_nos(configuration)
+    scopes: typing.Optional[typing.Set[Scope]] = changed_scopes(
+        old_configuration, configuration
+    )
+    if previous_path:
+        with open(previous_path) as f:
+            previous: JSONOutputDict = json.load(f)
+    else:
+        previous = check_config(checker, old_configuration, nos.value)
+    if any(check.name not in previous for check in checker.checks[nos]):
+        # The previous results were produced with another selection of checks.
+        scopes = None
+
+    rerun = check_config(checker, configuration, nos.value, scopes)
+    processed_config: JSONOutputDict = {}
+    for check in checker.checks[nos]:
+        if check.name in rerun:
+            processed_config[check.name] = rerun[check.name]
+        else:
+            processed_config[check.name] = previous[check.name]
+    if save_path:
+        with open(save_path, "w") as f:
+            json.dump(processed_config, f)
+
+    # Checks missing from the previous results had no old findings.
+    old_findings = findings({name: previous.get(name) for name in processed_config})
+    new_findings = findings(processed_config)
+    changes = {
+        "new": [finding for finding in new_findings if finding not in old_findings],
+        "fixed": [finding for finding in old_findings if finding not in new_findings],
+        "unchanged": [finding for finding in new_findings if finding in old_findings],
+    }
+
+    newline = "" if ctx.obj["format"] == "csv" else os.linesep
+    with smart_open(ctx.obj["output"], newline=newline) as f:
+        if ctx.obj["format"] == "normal":
+            if not ctx.obj["quiet"]:
+                f.write(f"Re-ran {len(rerun)} of {len(processed_config)} checks.\n")
+            for status, sign, fg in [
+                ("new", "+", "red"),
+                ("fixed", "-", "green"),
+                ("unchanged", " ", None),
+            ]:
+                if not changes[status]:
+                    continue
+                f.write(
+                    style(
+                        f"{status.capitalize()} findings:\n",
+                        ctx.obj["plain"],
+                        bold=True,
+                    )
+                )
+                for check, text, line in changes[status]:
+                    f.write(
+                        style(
+                            f"{sign} {check} {text} {line}\n",
+                            ctx.obj["plain"],
+                            fg=fg if ctx.obj["color"] else None,
+                        )
+                    )
+        elif ctx.obj["format"] == "json":
+            json.dump(dict(changes, rerun=list(rerun)), f)
+        elif ctx.obj["format"] == "csv":
+            writer = csv.writer(f)
+            writer.writerow(["Status", "Check", "Text", "Line"])
+            for status, status_findings in changes.items():
+                for finding in status_findings:
+                    writer.writerow([status.capitalize(), *finding])
+        elif ctx.obj["format"] == "sarif":
+            # Code scanning tools track new and fixed results by themselves.
+            with SarifWriter(f, ctx.obj["rules"]) as sarif_writer:
+                sarif_writer.add(
+                    artifact_uri(input_path), configuration, processed_config
+                )
+
+    if changes["new"] and not ctx.obj["exit_zero"]:
+        ctx.exit(-1)
+
+
+@cli.command()
+@click.pass_context
+@click.argument(
+    "partials",
+    nargs=-1,
+    required=True,
+    type=click.Path(exists=True, file_okay=True, dir_okay=False, readable=True),
+)
+def merge(ctx: click.Context, partials: typing.Tuple[str, ...]) -> None:
+    """Merge the partial results of all shards of a --shard run.
+
+    The partial results have to be written with --format partial and cover
+    every shard exactly once. The merged results are output in the format
+    given with --format.
+    """
+    if ctx.obj["format"] == "sarif":
+        click.echo(
+            "Error: Partial results can't be merged into SARIF output as they"
+            " don't contain the configurations."
+        )
+        ctx.exit(1)
+    try:
+        headers = [read_partial_header(partial) for partial in partials]
+        check_shards(headers)
+    except (ValueError, KeyError) as e:
+        click.echo(f"Error: {e}", err=True)
+        ctx.exit(1)
+
+    headers.sort(key=lambda header: header.shard)
+    has_errors = write_results(
+        ctx,
+        (
+            (key, None, value)
+            for header in headers
+            for key, value in read_partial_results(header.path)
+        ),
+        headers[0].checks,
+    )
+
+    if not has_errors and not ctx.obj["quiet"]:
+        click.secho("No problems found!", bold=not ctx.obj["plain"])
+
+    if has_errors and not ctx.obj["exit_zero"]:
+        ctx.exit(-1)
+
+
+def write_output(
+    ctx: click.Context,
+    processed_config: JSONOutputDict,
+    configuration: typing.List[str],
+    uri: typing.Optional[str] = None,
+) -> None:
     """Write the output for a processed configuration.
 
     :param ctx: The click context where ctx.obj contains the necessary settings.
     :param processed_config: The Check output dictionary.
+    :param configuration: The checked configuration.
+    :param uri: Location of the configuration for SARIF output, defaults to the
+        input path.
     :return: None
     """
+    if ctx.obj["format"] in ["summary", "partial"]:
+        # These formats always describe a set of configurations.
+        write_results(
+            ctx, [(uri or ctx.obj["input_path"], configuration, processed_config)]
+        )
+        return
     newline = "" if ctx.obj["format"] == "csv" else os.linesep
     with smart_open(ctx.obj["output"], newline=newline) as f:
         if ctx.obj["format"] == "normal":
@@ -366,16 +905,430 @@ def write_output(ctx: click.Context, processed_config: JSONOutputDict) -> None:
                 ["Failed" if value else "Passed" for value in processed_config.values()]
             )
             writer.writerow(values)
+        elif ctx.obj["format"] == "sarif":
+            with SarifWriter(f, ctx.obj["rules"]) as sarif_writer:
+                sarif_writer.add(
+                    uri or artifact_uri(ctx.obj["input_path"]),
+                    configuration,
+                    processed_config,
+                )
+
+
+# The key of a configuration and a function reading its lines.
+Source = typing.Tuple[str, typing.Callable[[], typing.List[str]]]
+
+
+def check_directory(
+    ctx: click.Context, path: Path, checkpoint: typing.Optional[Checkpoint] = None
+) -> typing.Iterator[
+    typing.Tuple[str, typing.Optional[typing.List[str]], JSONOutputDict]
+]:
+    """Check the configurations in a directory one by one.
+
+    :param ctx: The click context where ctx.obj contains the necessary settings.
+    :param path: The directory to check the files passing the filter in.
+    :param checkpoint: If given, reuse the results of unchanged files from the
+        checkpoint and record the results of all others in it.
+    :return: The paths, configurations and check output dictionaries.
+    """
+    discovery = Discovery(path, ctx.obj["file_filter"])
+    sources = (
+        (str(item), functools.partial(read_configuration, item))
+        for item in discovery
+        if not ctx.obj["shard"]
+        or in_shard(item.relative_to(path).as_posix(), ctx.obj["shard"])
+    )
+    yield from check_sources(ctx, sources, checkpoint)
+    if not ctx.obj["quiet"]:
+        click.echo(
+            f"Found {discovery.files} files in {discovery.seconds:.2f}s.", err=True
+        )
+
+
+def check_git(
+    ctx: click.Context,
+    repository: str,
+    blobs: typing.List[typing.Tuple[str, str]],
+    checkpoint: typing.Optional[Checkpoint] = None,
+) -> typing.Iterator[
+    typing.Tuple[str, typing.Optional[typing.List[str]], JSONOutputDict]
+]:
+    """Check configurations read from the object database of a git repository.
+
+    :param ctx: The click context where ctx.obj contains the necessary settings.
+    :param repository: The path of the repository.
+    :param blobs: The paths and object names of the files to check, see
+        :func:`netlint.cli.git.list_blobs`.
+    :param checkpoint: See :func:`check_directory`.
+    :return: The paths relative to the repository, configurations and check
+        output dictionaries.
+    """
+    with BlobReader(repository) as reader:
+
+        def read_lines(name: str) -> typing.List[str]:
+            try:
+                return reader.read_lines(name)
+            except KeyError:
+                click.echo(
+                    f"Error: Blob {name} is missing from {repository}.", err=True
+                )
+                ctx.exit(1)
+
+        sources = (
+            (path, functools.partial(read_lines, name))
+            for path, name in blobs
+            if not ctx.obj["shard"] or in_shard(path, ctx.obj["shard"])
+        )
+        yield from check_sources(ctx, sources, checkpoint)
+
+
+def check_archive(
+    ctx: click.Context, path: Path, checkpoint: typing.Optional[Checkpoint] = None
+) -> typing.Iterator[
+    typing.Tuple[str, typing.Optional[typing.List[str]], JSONOutputDict]
+]:
+    """Check the configurations in a tarball or zip file one by one.
+
+    :param ctx: The click context where ctx.obj contains the necessary settings.
+    :param path: The archive to check the members matching the glob in.
+    :param checkpoint: See :func:`check_directory`.
+    :return: The names of the members, configurations and check output
+        dictionaries.
+    """
+    with ArchiveReader(path) as reader:
+        sources = (
+            (name, functools.partial(reader.read_lines, name))
+            for name in reader.members(ctx.obj["file_filter"])
+            if not ctx.obj["shard"] or in_shard(name, ctx.obj["shard"])
+        )
+        yield from check_sources(ctx, sources, checkpoint)
+
+
+def check_sources(
+    ctx: click.Context,
+    sources: typing.Iterable[Source],
+    checkpoint: typing.Optional[Checkpoint] = None,
+) -> typing.Iterator[
+    typing.Tuple[str, typing.Optional[typing.List[str]], JSONOutputDict]
+]:
+    """Check a number of configurations one by one.
+
+    :param ctx: The click context where ctx.obj contains the necessary settings.
+    :param sources: The keys of the configurations and functions reading them.
+    :param checkpoint: See :func:`check_directory`.
+    :return: The keys, configurations and check output dictionaries. The
+        configurations whose results are taken from the checkpoint are None
+        unless writing SARIF output.
+    """
+    with contextlib.ExitStack() as stack:
+        if checkpoint:
+            stack.enter_context(checkpoint)
+        # Every configuration is read once. Results taken from the checkpoint
+        # are yielded right away, the other configurations are queued to be
+        # checked with their digest kept to record them.
+        remaining = iter(sources)
+        reused: typing.Deque[
+            typing.Tuple[str, typing.Optional[typing.List[str]], JSONOutputDict]
+        ] = collections.deque()
+        queued: typing.Deque[typing.Tuple[str, typing.List[str]]] = collections.deque()
+        digests: typing.Dict[str, str] = {}
+        counts = {"total": 0, "reused": 0}
+
+        def read() -> bool:
+            """Read the next configuration, return False if there is none."""
+            try:
+                key, read_lines = next(remaining)
+            except StopIteration:
+                return False
+            counts["total"] += 1
+            configuration = read_lines()
+            if checkpoint:
+                digest = content_digest(configuration, ctx.obj["nos"])
+                processed_config = checkpoint.get(key, digest)
+                if processed_config is not None:
+                    counts["reused"] += 1
+                    # Only SARIF output needs the configuration itself.
+                    sarif = ctx.obj["format"] == "sarif"
+                    reused.append(
+                        (key, configuration if sarif else None, processed_config)
+                    )
+                    return True
+                digests[key] = digest
+            queued.append((key, configuration))
+            return True
+
+        def unchecked() -> typing.Iterator[typing.Tuple[str, typing.List[str]]]:
+            while queued or read():
+                if queued:
+                    yield queued.popleft()
+
+        # Keep as many configurations queued as the worker processes take up
+        # front, so that they never have to read ahead themselves (holding
+        # back the results of the configurations they skip).
+        read_ahead = 1
+        if ctx.obj["jobs"] != 1 and ctx.obj["checker"] is not None:
+            from netlint.lint import READ_AHEAD
+
+            read_ahead = READ_AHEAD * (ctx.obj["jobs"] or os.cpu_count() or 1)
+        results = check_configurations(ctx, unchecked())
+        reading = True
+        while True:
+            while reused:
+                yield reused.popleft()
+            if reading and len(queued) < read_ahead:
+                reading = read()
+                continue
+            try:
+                key, configuration, processed_config = next(results)
+            except StopIteration:
+                break
+            if checkpoint:
+                checkpoint.add(key, digests.pop(key), processed_config)
+            yield key, configuration, processed_config
+
+        if checkpoint and not ctx.obj["quiet"]:
+            click.echo(
+                f"Reused the results of {counts['reused']} of {counts['total']}"
+                " configurations from the checkpoint.",
+                err=True,
+            )
+
+
+def check_configurations(
+    ctx: click.Context,
+    configurations: typing.Iterable[typing.Tuple[str, typing.List[str]]],
+) -> typing.Iterator[typing.Tuple[str, typing.List[str], JSONOutputDict]]:
+    """Check configurations, in a pool of worker processes if --jobs is set.
+
+    :param ctx: The click context where ctx.obj contains the necessary settings.
+    :param configurations: The keys and lines of the configurations, read
+        lazily.
+    :return: The keys, configurations and check output dictionaries in the
+        order in which they are done.
+    """
+    if ctx.obj["jobs"] == 1 or ctx.obj["checker"] is None:
+        for key, configuration in configurations:
+            yield key, configuration, ctx.obj["check"](configuration)
+        return
+
+    from netlint.lint import lint_many
+
+    # The configurations that are being checked, needed for SARIF output.
+    pending = {}
+
+    def items() -> typing.Iterator[typing.Tuple[str, typing.List[str], str]]:
+        for key, configuration in configurations:
+            pending[key] = configuration
+            yield key, configuration, ctx.obj["nos"]
+
+    for result in lint_many(
+        items(),
+        jobs=ctx.obj["jobs"],
+        rule_packs=ctx.obj["rule_packs"],
+        max_findings=ctx.obj["max_findings"],
+        parse_cache=ctx.obj["parse_cache"],
+        **ctx.obj["selection"],
+    ):
+        key = typing.cast(str, result.id)
+        # Count the stanza cache lookups of the workers like those of this
+        # process for the summary.
+        stanza_cache = ctx.obj["checker"].stanza_cache
+        stanza_cache.hits += result.stanza_hits
+        stanza_cache.misses += result.stanza_misses
+        yield key, pending.pop(key), results_to_json(result.results)
+
+
+def read_configuration(path: Path) -> typing.List[str]:
+    """Read the lines of a configuration file, decompressing .gz files.
+
+    The lines are shared with identical lines of other configurations, see
+    :class:`netlint.lines.LineTable`.
+    """
+    if path.suffix == ".gz":
+        with gzip.open(path, "rt") as f:
+            return line_table.intern(f)
+    with open(path) as f:
+        return line_table.intern(f)
+
+
+def write_results(
+    ctx: click.Context,
+    results: typing.Iterable[
+        typing.Tuple[str, typing.Optional[typing.List[str]], JSONOutputDict]
+    ],
+    check_names: typing.Optional[typing.List[str]] = None,
+) -> bool:
+    """Write the output for a number of processed configurations.
+
+    Only the configuration that is currently processed is held in memory, the
+    output is written as soon as its checks are done. With --max-findings, the
+    remaining configurations are skipped once enough checks failed.
+
+    :param ctx: The click context where ctx.obj contains the necessary settings.
+    :param results: The keys, configurations (only needed for SARIF output) and
+        check output dictionaries of the configurations.
+    :param check_names: Names of all checks that may be in the results,
+        defaults to the selected checks.
+    :return: Whether any of the configurations has errors.
+    """
+    format_ = ctx.obj["format"]
+    plain = ctx.obj["plain"]
+    if check_names is None:
+        check_names = [rule["id"] for rule in ctx.obj["rules"]]
+    has_errors = False
+    max_findings = ctx.obj["max_findings"]
+    findings = 0
+
+    newline = "" if format_ == "csv" else os.linesep
+    with smart_open(
+        ctx.obj["output"], newline=newline
+    ) as f, contextlib.ExitStack() as stack:
+        if format_ == "json":
+            f.write("{")
+        elif format_ == "csv":
+            writer = csv.writer(f)
+            writer.writerow(["Device"] + check_names)
+        elif format_ == "sarif":
+            sarif_writer = stack.enter_context(SarifWriter(f, ctx.obj["rules"]))
+        elif format_ == "partial":
+            partial_writer = stack.enter_context(
+                PartialWriter(f, ctx.obj["shard"] or (1, 1), check_names)
+            )
+        elif format_ == "summary":
+            summary = Summary()
+
+        for index, (key, configuration, value) in enumerate(results):
+            if any(value.values()):
+                has_errors = True
+            if format_ == "normal":
+                f.write(style(f"{'=' * 10} {key}\n", plain=plain, bold=True))
+                results_as_string = checks_to_string(
+                    value, plain, ctx.obj["color"], ctx.obj["prefix"]
+                )
+                if results_as_string:
+                    f.write(results_as_string)
+                elif not ctx.obj["quiet"]:
+                    click.secho("No problems found!", bold=not plain)
+            elif format_ == "json":
+                separator = ", " if index else ""
+                f.write(f"{separator}{json.dumps(key)}: {json.dumps(value)}")
+            elif format_ == "csv":
+                row = [key]
+                row.extend(["Passed"] * len(check_names))
+                for name, result in value.items():
+                    if result:
+                        check_index = check_names.index(name)
+                        row[check_index + 1] = "Failed"
+                writer.writerow(row)
+            elif format_ == "sarif":
+                sarif_writer.add(
+                    artifact_uri(key),
+                    typing.cast(typing.List[str], configuration),
+                    value,
+                )
+            elif format_ == "partial":
+                partial_writer.add(key, value)
+            elif format_ == "summary":
+                summary.add(value)
+
+            findings += sum(1 for result in value.values() if result)
+            if max_findings is not None and findings >= max_findings:
+                if not ctx.obj["quiet"]:
+                    click.echo(f"Stopped after {findings} findings.", err=True)
+                break
+
+        if format_ == "json":
+            f.write("}")
+        elif format_ == "summary":
+            if ctx.obj["checker"] is not None:
+                summary.stanza_hits = ctx.obj["checker"].stanza_cache.hits
+                summary.stanza_misses = ctx.obj["checker"].stanza_cache.misses
+            summary.line_table = line_table
+            f.write(summary.to_string(plain))
+    return has_errors
+
+
+def parse_selection(
+    select: typing.Optional[str],
+    exclude: typing.Optional[str],
+    exclude_tags: typing.Optional[str],
+) -> typing.Dict[str, typing.Any]:
+    """Parse the check selection options.
+
+    :param select: Comma-separated list of check names to include.
+    :param exclude: Comma-separated list of check names to exclude.
+    :param exclude_tags: Comma-separated list of check tags to exclude.
+    :return: The keyword arguments for Checker.filter_checks.
+    :raises KeyError: If exclude_tags contains an unknown tag.
+    """
+    from netlint.checks.utils import Tag
+
+    return {
+        "select": frozenset(select.split(",")) if select else None,
+        "exclude": frozenset(exclude.split(",")) if exclude else None,
+        "exclude_tags": (
+            frozenset(Tag[name.upper()] for name in exclude_tags.split(","))
+            if exclude_tags
+            else None
+        ),
+    }
+
+
+def select_checks(
+    checker_instance: "Checker",
+    select: typing.Optional[str],
+    exclude: typing.Optional[str],
+    exclude_tags: typing.Optional[str],
+) -> None:
+    """Filter the checks of a Checker instance.
+
+    :param checker_instance: The Checker instance to filter the checks of.
+    :param select: Comma-separated list of check names to include.
+    :param exclude: Comma-separated list of check names to exclude.
+    :param exclude_tags: Comma-separated list of check tags to exclude.
+    :raises KeyError: If exclude_tags contains an unknown tag.
+    """
+    checker_instance.filter_checks(**parse_selection(select, exclude, exclude_tags))
 
 
 def check_config(
-    checker_instance: Checker, configuration: typing.List[str], nos: NOS
+    checker_instance: "Checker",
+    configuration: typing.List[str],
+    nos: typing.Optional[str] = None,
+    scopes: typing.Optional[typing.Set["Scope"]] = None,
+    jobs: int = 1,
+    max_findings: typing.Optional[int] = None,
 ) -> JSONOutputDict:
-    """Run checks on config at a given path."""
-    return_value: JSONOutputDict = {}
+    """Run checks on a configuration.
 
-    results = checker_instance.run_checks(configuration, nos)
+    :param checker_instance: The Checker instance to run the checks with.
+    :param configuration: The configuration to check.
+    :param nos: Value of the NOS of the configuration, detected if not given.
+    :param scopes: Only run the checks looking at these scopes, see
+        :meth:`netlint.checks.checker.Checker.run_checks`.
+    :param jobs: The number of processes to split the checks of a large
+        configuration over, see :meth:`netlint.checks.checker.Checker.run_checks`.
+    :param max_findings: Stop once this many checks failed, see
+        :meth:`netlint.checks.checker.Checker.run_checks`.
+    :return: The check output dictionary.
+    """
+    from netlint.checks.utils import NOS, detect_nos
 
+    results = checker_instance.run_checks(
+        configuration,
+        NOS(nos) if nos else detect_nos(configuration),
+        scopes,
+        jobs=jobs,
+        max_findings=max_findings,
+    )
+    return results_to_json(results)
+
+
+def results_to_json(
+    results: typing.Dict[str, typing.Optional["CheckResult"]],
+) -> JSONOutputDict:
+    """Convert the results of Checker.run_checks to a check output dictionary."""
+    return_value: JSONOutputDict = {}
     for check, result in results.items():
         if not result:
             return_value[check] = None
@@ -407,5 +1360,16 @@ def checks_to_string(
     return return_value
 
 
+def diff_to_string(diff: FindingsDiff, plain: bool, color: bool) -> str:
+    """Convert the changed findings of a file to their string representation."""
+    return_value = style(f"{'=' * 10} {diff.path}\n", plain, bold=True)
+    for sign, changed, fg in [("+", diff.new, "red"), ("-", diff.fixed, "green")]:
+        for check, text, line in changed:
+            return_value += style(
+                f"{sign} {check} {text} {line}\n", plain, fg=fg if color else None
+            )
+    return return_value
+
+
 if __name__ == "__main__":
     cli(obj={})
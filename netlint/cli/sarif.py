@@ -0,0 +1,207 @@
+"""Streaming SARIF output for code-scanning tools."""
+import bisect
+import inspect
+import json
+import os
+import typing
+from pathlib import Path
+
+from netlint.cli.types import JSONOutputDict
+
+if typing.TYPE_CHECKING:
+    from netlint.checks.checker import Check
+
+SARIF_VERSION = "2.1.0"
+SARIF_SCHEMA = "https://json.schemastore.org/sarif-2.1.0.json"
+INFORMATION_URI = "https://netlint.readthedocs.io"
+
+
+def block_ends(configuration: typing.List[str]) -> typing.List[int]:
+    """Find the end of the block every line of a configuration starts.
+
+    :param configuration: The lines of the configuration.
+    :return: The (1-based) line number after the last child of every line,
+        indexed by the line number of the line.
+    """
+    ends = [len(configuration) + 1] * (len(configuration) + 1)
+    # The line numbers and indentation of the lines whose block is open.
+    open_blocks: typing.List[typing.Tuple[int, int]] = []
+    for number, line in enumerate(configuration, start=1):
+        if not line.strip():
+            continue
+        indent = len(line) - len(line.lstrip())
+        while open_blocks and open_blocks[-1][1] >= indent:
+            ends[open_blocks.pop()[0]] = number
+        open_blocks.append((number, indent))
+    return ends
+
+
+def find_line_numbers(
+    configuration: typing.List[str], results: typing.Iterable[typing.List[str]]
+) -> typing.List[typing.List[typing.Optional[int]]]:
+    """Find the (1-based) line numbers of result lines in a configuration.
+
+    Check results list child lines after their parents, thus a line is looked
+    for within the block of the closest preceding result line containing it,
+    e.g. the switchport line of the third interface is found below that
+    interface instead of below the first one. Other lines are mapped to their
+    first occurrence not taken by the result yet, so that a result listing
+    the same line twice gets two distinct locations.
+
+    :param configuration: The configuration the result lines were taken from.
+    :param results: The lines of each check result.
+    :return: The line numbers per result, None if a line wasn't found.
+    """
+    index: typing.Dict[str, typing.List[int]] = {}
+    for number, line in enumerate(configuration, start=1):
+        index.setdefault(line.rstrip(), []).append(number)
+    ends = block_ends(configuration)
+
+    line_numbers = []
+    for lines in results:
+        taken: typing.Set[int] = set()
+        # The line numbers of the previous result lines whose block is open.
+        ancestors: typing.List[int] = []
+        numbers: typing.List[typing.Optional[int]] = []
+        for line in lines:
+            candidates = index.get(line.rstrip(), [])
+            line_number: typing.Optional[int] = None
+            while ancestors:
+                parent = ancestors[-1]
+                start = bisect.bisect_right(candidates, parent)
+                stop = bisect.bisect_left(candidates, ends[parent])
+                line_number = next(
+                    (c for c in candidates[start:stop] if c not in taken), None
+                )
+                if line_number is not None:
+                    break
+                ancestors.pop()
+            if line_number is None:
+                line_number = next((c for c in candidates if c not in taken), None)
+            if line_number is not None:
+                taken.add(line_number)
+                ancestors.append(line_number)
+            numbers.append(line_number)
+        line_numbers.append(numbers)
+    return line_numbers
+
+
+def artifact_uri(path: str) -> str:
+    """Convert a path to an URI relative to the working directory if possible."""
+    try:
+        return Path(os.path.relpath(path)).as_posix()
+    except ValueError:
+        # On Windows a relative path can't span drives.
+        return Path(path).as_uri()
+
+
+def rule_descriptor(check: "Check") -> typing.Dict[str, typing.Any]:
+    """Build the SARIF reportingDescriptor for a check."""
+    doc = inspect.cleandoc(check.function_doc or "")
+    short_description = doc.splitlines()[0] if doc else check.name
+    return {
+        "id": check.name,
+        "name": check.check_function.__name__,
+        "shortDescription": {"text": short_description},
+        "fullDescription": {"text": doc or short_description},
+        "helpUri": INFORMATION_URI,
+        "properties": {"tags": sorted(tag.value for tag in check.tags)},
+    }
+
+
+def rule_descriptors(
+    checks: typing.Iterable["Check"],
+) -> typing.List[typing.Dict[str, typing.Any]]:
+    """Build the sorted SARIF reportingDescriptors for a number of checks.
+
+    Checks applying to multiple NOSes are only described once.
+    """
+    unique_checks = {check.name: check for check in checks}
+    return [rule_descriptor(unique_checks[name]) for name in sorted(unique_checks)]
+
+
+class SarifWriter:
+    """Write SARIF documents incrementally.
+
+    The rule descriptors are written once when entering the context, every
+    call to :meth:`add` then writes the results of a single configuration
+    straight to the file handle. Thus only one configuration is ever held in
+    memory, regardless of how many are checked.
+    """
+
+    def __init__(
+        self, fh: typing.TextIO, rules: typing.List[typing.Dict[str, typing.Any]]
+    ) -> None:
+        self.fh = fh
+        self.rule_descriptors = rules
+        self.rules = {rule["id"]: index for index, rule in enumerate(rules)}
+        self._first_result = True
+
+    def __enter__(self) -> "SarifWriter":
+        """Write the document header including the rule descriptors."""
+        header = {
+            "version": SARIF_VERSION,
+            "$schema": SARIF_SCHEMA,
+        }
+        driver = {
+            "name": "netlint",
+            "informationUri": INFORMATION_URI,
+            "rules": self.rule_descriptors,
+        }
+        # Write everything up to the opening bracket of the results array.
+        self.fh.write(json.dumps(header)[:-1])
+        self.fh.write(', "runs": [{"tool": {"driver": ')
+        self.fh.write(json.dumps(driver))
+        self.fh.write('}, "results": [')
+        return self
+
+    def __exit__(self, *_: typing.Any) -> None:
+        """Close the results array and the document."""
+        self.fh.write("]}]}")
+
+    def add(
+        self,
+        uri: str,
+        configuration: typing.List[str],
+        processed_config: JSONOutputDict,
+    ) -> None:
+        """Write the results of a single configuration.
+
+        :param uri: The location of the configuration file.
+        :param configuration: The checked configuration, used to find line numbers.
+        :param processed_config: The check output dictionary.
+        """
+        failed = [(name, result) for name, result in processed_config.items() if result]
+        if not failed:
+            return
+        line_numbers = find_line_numbers(
+            configuration, (result["lines"] for _, result in failed)
+        )
+        for (name, result), numbers in zip(failed, line_numbers):
+            locations = []
+            for line, line_number in zip(result["lines"], numbers):
+                physical_location: typing.Dict[str, typing.Any] = {
+                    "artifactLocation": {"uri": uri}
+                }
+                if line_number is not None:
+                    physical_location["region"] = {
+                        "startLine": line_number,
+                        "snippet": {"text": line.rstrip()},
+                    }
+                locations.append({"physicalLocation": physical_location})
+            sarif_result: typing.Dict[str, typing.Any] = {
+                "ruleId": name,
+                "ruleIndex": self.rules[name],
+                "level": "error",
+                "message": {"text": result["text"]},
+                "locations": locations[:1],
+            }
+            if len(locations) > 1:
+                sarif_result["relatedLocations"] = [
+                    dict(location, id=index)
+                    for index, location in enumerate(locations[1:], start=1)
+                ]
+            if not self._first_result:
+                self.fh.write(", ")
+            self._first_result = False
+            self.fh.write(json.dumps(sarif_result))
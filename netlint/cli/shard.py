@@ -0,0 +1,130 @@
+"""Split checking a directory across shards and merge their partial results.
+
+Partial result files are JSON lines: a header describing the shard and the
+selected checks followed by one line per configuration. Thus they can be
+written and merged without holding all results in memory.
+"""
+
+import hashlib
+import json
+import typing
+
+from netlint.cli.types import JSONOutputDict
+
+PARTIAL_VERSION = 1
+
+# The (1-based) index of a shard and the number of shards.
+Shard = typing.Tuple[int, int]
+
+
+class PartialHeader(typing.NamedTuple):
+    """First line of a partial result file."""
+
+    path: str
+    shard: Shard
+    checks: typing.List[str]
+
+
+def parse_shard(value: str) -> Shard:
+    """Parse a shard given as K/N.
+
+    :raise ValueError: If the value is malformed or K isn't within 1 to N.
+    """
+    index, _, count = value.partition("/")
+    shard = int(index), int(count)
+    if not 1 <= shard[0] <= shard[1]:
+        raise ValueError(
+            f"Shard {value} has to be within 1/{count} and {count}/{count}."
+        )
+    return shard
+
+
+def in_shard(relative_path: str, shard: Shard) -> bool:
+    """Check whether a file belongs to a shard.
+
+    Files are assigned by a hash of their path relative to the checked
+    directory, so that every host assigns them alike regardless of where the
+    directory is mounted.
+    """
+    index, count = shard
+    digest = hashlib.sha256(relative_path.encode()).digest()
+    return int.from_bytes(digest[:8], "big") % count == index - 1
+
+
+class PartialWriter:
+    """Write a partial result file incrementally."""
+
+    def __init__(
+        self, fh: typing.TextIO, shard: Shard, checks: typing.List[str]
+    ) -> None:
+        self.fh = fh
+        self.shard = shard
+        self.checks = checks
+
+    def __enter__(self) -> "PartialWriter":
+        """Write the header."""
+        header = {
+            "version": PARTIAL_VERSION,
+            "shard": list(self.shard),
+            "checks": self.checks,
+        }
+        self.fh.write(json.dumps(header) + "\n")
+        return self
+
+    def __exit__(self, *_: typing.Any) -> None:
+        """Nothing to finish, every line is complete in itself."""
+
+    def add(self, key: str, processed_config: JSONOutputDict) -> None:
+        """Write the results of a single configuration."""
+        self.fh.write(json.dumps({"path": key, "results": processed_config}) + "\n")
+
+
+def read_partial_header(path: str) -> PartialHeader:
+    """Read the header of a partial result file.
+
+    :raise ValueError: If the file isn't a partial result file.
+    """
+    with open(path) as f:
+        try:
+            header = json.loads(f.readline())
+        except json.JSONDecodeError:
+            header = None
+    if not isinstance(header, dict) or header.get("version") != PARTIAL_VERSION:
+        raise ValueError(f"{path} isn't a partial result file.")
+    index, count = header["shard"]
+    return PartialHeader(path=path, shard=(index, count), checks=header["checks"])
+
+
+def read_partial_results(
+    path: str,
+) -> typing.Iterator[typing.Tuple[str, JSONOutputDict]]:
+    """Iterate over the configurations and their results in a partial result file."""
+    with open(path) as f:
+        f.readline()
+        for line in f:
+            if line.strip():
+                entry = json.loads(line)
+                yield entry["path"], entry["results"]
+
+
+def check_shards(headers: typing.List[PartialHeader]) -> None:
+    """Check that partial results cover all shards of the same run exactly once.
+
+    :raise ValueError: Describing the first problem found.
+    """
+    counts = {header.shard[1] for header in headers}
+    if len(counts) != 1:
+        raise ValueError(f"Partial results are split into {sorted(counts)} shards.")
+    if any(header.checks != headers[0].checks for header in headers):
+        raise ValueError("Partial results were produced with different checks.")
+    seen: typing.Dict[int, str] = {}
+    for header in headers:
+        index = header.shard[0]
+        if index in seen:
+            raise ValueError(
+                f"{seen[index]} and {header.path} both contain shard {index}."
+            )
+        seen[index] = header.path
+    missing = sorted(set(range(1, counts.pop() + 1)) - set(seen))
+    if missing:
+        raise ValueError(f"Partial results for shards {missing} are missing.")
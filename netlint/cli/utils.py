@@ -1,10 +1,21 @@
 """CLI utilities."""
+import collections
 import contextlib
+import functools
+import re
+import subprocess
 import sys
 import typing
+from pathlib import Path
 
 import click
 
+from netlint.cli.types import JSONOutputDict
+from netlint.lines import LineTable
+
+# A single finding: the check name, the check text and one flagged line.
+Finding = typing.Tuple[str, str, str]
+
 
 @contextlib.contextmanager
 def smart_open(
@@ -40,3 +51,117 @@ def optional(
             yield
     else:
         yield
+
+
+def findings(processed_config: JSONOutputDict) -> typing.List[Finding]:
+    """Flatten a check output dictionary into a list of findings."""
+    return_value = []
+    for check, result in processed_config.items():
+        if not result:
+            continue
+        for line in result["lines"]:
+            return_value.append((check, result["text"], line.strip()))
+    return return_value
+
+
+def git_show(path: Path, ref: str) -> typing.List[str]:
+    """Return the lines of a file at a given revision of its git repository.
+
+    :raises subprocess.CalledProcessError: If git fails, e.g. for unknown refs.
+    """
+    process = subprocess.run(
+        ["git", "-C", str(path.parent), "show", f"{ref}:./{path.name}"],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+        check=True,
+    )
+    return process.stdout.splitlines(keepends=True)
+
+
+def glob_match(path: str, glob: str) -> bool:
+    """Check whether a relative path matches a glob pattern like Path.glob does.
+
+    ``*``, ``?`` and ``[...]`` don't match across directories while a ``**``
+    component matches any number of directories.
+    """
+    return glob_regex(glob).match(path) is not None
+
+
+@functools.lru_cache(maxsize=None)
+def glob_regex(glob: str) -> typing.Pattern:
+    """Compile a glob pattern for :func:`glob_match`."""
+    regex = ""
+    components = glob.split("/")
+    for index, component in enumerate(components):
+        last = index == len(components) - 1
+        if component == "**":
+            regex += ".*" if last else "(?:[^/]+/)*"
+        else:
+            regex += _translate_glob_component(component) + ("" if last else "/")
+    return re.compile(f"(?s:{regex})\\Z")
+
+
+def _translate_glob_component(component: str) -> str:
+    regex = ""
+    index = 0
+    while index < len(component):
+        char = component[index]
+        index += 1
+        end = component.find("]", index + 1)
+        if char == "*":
+            regex += "[^/]*"
+        elif char == "?":
+            regex += "[^/]"
+        elif char == "[" and end != -1:
+            characters = component[index:end].replace("\\", "\\\\")
+            if characters.startswith("!"):
+                characters = "^" + characters[1:]
+            regex += f"[{characters}]"
+            index = end + 1
+        else:
+            regex += re.escape(char)
+    return regex
+
+
+class Summary:
+    """Count failed checks over a number of configurations."""
+
+    def __init__(self) -> None:
+        self.configurations = 0
+        self.failed_configurations = 0
+        self.failed_checks: typing.Counter[str] = collections.Counter()
+        # Stanzas whose results were taken from the stanza cache or not.
+        self.stanza_hits = 0
+        self.stanza_misses = 0
+        # The lines read and parsed by this process, if any.
+        self.line_table: typing.Optional[LineTable] = None
+
+    def add(self, processed_config: JSONOutputDict) -> None:
+        """Count the results of a single configuration."""
+        self.configurations += 1
+        failed = [check for check, result in processed_config.items() if result]
+        if failed:
+            self.failed_configurations += 1
+        self.failed_checks.update(failed)
+
+    def to_string(self, plain: bool) -> str:
+        """Convert the summary to its string representation."""
+        return_value = style("Configurations checked: ", plain, bold=True)
+        return_value += f"{self.configurations}\n"
+        return_value += style("Configurations with problems: ", plain, bold=True)
+        return_value += f"{self.failed_configurations}\n"
+        for check in sorted(self.failed_checks):
+            return_value += f"{check}: {self.failed_checks[check]}\n"
+        lookups = self.stanza_hits + self.stanza_misses
+        if lookups:
+            return_value += style("Stanza cache hits: ", plain, bold=True)
+            return_value += f"{self.stanza_hits} of {lookups}"
+            return_value += f" ({self.stanza_hits / lookups:.0%})\n"
+        if self.line_table and self.line_table.lines:
+            return_value += style("Lines interned: ", plain, bold=True)
+            return_value += f"{self.line_table.lines}"
+            return_value += f" ({self.line_table.distinct} distinct,"
+            return_value += f" {self.line_table.saved_bytes / 2 ** 20:.1f} MiB"
+            return_value += " saved by sharing identical lines)\n"
+        return return_value
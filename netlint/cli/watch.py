@@ -0,0 +1,109 @@
+"""Watch configuration files and re-check them as they change."""
+import os
+import typing
+from pathlib import Path
+
+from netlint.cli.discovery import Discovery, FileFilter
+from netlint.cli.types import JSONOutputDict
+from netlint.cli.utils import Finding, findings
+from netlint.lines import content_digest
+
+
+class WatchedFile(typing.NamedTuple):
+    """State kept in memory for every watched file."""
+
+    # Modification time (in ns) and size, used to avoid reading unchanged files.
+    stat: typing.Tuple[int, int]
+    digest: str
+    processed_config: JSONOutputDict
+
+
+class FindingsDiff(typing.NamedTuple):
+    """Difference between the findings of two revisions of a file."""
+
+    path: str
+    new: typing.List[Finding]
+    fixed: typing.List[Finding]
+
+
+def diff_findings(path: str, old: JSONOutputDict, new: JSONOutputDict) -> FindingsDiff:
+    """Compare the findings of two check output dictionaries."""
+    old_findings = findings(old)
+    new_findings = findings(new)
+    return FindingsDiff(
+        path=path,
+        new=[finding for finding in new_findings if finding not in old_findings],
+        fixed=[finding for finding in old_findings if finding not in new_findings],
+    )
+
+
+class Watcher:
+    """Keep track of the configuration files in a path.
+
+    Every :meth:`poll` only reads files whose modification time or size
+    changed and only re-checks them if their content digest changed as well.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        file_filter: FileFilter,
+        check: typing.Callable[[typing.List[str]], JSONOutputDict],
+    ) -> None:
+        """Initialize the watcher.
+
+        :param path: The file or directory to watch.
+        :param file_filter: The filter files in the directory have to pass.
+        :param check: Callable running the checks on a configuration.
+        """
+        self.path = path
+        self.file_filter = file_filter
+        self.check = check
+        self.files: typing.Dict[str, WatchedFile] = {}
+
+    def paths(self) -> typing.List[Path]:
+        """Return all paths that are currently watched."""
+        if self.path.is_file():
+            return [self.path]
+        return sorted(Discovery(self.path, self.file_filter))
+
+    def poll(self) -> typing.List[FindingsDiff]:
+        """Check all new or changed files and return the changed findings."""
+        diffs = []
+        seen = set()
+        for path in self.paths():
+            key = str(path)
+            seen.add(key)
+            try:
+                stat_result = os.stat(path)
+            except FileNotFoundError:
+                continue
+            stat = (stat_result.st_mtime_ns, stat_result.st_size)
+            previous = self.files.get(key)
+            if previous and previous.stat == stat:
+                continue
+
+            with open(path, "rb") as f:
+                configuration = (
+                    f.read().decode(errors="replace").splitlines(keepends=True)
+                )
+            digest = content_digest(configuration)
+            if previous and previous.digest == digest:
+                # Touched, or only volatile lines changed.
+                self.files[key] = previous._replace(stat=stat)
+                continue
+
+            processed_config = self.check(configuration)
+            self.files[key] = WatchedFile(stat, digest, processed_config)
+            diff = diff_findings(
+                key, previous.processed_config if previous else {}, processed_config
+            )
+            if diff.new or diff.fixed:
+                diffs.append(diff)
+
+        for key in sorted(set(self.files) - seen):
+            # Deleted files take their findings with them.
+            diff = diff_findings(key, self.files.pop(key).processed_config, {})
+            if diff.fixed:
+                diffs.append(diff)
+        return diffs
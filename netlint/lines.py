@@ -0,0 +1,115 @@
+"""Handle the lines of configurations independently of the checks.
+
+Identical lines of many configurations are shared through a :class:`LineTable`
+and lines that change on every fetch are left out when identifying
+configurations by their content, see :func:`content_digest`. This module is
+imported by the CLI without the checks, so it must not import them (or
+ciscoconfparse) itself.
+"""
+
+import functools
+import hashlib
+import re
+import sys
+import typing
+
+# Number of distinct lines a LineTable keeps.
+LINE_TABLE_SIZE = 1 << 20
+
+
+class LineTable:
+    """Share identical lines of many configurations as a single string object.
+
+    The configurations of a fleet mostly consist of the same lines (e.g.
+    `` no shutdown`` or ``!``), which are held once for all configurations
+    kept in memory at the same time, like those cached by
+    :func:`netlint.checks.utils.parse`. Once ``max_size`` distinct lines are
+    known, new lines are no longer added.
+    """
+
+    def __init__(self, max_size: int = LINE_TABLE_SIZE) -> None:
+        self.max_size = max_size
+        # The number of lines interned and the memory saved by sharing them.
+        self.lines = 0
+        self.saved_bytes = 0
+        self._lines: typing.Dict[str, str] = {}
+
+    @property
+    def distinct(self) -> int:
+        """The number of distinct lines in the table."""
+        return len(self._lines)
+
+    def intern(self, lines: typing.Iterable[str]) -> typing.List[str]:
+        """Replace lines by the identical lines already in the table.
+
+        :param lines: The lines of a configuration.
+        :return: The lines, sharing the string objects of known lines.
+        """
+        table = self._lines
+        interned = []
+        for line in lines:
+            shared = table.get(line)
+            if shared is None:
+                if len(table) < self.max_size:
+                    table[line] = line
+                shared = line
+            elif shared is not line:
+                self.saved_bytes += sys.getsizeof(line)
+            interned.append(shared)
+        self.lines += len(interned)
+        return interned
+
+
+# The lines of all configurations read or parsed by this process.
+line_table = LineTable()
+
+
+# Header and comment lines that change whenever a configuration is fetched,
+# even if nothing else did, by the values of netlint.checks.utils.NOS. Checks
+# must not look at them. Configuration commands don't belong here even if
+# devices update them by themselves, as changes to them must be checked.
+volatile_lines: typing.Dict[str, typing.List[str]] = {
+    "cisco_ios": [
+        r"Building configuration",
+        r"Current configuration : \d+ bytes",
+        r"! Last configuration change at ",
+        r"! NVRAM config last updated at ",
+        r"! No configuration change since last restart",
+    ],
+    "cisco_nxos": [
+        r"!Time: ",
+        r"!Running configuration last done at: ",
+    ],
+}
+
+
+@functools.lru_cache(maxsize=None)
+def _volatile_regex(nos: typing.Optional[str]) -> typing.Pattern:
+    """Compile a pattern matching a newline and the volatile line following it.
+
+    :param nos: The NOS whose volatile lines to match, those of all NOSes if None.
+    """
+    if nos is None:
+        regexes = [
+            regex for nos_lines in volatile_lines.values() for regex in nos_lines
+        ]
+    else:
+        regexes = volatile_lines.get(nos, [])
+    # Starting with a literal newline lets the regex engine skip ahead quickly.
+    return re.compile("\n(?:" + ("|".join(regexes) or "(?!)") + ")[^\n]*")
+
+
+def content_digest(
+    configuration: typing.Iterable[str], nos: typing.Optional[str] = None
+) -> str:
+    """Compute the digest identifying the content of a configuration.
+
+    Volatile lines like the time of the last change are left out, so that an
+    unchanged configuration fetched again has the same digest.
+
+    :param configuration: The configuration lines.
+    :param nos: The NOS of the configuration, see :data:`volatile_lines`. The
+        volatile lines of all NOSes are left out if None.
+    """
+    content = _volatile_regex(nos).sub("", "\n" + "".join(configuration))
+    return hashlib.sha256(content[1:].encode()).hexdigest()
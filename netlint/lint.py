@@ -0,0 +1,165 @@
+"""Lint configurations from Python code.
+
+Unlike the CLI, this API neither needs files nor a click context and yields
+the results of many configurations as they are done, optionally checking
+them in a pool of worker processes.
+"""
+
+import concurrent.futures
+import functools
+import os
+import typing
+
+from netlint.checks.checker import Checker
+from netlint.checks.snapshots import snapshot_store
+from netlint.checks.types import LintResult
+from netlint.checks.utils import NOS, Tag, detect_nos
+
+# A configuration as text or as a list of lines.
+Configuration = typing.Union[str, typing.Sequence[str]]
+
+# The identifier of a configuration, the configuration and its NOS (detected
+# if None).
+LintItem = typing.Tuple[
+    typing.Hashable, Configuration, typing.Optional[typing.Union[NOS, str]]
+]
+
+# The --select, --exclude and --exclude-tags equivalents, see
+# Checker.filter_checks.
+Selection = typing.Tuple[
+    typing.Optional[typing.FrozenSet[str]],
+    typing.Optional[typing.FrozenSet[str]],
+    typing.Optional[typing.FrozenSet[Tag]],
+]
+
+
+# The number of items read ahead per worker process, to keep every worker busy
+# without reading all items up front.
+READ_AHEAD = 2
+
+# Number of checkers (by selection and rule packs) every process keeps, so that
+# every worker only builds the check plan once without the checkers of all
+# selections ever used piling up in long-lived processes.
+CHECKER_CACHE_SIZE = 16
+
+
+@functools.lru_cache(maxsize=CHECKER_CACHE_SIZE)
+def _get_checker(selection: Selection, rule_packs: typing.Tuple[str, ...]) -> Checker:
+    checker = Checker()
+    for rule_pack in rule_packs:
+        checker.load_rule_pack(rule_pack)
+    checker.filter_checks(*selection)
+    return checker
+
+
+def _lint(
+    selection: Selection,
+    rule_packs: typing.Tuple[str, ...],
+    max_findings: typing.Optional[int],
+    parse_cache: typing.Optional[str],
+    item: LintItem,
+) -> LintResult:
+    identifier, configuration, nos = item
+    if isinstance(configuration, str):
+        lines = configuration.splitlines(keepends=True)
+    else:
+        lines = list(configuration)
+    detected_nos = NOS(nos) if nos else detect_nos(lines)
+    checker = _get_checker(selection, rule_packs)
+    hits, misses = checker.stanza_cache.hits, checker.stanza_cache.misses
+    # Only this call keeps parse trees in the directory, not the host process.
+    with snapshot_store.using(parse_cache):
+        results = checker.run_checks(lines, detected_nos, max_findings=max_findings)
+    return LintResult(
+        id=identifier,
+        nos=detected_nos,
+        results=results,
+        stanza_hits=checker.stanza_cache.hits - hits,
+        stanza_misses=checker.stanza_cache.misses - misses,
+    )
+
+
+def lint_many(
+    items: typing.Iterable[LintItem],
+    jobs: typing.Optional[int] = 1,
+    select: typing.Optional[typing.Iterable[str]] = None,
+    exclude: typing.Optional[typing.Iterable[str]] = None,
+    exclude_tags: typing.Optional[typing.Iterable[typing.Union[Tag, str]]] = None,
+    rule_packs: typing.Iterable[str] = (),
+    max_findings: typing.Optional[int] = None,
+    parse_cache: typing.Optional[str] = None,
+) -> typing.Iterator[LintResult]:
+    """Lint many configurations, yielding their results as they are done.
+
+    The items are consumed lazily, at most a few per worker are held in
+    memory at any time.
+
+    :param items: Tuples of an identifier, the configuration and its NOS (a
+        NOS or its value, detected if None).
+    :param jobs: The number of worker processes, None for one per CPU. With a
+        single job the configurations are checked in this process and the
+        results are in the order of the items, otherwise they are in the order
+        in which they are done.
+    :param select: Names of the checks to run, overrides the exclusions.
+    :param exclude: Names of the checks not to run.
+    :param exclude_tags: Tags (or their values) of the checks not to run.
+    :param rule_packs: Paths of rule packs whose rules are checked in addition
+        to the built-in checks, see :meth:`Checker.load_rule_pack`.
+    :param max_findings: Stop checking a configuration once this many checks
+        failed, see :meth:`Checker.run_checks`. Pending configurations are
+        cancelled when the caller stops consuming the results.
+    :param parse_cache: Directory to keep the parse trees of the configurations
+        in across runs, see :mod:`netlint.checks.snapshots`.
+    :return: The results of the configurations.
+    :raise ValueError: If a rule pack is invalid.
+    """
+    selection: Selection = (
+        frozenset(select) if select else None,
+        frozenset(exclude) if exclude else None,
+        (
+            frozenset(tag if isinstance(tag, Tag) else Tag(tag) for tag in exclude_tags)
+            if exclude_tags
+            else None
+        ),
+    )
+    rule_packs = tuple(rule_packs)
+    # Fail early on invalid rule packs rather than in every worker.
+    _get_checker(selection, rule_packs)
+    jobs = jobs or os.cpu_count() or 1
+    if jobs == 1:
+        for item in items:
+            yield _lint(selection, rule_packs, max_findings, parse_cache, item)
+        return
+
+    iterator = iter(items)
+    with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as executor:
+        pending: typing.Set[concurrent.futures.Future] = set()
+        exhausted = False
+        try:
+            while pending or not exhausted:
+                while not exhausted and len(pending) < READ_AHEAD * jobs:
+                    try:
+                        item = next(iterator)
+                    except StopIteration:
+                        exhausted = True
+                    else:
+                        pending.add(
+                            executor.submit(
+                                _lint,
+                                selection,
+                                rule_packs,
+                                max_findings,
+                                parse_cache,
+                                item,
+                            )
+                        )
+                done, pending = concurrent.futures.wait(
+                    pending, return_when=concurrent.futures.FIRST_COMPLETED
+                )
+                for future in done:
+                    yield future.result()
+        finally:
+            # Don't start the configurations still queued if the caller stopped
+            # early, only those already running are waited for.
+            for future in pending:
+                future.cancel()
@@ -18,6 +18,15 @@ this_dir = Path(__file__).parent
 
 templates = Jinja2Templates(directory=str(this_dir / "templates"))
 
+# Shared by all requests, runs the checks in its thread pool.
+checker = Checker()
+
+
+@app.on_event("shutdown")
+def shutdown() -> None:
+    """Shut down the thread pool of the checker."""
+    checker.close()
+
 
 class Configuration(BaseModel):
     """The model with which the frontend posts the configuration."""
@@ -42,7 +51,6 @@ async def root(request: Request) -> Response:
 @app.post("/check")
 async def check(configuration: Configuration) -> typing.Dict:
     """Run checks on POSTed configurations."""
-    checker = Checker()
     nos = NOS.from_napalm(configuration.nos)
-    results = checker.run_checks(configuration.configuration.splitlines(), nos)
+    results = await checker.arun(configuration.configuration.splitlines(), nos)
     return {key: value._asdict() for key, value in results.items() if value is not None}
@@ -1,10 +1,30 @@
+import asyncio
+import concurrent.futures
+import multiprocessing
 import typing
 from pathlib import Path
+from unittest.mock import patch
 
 import pytest
 
-from netlint.checks.checker import Checker, Check
-from netlint.checks.utils import NOS
+import netlint.checks.checker as checker_module
+from netlint.checks.checker import Checker, Check, find_triggers
+from netlint.checks.constants import bogus_as_numbers
+from netlint.checks.facts import Credential, credentials
+from netlint.checks.patterns import PATTERN_CACHE_SIZE, pattern
+from netlint.checks.ranges import RangeSet
+from netlint.checks.snapshots import snapshot_store
+from netlint.checks.types import CheckResult
+from netlint.checks.utils import (
+    NOS,
+    PARSE_CACHE_SIZE,
+    RestoredConfParse,
+    Tag,
+    parse,
+    prune_blocks,
+)
+from netlint.lines import LineTable, content_digest
+from netlint.lint import CHECKER_CACHE_SIZE, _get_checker, lint_many
 
 CONFIG_DIR = Path(__file__).parent / "configurations"
 
@@ -76,10 +96,541 @@ def test_basic(state: str, check_tuple: typing.List[typing.Tuple[NOS, Check]]):
         # The checker is ran right here (through the __call__ function of the
         # Checker instance)
         with open(configuration_file) as f:
-            result = check_instance(f.readlines())
+            configuration = f.readlines()
+        result = check_instance(configuration)
         if state == "good":
             assert result is None, f"Failed for {configuration_file.name}"
         elif state == "faulty":
             assert result is not None, f"Failed for {configuration_file.name}"
+            if check_instance.triggers is not None:
+                # The check must not be skipped by the trigger prefilter.
+                assert find_triggers(
+                    "".join(configuration), check_instance.triggers
+                ), f"No trigger in {configuration_file.name}"
 
         index += 1
+
+
+def test_facts_shared_between_checks(monkeypatch):
+    """Facts are computed once per configuration and only if a check needs them."""
+    monkeypatch.setattr(Checker, "facts", dict(Checker.facts))
+    calls = []
+
+    @Checker.register_fact("test_hostnames")
+    def hostnames(config):
+        calls.append(config)
+        return config.find_lines("^hostname")
+
+    def has_hostname(config, test_hostnames):
+        return None if test_hostnames else CheckResult(text="No hostname.", lines=[])
+
+    def without_facts(config):
+        return None
+
+    checker = Checker()
+    checker.checks = {
+        NOS.CISCO_IOS: [
+            Check(
+                has_hostname, [NOS.CISCO_IOS], "TEST1", set(), facts={"test_hostnames"}
+            ),
+            Check(
+                has_hostname, [NOS.CISCO_IOS], "TEST2", set(), facts={"test_hostnames"}
+            ),
+            Check(without_facts, [NOS.CISCO_IOS], "TEST3", set()),
+        ]
+    }
+    result = checker.run_checks(["hostname router\n"], NOS.CISCO_IOS)
+    assert result == {"TEST1": None, "TEST2": None, "TEST3": None}
+    assert len(calls) == 1
+
+    checker.checks[NOS.CISCO_IOS] = checker.checks[NOS.CISCO_IOS][2:]
+    checker.run_checks(["hostname router\n"], NOS.CISCO_IOS)
+    assert len(calls) == 1
+
+    with pytest.raises(ValueError):
+        Checker.register(
+            apply_to=[NOS.CISCO_IOS], name="TEST4", tags=set(), facts={"unknown"}
+        )
+
+
+def test_credentials():
+    """Every password and secret is classified in a single pass."""
+    config = parse(
+        "\n".join(
+            [
+                "service password-encryption",
+                "enable secret 5 $1$abc",
+                "username admin password 7 0822455D0A16",
+                "username guest password 0 guest",
+                "username oper secret $9$abc",
+                "line vty 0 4",
+                " password cisco",
+                "snmp-server user monitor group v3 password secret",
+            ]
+        )
+    )
+    found = credentials.fact_function(config)
+    assert found == [
+        Credential("enable secret 5 $1$abc", "enable", "secret", 5),
+        Credential("username admin password 7 0822455D0A16", "user", "password", 7),
+        Credential("username guest password 0 guest", "user", "password", 0),
+        Credential("username oper secret $9$abc", "user", "secret", None),
+        Credential(" password cisco", "line", "password", None),
+        Credential(
+            "snmp-server user monitor group v3 password secret",
+            "snmp",
+            "password",
+            None,
+        ),
+    ]
+    assert [credential.plaintext for credential in found] == [
+        False,
+        False,
+        True,
+        False,
+        True,
+        True,
+    ]
+
+
+def test_plaintext_passwords():
+    """IOS101 only reports the user lines with plaintext passwords."""
+    configuration = [
+        "username admin password 7 0822455D0A16\n",
+        "username guest password 0 guest\n",
+        "username oper secret 9 $9$abc\n",
+        "username test password plain\n",
+    ]
+    result = Checker().run_checks(configuration, NOS.CISCO_IOS)["IOS101"]
+    assert result.lines == [
+        "username guest password 0 guest",
+        "username test password plain",
+    ]
+    hashed = [configuration[0], configuration[2]]
+    assert Checker().run_checks(hashed, NOS.CISCO_IOS)["IOS101"] is None
+
+
+def test_triggers_skip_checks():
+    """Checks whose triggers don't occur in the configuration aren't run."""
+    calls = []
+
+    def failing(config):
+        calls.append(config)
+        return CheckResult(text="Failed.", lines=[])
+
+    checker = Checker()
+    checker.checks = {
+        NOS.CISCO_IOS: [
+            Check(failing, [NOS.CISCO_IOS], "TEST1", set(), triggers={"router bgp"}),
+            Check(failing, [NOS.CISCO_IOS], "TEST2", set(), triggers={"hostname"}),
+            Check(failing, [NOS.CISCO_IOS], "TEST3", set()),
+        ]
+    }
+    result = checker.run_checks(["hostname router\n"], NOS.CISCO_IOS)
+    assert result["TEST1"] is None
+    assert result["TEST2"] is not None
+    assert result["TEST3"] is not None
+    assert len(calls) == 2
+
+    # Overlapping, nested and repeated triggers are all found.
+    text = "ip ssh version 2\nip ssh\nsnmp-server\n"
+    triggers = {"ip ssh", "ssh version", "ssh", "server", "bgp", "ip"}
+    assert find_triggers(text, triggers) == {t for t in triggers if t in text}
+    # The pattern of a set of triggers is only built once.
+    misses = pattern.cache_info().misses
+    assert find_triggers(text, triggers) == {t for t in triggers if t in text}
+    assert find_triggers(text, {"snmp", "snmp-server"}) == {"snmp", "snmp-server"}
+    assert find_triggers(text, {"snmp", "snmp-server"}) == {"snmp", "snmp-server"}
+    assert pattern.cache_info().misses == misses + 1
+
+
+def test_stanza_cache():
+    """Stanza-local checks give the same results when memoized per stanza."""
+    checker = Checker()
+    for nos, check_list in Checker.checks.items():
+        for check in check_list:
+            if not check.stanza_local:
+                continue
+            checker.checks = {nos: [check]}
+            for path in sorted(CONFIG_DIR.glob("**/*.conf")):
+                configuration = path.read_text().splitlines(keepends=True)
+                expected = check(configuration)
+                for _ in range(2):
+                    result = checker.run_checks(configuration, nos)[check.name]
+                    if expected is None:
+                        assert result is None, (check.name, path)
+                    else:
+                        assert result is not None, (check.name, path)
+                        assert result.text == expected.text
+                        assert result.lines == expected.lines
+    # Checking every configuration a second time only hit the cache.
+    assert checker.stanza_cache.hits >= checker.stanza_cache.misses > 0
+
+
+@pytest.mark.skipif(
+    "fork" not in multiprocessing.get_all_start_methods(), reason="Needs fork."
+)
+def test_run_checks_in_processes(monkeypatch):
+    """Checks split over processes give the same results in the same order."""
+    monkeypatch.setattr(checker_module, "PARALLEL_MIN_LINES", 0)
+    for path in sorted(CONFIG_DIR.glob("**/*.conf")):
+        configuration = path.read_text().splitlines(keepends=True)
+        for nos in NOS:
+            expected = Checker().run_checks(configuration, nos)
+            results = Checker().run_checks(configuration, nos, jobs=3)
+            assert list(results.items()) == list(expected.items()), path
+
+    # Configurations without stanzas, e.g. only pruned lines
+    assert not any(Checker().run_checks(["\n"] * 5, NOS.CISCO_IOS, jobs=3).values())
+
+    # Configurations checked by several threads at the same time
+    checker = Checker()
+    paths = sorted(CONFIG_DIR.glob("cisco_ios/*.conf"))
+    configurations = [path.read_text().splitlines(keepends=True) for path in paths]
+    expected = [checker.run_checks(lines, NOS.CISCO_IOS) for lines in configurations]
+    with concurrent.futures.ThreadPoolExecutor(4) as executor:
+        results = list(
+            executor.map(
+                lambda lines: checker.run_checks(lines, NOS.CISCO_IOS, jobs=2),
+                configurations,
+            )
+        )
+    assert results == expected
+
+    # Checks run in this process where processes can't be forked.
+    monkeypatch.setattr(checker_module.sys, "platform", "darwin")
+    with patch.object(multiprocessing.context.BaseContext, "Pool") as pool:
+        results = checker.run_checks(configurations[0], NOS.CISCO_IOS, jobs=2)
+    assert results == expected[0]
+    assert not pool.called
+    assert checker_module.fork_context() is None
+
+
+def test_max_findings():
+    """Checks stop after enough failures, security checks first."""
+    checker = Checker()
+    configuration = (CONFIG_DIR / "cisco_ios" / "faulty.conf").read_text()
+    lines = configuration.splitlines(keepends=True)
+    results = checker.run_checks(lines, NOS.CISCO_IOS, max_findings=1)
+    failed = [name for name, result in results.items() if result]
+    assert len(failed) == 1
+    checks = {check.name: check for check in checker.checks[NOS.CISCO_IOS]}
+    assert Tag.SECURITY in checks[failed[0]].tags
+
+    results = checker.run_checks(lines, NOS.CISCO_IOS, max_findings=1000)
+    expected = checker.run_checks(lines, NOS.CISCO_IOS)
+    assert results == expected
+
+
+def test_prune_blocks():
+    """Bodies of bulky blocks are blanked unless a check looks into them."""
+    configuration = [
+        "banner motd ^C\n",
+        "Welcome\n",
+        "^C\n",
+        "crypto pki certificate chain TP-self-signed\n",
+        " certificate self-signed 01\n",
+        "  3082022B 30820194\n",
+        "  \tquit\n",
+        "banner login ^CAuthorized access only^C\n",
+        "interface GigabitEthernet0/1\n",
+        " no shutdown\n",
+    ]
+    pruned = prune_blocks(configuration, NOS.CISCO_IOS)
+    assert len(pruned) == len(configuration)
+    assert [index for index, line in enumerate(pruned) if not line] == [1, 2, 4, 5, 6]
+    assert prune_blocks(configuration, NOS.CISCO_IOS, {"banner"})[1] == "Welcome\n"
+    assert prune_blocks(configuration, NOS.CISCO_NXOS)[4] == configuration[4]
+
+    seen = {}
+
+    def check(config):
+        seen[len(seen)] = "".join(config)
+        return None
+
+    checker = Checker()
+    checker.checks = {
+        NOS.CISCO_IOS: [
+            Check(check, [NOS.CISCO_IOS], "TEST1", set()),
+            Check(check, [NOS.CISCO_IOS], "TEST2", set(), blocks={"banner"}),
+        ]
+    }
+    checker.run_checks(configuration, NOS.CISCO_IOS)
+    # Only the check looking into banners sees them.
+    assert "Welcome" not in seen[0] and "Welcome" in seen[1]
+    assert "3082022B" not in seen[0] and "3082022B" not in seen[1]
+
+
+def test_line_table():
+    """Identical lines of different configurations share one string object."""
+    table = LineTable(max_size=3)
+    first = table.intern(["hostname a\n", " no shutdown\n", "!\n"])
+    second = table.intern(
+        ["hostname b\n", "".join([" no ", "shutdown\n"]), "".join(["!", "\n"])]
+    )
+    assert first[1] is second[1] and first[2] is second[2]
+    assert table.lines == 6 and table.distinct == 3
+    assert table.saved_bytes > 0
+    # Full tables still share the lines they know.
+    third = table.intern(["hostname c\n", "!\n"])
+    assert third[1] is first[2] and table.distinct == 3
+
+    config = parse("interface Gi0/1\n no shutdown")
+    other = parse("interface Gi0/2\n no shutdown")
+    assert config.objs[1].text is other.objs[1].text
+
+
+def test_pattern_registry():
+    """Compiled patterns are shared, but only the most recent ones kept."""
+    assert pattern("^router bgp") is pattern("^router bgp")
+    for index in range(PATTERN_CACHE_SIZE + 1):
+        pattern(f"^router bgp {index}$")
+    assert pattern.cache_info().currsize == PATTERN_CACHE_SIZE
+
+
+def test_content_digest():
+    """Only volatile header and comment lines don't change the digest."""
+    configuration = ["Building configuration...\n", "hostname router\n"]
+    digest = content_digest(configuration, "cisco_ios")
+    fetched = [
+        "Building configuration...\n",
+        "Current configuration : 1234 bytes\n",
+        "! Last configuration change at 10:00:00 UTC Mon Jan 1 2024\n",
+        "hostname router\n",
+    ]
+    assert content_digest(fetched, "cisco_ios") == digest
+    changed = configuration + ["ntp clock-period 17179\n"]
+    assert content_digest(changed, "cisco_ios") != digest
+
+
+def test_parse_cache():
+    """Parsed configurations are reused, but only the most recent ones kept."""
+    assert parse("hostname a") is parse("hostname a")
+    for index in range(PARSE_CACHE_SIZE + 1):
+        parse(f"hostname router{index}")
+    assert parse.cache_info().currsize == PARSE_CACHE_SIZE
+
+
+def test_parse_snapshots(monkeypatch, tmpdir: Path):
+    """Parse trees restored from snapshots answer queries like parsed ones."""
+    monkeypatch.setattr(snapshot_store, "path", str(tmpdir))
+    for path in sorted(CONFIG_DIR.glob("**/*.conf")):
+        configuration = path.read_text()
+        parse.cache_clear()
+        parsed = parse(configuration)
+        parse.cache_clear()
+        restored = parse(configuration)
+        assert isinstance(restored, RestoredConfParse), path
+        assert restored.ioscfg == parsed.ioscfg
+        assert restored.find_all_children(".") == parsed.find_all_children(".")
+        assert [
+            (obj.linenum, obj.parent.linenum, obj.indent, obj.is_comment)
+            for obj in restored.objs
+        ] == [
+            (obj.linenum, obj.parent.linenum, obj.indent, obj.is_comment)
+            for obj in parsed.objs
+        ]
+
+    # The checks give the same results on restored parse trees.
+    lines = (CONFIG_DIR / "cisco_ios" / "faulty.conf").read_text().splitlines(True)
+    checker = Checker()
+    hits = snapshot_store.hits
+    for _ in range(2):
+        parse.cache_clear()
+        results = checker.run_checks(lines, NOS.CISCO_IOS)
+    assert snapshot_store.hits > hits
+    monkeypatch.setattr(snapshot_store, "path", None)
+    parse.cache_clear()
+    assert results == checker.run_checks(lines, NOS.CISCO_IOS)
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_lint_many(jobs: int):
+    """Test linting configurations in bulk, in-process and in worker processes."""
+    items = [
+        (index, "ip http server\n" if index % 2 else ["hostname router\n"], None)
+        for index in range(6)
+    ]
+    items.append(("nxos", "feature telnet\n", NOS.CISCO_NXOS))
+    results = {
+        result.id: result
+        for result in lint_many(items, jobs=jobs, exclude_tags=["opinionated"])
+    }
+    assert sorted(results, key=str) == sorted([*range(6), "nxos"], key=str)
+    assert results["nxos"].nos == NOS.CISCO_NXOS
+    assert results[1].nos == NOS.CISCO_IOS
+    # Opinionated checks like IOS102 and NXOS101 are excluded.
+    assert all(not result.failed for result in results.values())
+    assert "IOS102" not in results[1].results
+
+    results = list(lint_many(items, jobs=jobs, select=["IOS102"]))
+    assert sum(bool(result.failed) for result in results) == 3
+
+
+def test_lint_many_checkers():
+    """Only the checkers of the most recently used selections are kept."""
+    items = [("router", "ip http server\n", None)]
+    for index in range(CHECKER_CACHE_SIZE + 1):
+        (result,) = lint_many(items, select=["IOS102", f"TEST{index}"])
+        assert result.failed
+    assert _get_checker.cache_info().currsize == CHECKER_CACHE_SIZE
+
+
+def test_lint_many_parse_cache(tmpdir: Path):
+    """Parse trees are only kept in the directory passed for the call."""
+    parse.cache_clear()
+    items = [("router", (CONFIG_DIR / "cisco_ios" / "faulty.conf").read_text(), None)]
+    list(lint_many(items, parse_cache=str(tmpdir)))
+    assert list(Path(tmpdir).glob("*.snapshot"))
+    assert snapshot_store.path is None
+
+
+def test_arun_many():
+    """Test the asynchronous API, including backpressure and cancellation."""
+    configurations = [
+        (index, ["ip http server\n"] if index % 2 else ["hostname router\n"], None)
+        for index in range(10)
+    ]
+    consumed = []
+
+    async def items():
+        for item in configurations:
+            consumed.append(item[0])
+            yield item
+
+    async def main():
+        checker = Checker()
+        try:
+            results = await checker.arun(["ip http server\n"], NOS.CISCO_IOS)
+            assert results["IOS102"] is not None
+
+            results = [result async for result in checker.arun_many(items(), limit=2)]
+            assert sorted(result.id for result in results) == list(range(10))
+            assert sum(bool(result.failed) for result in results) == 5
+
+            # Stopping early doesn't consume (much) more than the limit.
+            consumed.clear()
+            iterator = checker.arun_many(items(), limit=2)
+            await iterator.__anext__()
+            await iterator.aclose()
+            assert len(consumed) <= 3
+        finally:
+            checker.close()
+
+    loop = asyncio.new_event_loop()
+    try:
+        loop.run_until_complete(main())
+    finally:
+        loop.close()
+
+
+def test_range_set():
+    """Test membership in sets of integer ranges."""
+    ranges = RangeSet([(10, 20), 5, (21, 25), (100, 200), (150, 160)])
+    assert list(ranges) == [(5, 5), (10, 25), (100, 200)]
+    assert 5 in ranges and 25 in ranges and 150 in ranges
+    assert 4 not in ranges and 26 not in ranges and 201 not in ranges
+    assert "5" not in ranges
+    assert list(RangeSet.parse("1-10, 20,11")) == [(1, 11), (20, 20)]
+    assert 64500 in bogus_as_numbers
+    assert 65000 not in bogus_as_numbers
+
+
+RULE_PACK = r"""
+[[rule]]
+name = "SITE101"
+text = "No NTP server configured."
+must_exist = "^ntp server"
+nos = ["cisco_ios"]
+tags = ["hygiene"]
+
+[[rule]]
+name = "SITE102"
+text = "Interfaces without description."
+parent = "^interface"
+must_exist = "^\\s+description"
+
+[[rule]]
+name = "SITE103"
+text = "Telnet allowed."
+parent = "^line vty"
+must_not_exist = "^\\s+transport input .*telnet"
+
+[[rule]]
+name = "SITE104"
+text = "Default community."
+must_not_exist = "community (public|private)"
+
+[[rule]]
+name = "SITE105"
+text = "Banner welcomes visitors."
+must_not_exist = "(?i)welcome"
+blocks = ["banner"]
+"""
+
+
+def test_rule_pack(tmpdir: Path):
+    """All rules of a rule pack are matched and checked like built-in checks."""
+    rule_pack = Path(tmpdir) / "site.toml"
+    rule_pack.write_text(RULE_PACK)
+    checker = Checker()
+    checker.load_rule_pack(str(rule_pack))
+
+    configuration = [
+        "hostname router\n",
+        "interface GigabitEthernet0/1\n",
+        " description uplink\n",
+        "interface GigabitEthernet0/2\n",
+        " shutdown\n",
+        "line vty 0 4\n",
+        " transport input ssh telnet\n",
+        "snmp-server community public RO\n",
+        "banner motd ^C\n",
+        "Welcome!\n",
+        "No community private here\n",
+        "^C\n",
+    ]
+    results = checker.run_checks(configuration, NOS.CISCO_IOS)
+    assert results["SITE101"] == CheckResult("No NTP server configured.", [])
+    assert results["SITE102"].lines == ["interface GigabitEthernet0/2"]
+    assert results["SITE103"].lines == [" transport input ssh telnet"]
+    # Rules without blocks don't see the banner, even if another rule does.
+    assert results["SITE104"].lines == ["snmp-server community public RO"]
+    assert results["SITE105"].lines == ["Welcome!"]
+
+    fixed = [
+        "ntp server 10.0.0.1\n",
+        "interface GigabitEthernet0/1\n",
+        " description uplink\n",
+        "line vty 0 4\n",
+        " transport input ssh\n",
+    ]
+    assert not any(checker.run_checks(fixed, NOS.CISCO_IOS).values())
+    assert "SITE101" not in checker.run_checks(fixed, NOS.CISCO_NXOS)
+
+    with pytest.raises(ValueError):
+        checker.load_rule_pack(str(rule_pack))
+    rule_pack.write_text('[[rule]]\nname = "SITE201"\ntext = "Invalid."\n')
+    with pytest.raises(ValueError):
+        Checker().load_rule_pack(str(rule_pack))
+    rule_pack.write_text(RULE_PACK.replace('["banner"]', '["motd"]'))
+    with pytest.raises(ValueError):
+        Checker().load_rule_pack(str(rule_pack))
+
+
+def test_rule_pack_reload(tmpdir: Path):
+    """Loading an edited rule pack doesn't affect checkers with the old one."""
+    rule_pack = Path(tmpdir) / "site.toml"
+    rule_pack.write_text(RULE_PACK)
+    old_checker = Checker()
+    old_checker.load_rule_pack(str(rule_pack))
+    rule_pack.write_text(RULE_PACK.replace("SITE101", "SITE201"))
+    new_checker = Checker()
+    new_checker.load_rule_pack(str(rule_pack))
+
+    configuration = ["hostname router\n"]
+    old_results = old_checker.run_checks(configuration, NOS.CISCO_IOS)
+    new_results = new_checker.run_checks(configuration, NOS.CISCO_IOS)
+    assert old_results["SITE101"] == new_results["SITE201"]
+    assert "SITE201" not in old_results
+    assert not any(name.startswith("rule_pack:") for name in Checker.facts)
@@ -1,17 +1,42 @@
 import csv
+import functools
+import gzip
 import json
+import subprocess
+import sys
+import tarfile
+import tempfile
+import time
+import typing
+import zipfile
 from pathlib import Path
+from unittest.mock import MagicMock, patch
 
+import click
 import pytest
 from click.testing import CliRunner
 
-from netlint.cli.main import cli
+from netlint.checks.checker import Checker
+from netlint.checks.snapshots import snapshot_store
+from netlint.checks.utils import NOS, classify_nos, detect_nos, parse
+from netlint.cli.discovery import FileFilter
+from netlint.cli.git import parse_git_input
+from netlint.lines import content_digest
+from netlint.cli.checkpoint import Checkpoint
+from netlint.cli.main import (
+    NOS_VALUES,
+    check_config,
+    check_sources,
+    cli,
+    read_configuration,
+)
+from netlint.cli.watch import Watcher
 
 TESTS_DIR = Path(__file__).parent
 
 
 @pytest.mark.parametrize("plain", [True, False])
-@pytest.mark.parametrize("format_", ["normal", "json", "csv"])
+@pytest.mark.parametrize("format_", ["normal", "json", "csv", "sarif"])
 def test_lint_basic(plain: bool, format_: str):
     """Basic test for CLI linting functionality."""
     runner = CliRunner()
@@ -35,7 +60,7 @@ def test_lint_basic(plain: bool, format_: str):
     if plain:
         assert "\x1b" not in result.output
 
-    if format_ == "json":
+    if format_ in ["json", "sarif"]:
         result = json.loads(result.output)
         assert result
     elif format_ == "csv":
@@ -108,3 +133,608 @@ def test_select_exclude(tmpdir: Path):
     result = runner.invoke(cli, commands)
 
     assert not result.exception
+
+
+def test_sarif_locations(tmpdir: Path):
+    """Test that SARIF output contains rule descriptors and line regions."""
+    runner = CliRunner()
+
+    with open(tmpdir / "test.conf", "w") as f:
+        f.write("hostname test\n!\nip http server\nip http secure-server\n")
+    with open(tmpdir / "clean.conf", "w") as f:
+        f.write("hostname clean\n")
+
+    result = runner.invoke(
+        cli, ["-i", str(tmpdir), "--format", "sarif", "--select", "IOS102"]
+    )
+    assert result.exit_code != 0
+
+    sarif = json.loads(result.output)
+    run = sarif["runs"][0]
+    rules = run["tool"]["driver"]["rules"]
+    assert [rule["id"] for rule in rules] == ["IOS102"]
+    assert rules[0]["name"] == "check_ip_http_server"
+
+    # Only failed checks are reported, with the flagged lines as locations.
+    assert len(run["results"]) == 1
+    result = run["results"][0]
+    assert result["ruleId"] == "IOS102"
+    assert result["locations"][0]["physicalLocation"]["region"]["startLine"] == 3
+    related = result["relatedLocations"][0]["physicalLocation"]
+    assert related["artifactLocation"]["uri"].endswith("test.conf")
+    assert related["region"]["startLine"] == 4
+
+    # Child lines repeated in several blocks are located below their parents.
+    interfaces = [
+        f"interface GigabitEthernet0/{number}\n"
+        + (" switchport mode trunk\n" if number in [3, 5] else "")
+        + " switchport access vlan 10\n!\n"
+        for number in range(1, 6)
+    ]
+    with open(tmpdir / "trunks.conf", "w") as f:
+        f.write("".join(interfaces))
+    result = runner.invoke(
+        cli,
+        ["-i", str(tmpdir / "trunks.conf"), "--format", "sarif", "--select", "IOS105"],
+    )
+    result = json.loads(result.output)["runs"][0]["results"][0]
+    locations = result["locations"] + result["relatedLocations"]
+    assert [
+        location["physicalLocation"]["region"]["startLine"] for location in locations
+    ] == [7, 9, 14, 16]
+
+
+def test_watcher(tmpdir: Path):
+    """Test that the watcher only reports changed findings."""
+    checker = Checker()
+    checked = []
+
+    def check(configuration):
+        checked.append(configuration)
+        return check_config(checker, configuration, detect_nos(configuration))
+
+    config_file = Path(tmpdir) / "test.conf"
+    config_file.write_text("ip http server\n")
+    watcher = Watcher(Path(tmpdir), FileFilter(), check)
+
+    diffs = watcher.poll()
+    assert len(diffs) == 1
+    assert [finding[0] for finding in diffs[0].new] == ["IOS102"]
+    assert not diffs[0].fixed
+
+    # Nothing changed, so nothing is checked again.
+    assert watcher.poll() == []
+    assert len(checked) == 1
+
+    config_file.write_text("username test password ing\n")
+    diffs = watcher.poll()
+    assert [finding[0] for finding in diffs[0].new] == ["IOS101"]
+    assert [finding[0] for finding in diffs[0].fixed] == ["IOS102"]
+
+    config_file.unlink()
+    diffs = watcher.poll()
+    assert [finding[0] for finding in diffs[0].fixed] == ["IOS101"]
+
+    # Files that aren't valid UTF-8 are still checked.
+    config_file.write_bytes(b"hostname r\xe9\nip http server\n")
+    diffs = watcher.poll()
+    assert [finding[0] for finding in diffs[0].new] == ["IOS102"]
+
+
+def test_daemon(monkeypatch):
+    """Test that checking through the daemon gives the same output."""
+    runner = CliRunner()
+    cisco_ios_faulty_conf = TESTS_DIR / "configurations" / "cisco_ios" / "faulty.conf"
+
+    # Retrieving configurations off of devices with get, through a fake driver.
+    running = cisco_ios_faulty_conf.read_text()
+    connection = MagicMock()
+    connection.__enter__.return_value.get_config.return_value = {"running": running}
+    napalm = MagicMock()
+    napalm.get_network_driver.return_value.return_value = connection
+    monkeypatch.setitem(sys.modules, "napalm", napalm)
+
+    with tempfile.TemporaryDirectory() as directory:
+        # Unix socket paths are rather limited in length, thus not using tmpdir.
+        socket_path = Path(directory) / "netlint.sock"
+        daemon = subprocess.Popen(
+            [sys.executable, "-m", "netlint", "serve", "--socket", str(socket_path)],
+            stdout=subprocess.DEVNULL,
+        )
+        try:
+            for _ in range(100):
+                if socket_path.exists():
+                    break
+                time.sleep(0.1)
+
+            for format_ in ["normal", "json", "csv", "sarif"]:
+                commands = ["-i", str(cisco_ios_faulty_conf), "--format", format_]
+                expected = runner.invoke(cli, commands)
+                result = runner.invoke(cli, ["--daemon", str(socket_path)] + commands)
+                assert result.output == expected.output
+                assert result.exit_code == expected.exit_code != 0
+
+            commands = ["--format", "json", "get", "-d", "ios", "-u", "u", "-p", "p"]
+            expected = runner.invoke(cli, commands + ["router"])
+            result = runner.invoke(
+                cli, ["--daemon", str(socket_path)] + commands + ["router"]
+            )
+            assert result.exit_code == expected.exit_code == 0
+            assert json.loads(result.output) == json.loads(expected.output)
+            assert json.loads(result.output)["IOS101"]
+
+            result = runner.invoke(
+                cli,
+                ["--daemon", str(socket_path), "-i", str(cisco_ios_faulty_conf)]
+                + ["--select", "IOS102"],
+            )
+            assert "IOS102" in result.output
+            assert "IOS101" not in result.output
+        finally:
+            daemon.terminate()
+            daemon.wait()
+        assert not socket_path.exists()
+
+
+def test_diff(tmpdir: Path):
+    """Test that diff only re-runs checks for changed scopes."""
+    runner = CliRunner()
+
+    old_file = tmpdir / "old.conf"
+    new_file = tmpdir / "new.conf"
+    results_file = tmpdir / "results.json"
+    with open(old_file, "w") as f:
+        f.write("username test password ing\n!\nline con 0\n!\n")
+    with open(new_file, "w") as f:
+        f.write("username test password ing\n!\nline con 0\n login\n password secret\n")
+
+    result = runner.invoke(
+        cli,
+        ["-i", str(new_file), "--format", "json", "diff", "--old", str(old_file)]
+        + ["--save", str(results_file)],
+    )
+    assert result.exit_code == 0, result.output
+    output = json.loads(result.output)
+    assert [finding[0] for finding in output["fixed"]] == ["IOS103"]
+    assert [finding[0] for finding in output["unchanged"]] == ["IOS101"]
+    assert not output["new"]
+    # Only the checks looking at lines (and those without a scope) ran again.
+    assert "IOS103" in output["rerun"]
+    assert "IOS101" not in output["rerun"]
+    assert "IOS105" not in output["rerun"]
+
+    # Reusing the saved results when nothing changed
+    result = runner.invoke(
+        cli,
+        ["-i", str(new_file), "--format", "json", "diff", "--old", str(new_file)]
+        + ["--previous", str(results_file)],
+    )
+    output = json.loads(result.output)
+    assert "IOS103" not in output["rerun"]
+    assert [finding[0] for finding in output["unchanged"]] == ["IOS101"]
+
+    # Previous results of another selection of checks
+    runner.invoke(
+        cli,
+        ["-i", str(old_file), "--select", "IOS102", "--format", "json"]
+        + ["--output", str(results_file)],
+    )
+    result = runner.invoke(
+        cli,
+        ["-i", str(new_file), "--format", "json", "diff", "--old", str(old_file)]
+        + ["--previous", str(results_file)],
+    )
+    assert not isinstance(result.exception, KeyError), result.exception
+    output = json.loads(result.output)
+    assert "IOS101" in output["rerun"]
+    assert [finding[0] for finding in output["new"]] == ["IOS101"]
+
+
+def test_nos_detection(tmpdir: Path):
+    """Test the NOS detection and overriding it with --nos."""
+    ios_configuration = [
+        "version 15.2\n",
+        "hostname router\n",
+        "interface GigabitEthernet0/1\n",
+        " description feature rollout\n",
+    ]
+    detection = classify_nos(ios_configuration)
+    assert detection.nos == NOS.CISCO_IOS
+    assert detection.confidence == 1.0
+    assert classify_nos(["hostname router\n"]).confidence == 0.0
+
+    # Signatures after the detection window are ignored.
+    nxos_configuration = ["hostname switch\n"] * 10 + ["feature telnet\n"]
+    assert classify_nos(nxos_configuration).nos == NOS.CISCO_NXOS
+    assert classify_nos(nxos_configuration, window=10).nos == NOS.CISCO_IOS
+
+    config_file = tmpdir / "test.conf"
+    with open(config_file, "w") as f:
+        f.writelines(nxos_configuration)
+    runner = CliRunner()
+    result = runner.invoke(cli, ["-i", str(config_file), "--format", "json"])
+    assert "NXOS101" in json.loads(result.output)
+    result = runner.invoke(
+        cli, ["-i", str(config_file), "--format", "json", "--nos", "cisco_ios"]
+    )
+    assert "IOS101" in json.loads(result.output)
+    assert "NXOS101" not in json.loads(result.output)
+
+
+def test_nos_values():
+    """The --nos choices have to match the NOSes."""
+    assert NOS_VALUES == [nos.value for nos in NOS]
+
+
+def test_shard_merge(tmpdir: Path):
+    """Test checking a directory in shards and merging the partial results."""
+    config_dir = tmpdir / "configurations"
+    config_dir.mkdir()
+    for index in range(20):
+        with open(config_dir / f"router{index}.conf", "w") as f:
+            f.write("ip http server\n" if index % 2 else "hostname router\n")
+
+    runner = CliRunner()
+    result = runner.invoke(cli, ["-i", str(config_dir), "--format", "json"])
+    expected = json.loads(result.output)
+
+    partials = []
+    for index in range(1, 4):
+        partial = str(tmpdir / f"partial{index}.jsonl")
+        partials.append(partial)
+        commands = ["-i", str(config_dir), "--shard", f"{index}/3"]
+        commands.extend(["--format", "partial", "-o", partial, "--exit-zero"])
+        result = runner.invoke(cli, commands)
+        assert result.exit_code == 0, result.output
+
+    result = runner.invoke(cli, ["--format", "json", "merge", *partials])
+    assert result.exit_code != 0
+    assert json.loads(result.output) == expected
+
+    result = runner.invoke(cli, ["--format", "summary", "merge", *partials])
+    assert "Configurations checked: 20" in result.output
+    assert "Configurations with problems: 10" in result.output
+    assert "IOS102: 10" in result.output
+
+    result = runner.invoke(cli, ["merge", *partials[1:]])
+    assert "[1] are missing" in result.output
+    result = runner.invoke(cli, ["-i", str(config_dir), "--shard", "4/3"])
+    assert result.exit_code == 2
+
+
+def test_checkpoint(tmpdir: Path):
+    """Test that a run with a checkpoint only checks new or changed files."""
+    config_dir = tmpdir / "configurations"
+    config_dir.mkdir()
+    for index in range(3):
+        with open(config_dir / f"router{index}.conf", "w") as f:
+            f.write("hostname router\n")
+    checkpoint = str(tmpdir / "checkpoint.jsonl")
+    commands = ["-i", str(config_dir), "--checkpoint", checkpoint, "--format", "json"]
+
+    runner = CliRunner()
+    result = runner.invoke(cli, commands)
+    assert result.exit_code == 0, result.output
+    with open(checkpoint) as f:
+        assert len(f.readlines()) == 4
+
+    # Simulate a run killed while writing the last line.
+    with open(checkpoint) as f:
+        lines = f.readlines()
+    with open(checkpoint, "w") as f:
+        f.writelines(lines[:-1] + [lines[-1][:10]])
+    with open(config_dir / "router0.conf", "w") as f:
+        f.write("ip http server\n")
+
+    with patch("netlint.cli.main.check_config", wraps=check_config) as check_mock:
+        with patch(
+            "netlint.cli.main.read_configuration", wraps=read_configuration
+        ) as read_mock:
+            result = runner.invoke(cli, commands)
+        assert check_mock.call_count == 2
+        # Every file is only read once, also those that are checked.
+        assert read_mock.call_count == 3
+        assert json.loads(result.output)[str(config_dir / "router0.conf")]["IOS102"]
+        check_mock.reset_mock()
+        runner.invoke(cli, commands)
+        assert check_mock.call_count == 0
+
+        # Lines that change on every fetch don't count as changes.
+        with open(config_dir / "router1.conf", "w") as f:
+            f.write("! Last configuration change at 10:00:00 UTC\nhostname router\n")
+        result = runner.invoke(cli, commands[:-2])
+        assert check_mock.call_count == 0
+        assert "Reused the results of 3 of 3 configurations" in result.stderr
+
+    # Changing the selected checks invalidates the checkpoint.
+    result = runner.invoke(cli, commands + ["--select", "IOS102"])
+    with open(checkpoint) as f:
+        lines = f.readlines()
+    assert len(lines) == 4
+    assert json.loads(lines[0]) == {"checks": ["IOS102"], "nos": None}
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_checkpoint_streaming(tmpdir: Path, jobs: int):
+    """Test that results from a checkpoint are yielded as soon as they are read."""
+    checker = Checker()
+    events = []
+    configurations = {key: [f"hostname {key}\n"] for key in ["a", "b", "c"]}
+
+    def read(key: str) -> typing.List[str]:
+        events.append(("read", key))
+        return configurations[key]
+
+    checkpoint = Checkpoint(str(tmpdir / "checkpoint.jsonl"), {})
+    for key in ["a", "c"]:
+        checkpoint.results[key] = (content_digest(configurations[key], None), {})
+    ctx = click.Context(cli)
+    ctx.obj = {
+        "jobs": jobs,
+        "checker": checker,
+        "check": functools.partial(check_config, checker, nos=None),
+        "nos": None,
+        "format": "json",
+        "quiet": True,
+        "selection": {},
+        "rule_packs": (),
+        "max_findings": None,
+        "parse_cache": None,
+    }
+    sources = ((key, functools.partial(read, key)) for key in configurations)
+    for key, _, _ in check_sources(ctx, sources, checkpoint):
+        events.append(("yield", key))
+
+    if jobs == 1:
+        expected = ["read a", "yield a", "read b", "yield b", "read c", "yield c"]
+    else:
+        # The worker processes are only waited for once enough files are read.
+        expected = ["read a", "yield a", "read b", "read c", "yield c", "yield b"]
+    assert [" ".join(event) for event in events] == expected
+    assert "b" in checkpoint.results
+
+
+def test_parse_cache(tmpdir: Path):
+    """Test that parse trees kept with --parse-cache give the same results."""
+    runner = CliRunner()
+    commands = ["-i", str(TESTS_DIR / "configurations"), "--format", "json"]
+    expected = json.loads(runner.invoke(cli, commands).output)
+    commands += ["--parse-cache", str(tmpdir / "parse")]
+    hits = snapshot_store.hits
+    for _ in range(2):
+        parse.cache_clear()
+        assert json.loads(runner.invoke(cli, commands).output) == expected
+    assert list(Path(tmpdir / "parse").glob("*.snapshot"))
+    assert snapshot_store.hits > hits
+    # The snapshot store is only enabled while the command runs.
+    assert snapshot_store.path is None
+
+
+def test_jobs():
+    """Test that checking a directory in multiple processes gives the same results."""
+    runner = CliRunner()
+    commands = ["-i", str(TESTS_DIR / "configurations"), "--format", "json"]
+    sequential = json.loads(runner.invoke(cli, commands).output)
+    parallel = json.loads(runner.invoke(cli, commands + ["--jobs", "2"]).output)
+    assert parallel == sequential
+
+    # Stanza cache lookups of the workers are counted in the summary, too.
+    commands = ["-i", str(TESTS_DIR / "configurations"), "--glob", "**/*.conf"]
+    for jobs in ("1", "2"):
+        result = runner.invoke(cli, commands + ["--format", "summary", "-j", jobs])
+        assert "Stanza cache hits: " in result.output
+        assert "distinct" in result.output
+
+
+def test_max_findings(tmpdir: Path):
+    """Test that --fail-fast and --max-findings stop checking early."""
+    faulty_conf = TESTS_DIR / "configurations" / "cisco_ios" / "faulty.conf"
+    for index in range(5):
+        Path(tmpdir / f"{index}.conf").write_text(faulty_conf.read_text())
+    runner = CliRunner()
+    commands = ["-i", str(tmpdir), "--format", "json"]
+    for jobs in ("1", "2"):
+        result = runner.invoke(cli, commands + ["--fail-fast", "-j", jobs])
+        assert result.exit_code != 0
+        output = json.loads(result.stdout)
+        assert len(output) == 1
+        findings = [name for value in output.values() for name in value if value[name]]
+        assert len(findings) == 1
+
+    result = runner.invoke(cli, ["-i", str(tmpdir), "--max-findings", "2"])
+    assert "Stopped after 2 findings." in result.stderr
+
+    result = runner.invoke(
+        cli, commands + ["--fail-fast", "--checkpoint", str(tmpdir / "checkpoint")]
+    )
+    assert "can't be combined" in result.stdout
+    assert result.exception
+    for format_ in ("csv", "summary"):
+        result = runner.invoke(
+            cli, ["-i", str(tmpdir), "--format", format_, "--fail-fast"]
+        )
+        assert "can't be combined" in result.stdout
+        assert result.exception
+
+
+def test_rule_pack(tmpdir: Path):
+    """Test that rule packs configured in the config file are checked."""
+    rule_pack = Path(tmpdir) / "site.toml"
+    rule_pack.write_text(
+        '[[rule]]\nname = "SITE101"\ntext = "No NTP server configured."\n'
+        'must_exist = "^ntp server"\n'
+    )
+    config = Path(tmpdir) / "netlint.toml"
+    config.write_text(f"[netlint]\nrule_packs = [{json.dumps(str(rule_pack))}]\n")
+    runner = CliRunner()
+    commands = ["-c", str(config), "-i", str(TESTS_DIR / "configurations")]
+    commands.extend(["--format", "json", "--select", "SITE101"])
+    sequential = json.loads(runner.invoke(cli, commands).output)
+    assert sequential
+    assert all(results["SITE101"] for results in sequential.values())
+    parallel = json.loads(runner.invoke(cli, commands + ["--jobs", "2"]).output)
+    assert parallel == sequential
+
+
+def test_git_input(tmpdir: Path):
+    """Test checking the files of git revisions without a checkout."""
+    work_tree = Path(tmpdir) / "work"
+    work_tree.mkdir()
+
+    def git(*args: str) -> None:
+        subprocess.run(
+            ["git", "-C", str(work_tree), "-c", "user.name=netlint"]
+            + ["-c", "user.email=netlint@example.com", *args],
+            check=True,
+            stdout=subprocess.PIPE,
+        )
+
+    faulty = (TESTS_DIR / "configurations" / "cisco_ios" / "faulty.conf").read_text()
+    good = "hostname router\nno ip http server\n"
+    git("init")
+    (work_tree / "a.conf").write_text(faulty)
+    (work_tree / "b.conf").write_text(good)
+    git("add", ".")
+    git("commit", "-m", "Initial")
+    (work_tree / "b.conf").write_text(good + "username test password plain\n")
+    git("commit", "-a", "-m", "Add user")
+    repository = Path(tmpdir) / "repository.git"
+    subprocess.run(
+        ["git", "clone", "-q", "--bare", str(work_tree), str(repository)], check=True
+    )
+
+    runner = CliRunner()
+    commands = ["--format", "json", "-i"]
+    result = runner.invoke(cli, commands + [f"git+{repository}"])
+    output = json.loads(result.output)
+    assert set(output) == {"a.conf", "b.conf"}
+    assert output["b.conf"]["IOS101"]
+
+    result = runner.invoke(cli, commands + [f"git+{repository}@HEAD~1"])
+    assert not json.loads(result.output)["b.conf"]["IOS101"]
+
+    result = runner.invoke(cli, commands + [f"git+{repository}@HEAD~1..HEAD"])
+    assert list(json.loads(result.output)) == ["b.conf"]
+
+    result = runner.invoke(cli, ["-i", f"git+{repository}@unknown"])
+    assert result.exit_code == 1
+
+    # Revisions containing an @ and submodules, which aren't files
+    result = runner.invoke(cli, commands + [f"git+{work_tree}@HEAD@{{1}}"])
+    assert not json.loads(result.output)["b.conf"]["IOS101"]
+    commit = subprocess.run(
+        ["git", "-C", str(work_tree), "rev-parse", "HEAD"],
+        check=True,
+        stdout=subprocess.PIPE,
+    ).stdout.decode()
+    git("update-index", "--add", "--cacheinfo", f"160000,{commit.strip()},sub.conf")
+    git("commit", "-m", "Add submodule")
+    result = runner.invoke(cli, commands + [f"git+{work_tree}@HEAD~1..HEAD"])
+    assert result.exit_code == 0, result.output
+    assert json.loads(result.output) == {}
+
+
+def test_parse_git_input(tmpdir: Path):
+    """Test splitting git inputs into the repository and revisions."""
+    repository = Path(tmpdir) / "user@host"
+    repository.mkdir()
+    assert parse_git_input("git+repo") == ("repo", "HEAD", None)
+    assert parse_git_input("git+repo@HEAD@{1}") == ("repo", "HEAD@{1}", None)
+    assert parse_git_input(f"git+{repository}@main") == (str(repository), "main", None)
+    assert parse_git_input("git+repo@a..b") == ("repo", "b", "a")
+    with pytest.raises(ValueError):
+        parse_git_input("git+repo@")
+
+
+def test_archive_input(tmpdir: Path):
+    """Test checking the members of archives and gzip-compressed files."""
+    configurations = TESTS_DIR / "configurations"
+    runner = CliRunner()
+    commands = ["--format", "json", "--glob", "**/*.conf", "-i"]
+    expected = {
+        Path(path).relative_to(configurations).as_posix(): results
+        for path, results in json.loads(
+            runner.invoke(cli, commands + [str(configurations)]).output
+        ).items()
+    }
+
+    tarball = Path(tmpdir) / "configurations.tar.gz"
+    with tarfile.open(tarball, "w:gz") as tar:
+        for path in configurations.glob("**/*.conf"):
+            tar.add(path, path.relative_to(configurations).as_posix())
+    zip_file = Path(tmpdir) / "configurations.zip"
+    with zipfile.ZipFile(zip_file, "w") as archive:
+        for path in configurations.glob("**/*.conf"):
+            archive.write(path, path.relative_to(configurations).as_posix())
+    for archive_path in [tarball, zip_file]:
+        output = runner.invoke(cli, commands + [str(archive_path)]).output
+        assert json.loads(output) == expected
+
+    # Resuming reads the unchecked members from the start of the tarball again.
+    checkpoint = Path(tmpdir) / "checkpoint"
+    commands.extend([str(tarball), "--checkpoint", str(checkpoint)])
+    runner.invoke(cli, commands + ["--shard", "1/2"])
+    assert json.loads(runner.invoke(cli, commands).output) == expected
+
+    faulty = configurations / "cisco_ios" / "faulty.conf"
+    compressed = Path(tmpdir) / "faulty.conf.gz"
+    compressed.write_bytes(gzip.compress(faulty.read_bytes()))
+    output = runner.invoke(cli, ["--format", "json", "-i", str(compressed)]).output
+    assert json.loads(output) == expected["cisco_ios/faulty.conf"]
+
+
+def test_discovery(tmpdir: Path):
+    """Test finding the files to check in a directory tree."""
+    root = Path(tmpdir)
+    configuration = (
+        TESTS_DIR / "configurations" / "cisco_ios" / "good.conf"
+    ).read_text()
+    for path in [
+        "top.conf",
+        "site1/router.conf",
+        "site1/switch.cfg",
+        "site1/vendor/junk.conf",
+        "site2/core/router.conf",
+        "site2/core/router.conf.bak",
+        "site2/old.conf",
+    ]:
+        (root / path).parent.mkdir(parents=True, exist_ok=True)
+        (root / path).write_text(configuration)
+    (root / "site2" / "huge.conf").write_text(configuration * 100)
+    (root / ".netlintignore").write_text("# Vendor files\nvendor/\n")
+
+    def discover(*options: str) -> typing.Set[str]:
+        result = CliRunner().invoke(
+            cli, ["-i", str(root), "--format", "json", *options]
+        )
+        return {
+            Path(path).relative_to(root).as_posix()
+            for path in json.loads(result.output)
+        }
+
+    assert discover() == {"top.conf"}
+    assert discover("--glob", "**/*.conf") == {
+        "top.conf",
+        "site1/router.conf",
+        "site2/core/router.conf",
+        "site2/huge.conf",
+        "site2/old.conf",
+    }
+    assert discover("--glob", "site*/*.c*", "--glob", "top.conf") == {
+        "top.conf",
+        "site1/router.conf",
+        "site1/switch.cfg",
+        "site2/huge.conf",
+        "site2/old.conf",
+    }
+    assert discover(
+        "--glob", "**/*.conf", "--ignore", "old.conf", "--ignore", "/site1"
+    ) == {"top.conf", "site2/core/router.conf", "site2/huge.conf"}
+    assert "site2/huge.conf" not in discover(
+        "--glob", "**/*.conf", "--max-size", str(len(configuration))
+    )
+    assert not discover("--glob", "**/*.conf", "--newer-than", "2999-01-01")
+
+    config = root / "netlint.toml"
+    config.write_text('[netlint]\nglob = "site1/*.cfg"\n')
+    assert discover("-c", str(config)) == {"site1/switch.cfg"}